@@ -0,0 +1,142 @@
+import json
+import os
+import random
+
+from utils.re.vin import vin_check_digit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+VIN_ALPHABET = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+
+VEHICLES = (
+    ('1HG', 'Honda', 'Accord'), ('2T1', 'Toyota', 'Corolla'), ('1FT', 'Ford', 'F-150'),
+    ('5YJ', 'Tesla', 'Model 3'), ('WBA', 'BMW', '330i'), ('1C4', 'Jeep', 'Wrangler'),
+    ('JTD', 'Toyota', 'Prius'), ('3GN', 'Chevrolet', 'Equinox'), ('KM8', 'Hyundai', 'Tucson'),
+)
+
+
+def make_vehicle(index, seed=0):
+    """
+    Returns a deterministic fake vehicle with a VIN that passes check digit validation.
+
+    Args:
+    index (int): Position of the vehicle in the fixture inventory.
+    seed (int): Seed shared by one fixture site, so every run serves the same inventory.
+
+    Returns:
+    dict: Keys vin, stock, year, make, model and price.
+    """
+    rng = random.Random(seed * 1000003 + index)
+    wmi, make, model = VEHICLES[index % len(VEHICLES)]
+    year = 2016 + rng.randrange(9)
+    vds = ''.join(rng.choice(VIN_ALPHABET) for _ in range(5))
+    year_code = 'GHJKLMNPR'[year - 2016]
+    plant = rng.choice(VIN_ALPHABET)
+    serial = f'{rng.randrange(10 ** 6):06d}'
+    vin = f'{wmi}{vds}0{year_code}{plant}{serial}'
+    vin = vin[:8] + vin_check_digit(vin) + vin[9:]
+    return {
+        'vin': vin,
+        'stock': f'{make[:2].upper()}{serial[-5:]}',
+        'year': year,
+        'make': make,
+        'model': model,
+        'price': 18000 + rng.randrange(420) * 100,
+    }
+
+
+def slugify(text):
+    return ''.join(char if char.isalnum() else '-' for char in text.lower()).strip('-')
+
+
+class FixtureSite:
+    """
+    One recorded dealer site layout: a VDP template plus a manifest describing how
+    the provider lays out its sitemap and inventory URLs.
+
+    The manifest (manifest.json) has:
+    sitemap_path: Path the scraper requests the sitemap from.
+    vdp_path: Format string for VDP paths, filled with the vehicle fields plus index and slug.
+    extra_paths: Non-inventory pages listed in the sitemap (the scrapers must filter them out).
+    photo: Format string for one gallery image, filled with vin, n and slug.
+    photos: Number of gallery images rendered into {{GALLERY}}.
+    boilerplate_repeat: Copies of the shared site chrome rendered into {{BOILERPLATE}},
+    so pages have a realistic size.
+
+    The template (vdp.html) may use the placeholders {{VIN}}, {{STOCK}}, {{TITLE}},
+    {{PRICE}}, {{PRICE_RAW}}, {{GALLERY}} and {{BOILERPLATE}}.
+    """
+
+    def __init__(self, name, pages=200, seed=0, directory=FIXTURES_DIR):
+        """
+        Args:
+        name (str): Fixture directory name, e.g. 'dealerdotcom'.
+        pages (int): Number of VDPs listed in the sitemap.
+        seed (int): Seed for the generated inventory.
+        directory (str): Directory holding the fixture folders.
+        """
+        self.name = name
+        self.pages = pages
+        self.seed = seed
+        with open(os.path.join(directory, name, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(directory, name, 'vdp.html')) as f:
+            self.template = f.read()
+        with open(os.path.join(directory, 'boilerplate.html')) as f:
+            self.boilerplate = f.read() * self.manifest.get('boilerplate_repeat', 1)
+        self.vehicles = [make_vehicle(index, seed) for index in range(pages)]
+        self.vdp_paths = {self._vdp_path(index, vehicle): index for index, vehicle in enumerate(self.vehicles)}
+
+    @property
+    def sitemap_path(self):
+        return self.manifest['sitemap_path']
+
+    def _vdp_path(self, index, vehicle):
+        slug = slugify(f"{vehicle['year']} {vehicle['make']} {vehicle['model']}")
+        return self.manifest['vdp_path'].format(index=index, slug=slug, **vehicle)
+
+    def render_sitemap(self, origin):
+        """
+        Renders the sitemap with every VDP and extra page under `origin` (e.g. 'http://127.0.0.1:8000').
+        """
+        paths = list(self.manifest.get('extra_paths', [])) + list(self.vdp_paths)
+        entries = ''.join(f'<url><loc>{origin}{path}</loc><changefreq>daily</changefreq></url>\n' for path in paths)
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                f'{entries}</urlset>\n')
+
+    def render_vdp(self, path):
+        """
+        Renders the VDP served at `path`, or returns None if the path is not a VDP.
+        """
+        index = self.vdp_paths.get(path)
+        if index is None:
+            return None
+        vehicle = self.vehicles[index]
+        slug = slugify(f"{vehicle['year']} {vehicle['make']} {vehicle['model']}")
+        gallery = ''.join(self.manifest['photo'].format(vin=vehicle['vin'], n=n, slug=slug)
+                          for n in range(1, self.manifest.get('photos', 0) + 1))
+        replacements = {
+            '{{VIN}}': vehicle['vin'],
+            '{{STOCK}}': vehicle['stock'],
+            '{{TITLE}}': f"{vehicle['year']} {vehicle['make']} {vehicle['model']}",
+            '{{PRICE}}': f"${vehicle['price']:,}",
+            '{{PRICE_RAW}}': str(vehicle['price']),
+            '{{GALLERY}}': gallery,
+            '{{BOILERPLATE}}': self.boilerplate,
+        }
+        page = self.template
+        for placeholder, value in replacements.items():
+            page = page.replace(placeholder, value)
+        return page
+
+    def vdp_urls(self, origin):
+        return [f'{origin}{path}' for path in self.vdp_paths]
+
+
+def list_fixture_sites(directory=FIXTURES_DIR):
+    """
+    Returns the names of all fixture sites under `directory`.
+    """
+    return sorted(name for name in os.listdir(directory)
+                  if os.path.isfile(os.path.join(directory, name, 'manifest.json')))
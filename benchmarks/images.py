@@ -0,0 +1,124 @@
+import argparse
+import random
+import re
+import time
+
+from benchmarks.offline_backend import is_valid_image_url
+from utils.url.images import IMAGE_URL_PATTERN, normalize_image_urls
+
+BASE_URL = 'https://www.springfieldautogroup.com'
+WIDTHS = (320, 640, 1024, 1920)
+
+
+def make_gallery(photos, seed=0):
+    """
+    Returns the (data-src, src, srcset) attribute triples of a VDP gallery with `photos`
+    images, laid out the way lazy-loading dealer themes do: every photo appears in the main
+    carousel and in the thumbnail strip, URLs mix protocol-relative, root-relative and
+    absolute forms with resize query strings, and a few placeholders and icons are mixed in.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for n in range(1, photos + 1):
+        path = f'/inventory/1HGCV1F34LA{seed:06d}/{n}'
+        host = rng.choice(('//cdn.dealerimages.com', 'https://cdn.dealerimages.com', ''))
+        srcset = ', '.join(f'https://cdn.dealerimages.com{path}-{width}.jpg {width}w' for width in WIDTHS)
+        rows.append((f'{host}{path}x640.jpg?impolicy=resize&w=640', '/img/placeholder.gif', srcset))
+        rows.append((None, f'{host}{path}x640.jpg?impolicy=thumb&w=120', None))
+        if n % 20 == 0:
+            rows.append((None, '/wp-content/themes/dealer/images/icon-360.svg', None))
+    return rows
+
+
+def get_highest_resolution_image(srcset):
+    highest_res = 0
+    highest_res_url = None
+    for entry in srcset.split(","):
+        parts = entry.strip().split(" ")
+        if len(parts) == 2 and parts[1].endswith("w"):
+            res = int(parts[1][:-1])
+            if res > highest_res:
+                highest_res = res
+                highest_res_url = parts[0]
+    return highest_res_url
+
+
+def normalize_per_element(rows, base_url, remove=None):
+    """
+    The per-<img> loop the providers used before normalize_image_urls, kept as the baseline.
+    """
+    images = set()
+    for data_src, src, srcset in rows:
+        src_url = data_src or src
+        src_url = src_url.split('?')[0]
+        if src_url:
+            if src_url.startswith('//'):
+                src_url = 'https:' + src_url
+            if src_url.startswith('/') and not src_url.startswith('//'):
+                src_url = base_url + src_url
+            if is_valid_image_url(src_url):
+                images.add(src_url)
+        if srcset:
+            highest_res_image = get_highest_resolution_image(srcset)
+            if highest_res_image:
+                if highest_res_image.startswith('/') and not highest_res_image.startswith('//'):
+                    highest_res_image = base_url + highest_res_image
+                if is_valid_image_url(highest_res_image):
+                    images.add(highest_res_image)
+    if remove:
+        pattern = re.compile(remove)
+        images = [pattern.sub('', image) for image in images]
+    return list(images)
+
+
+def normalize_batch(rows, base_url, remove=None, is_valid=is_valid_image_url):
+    return normalize_image_urls((data_src or src for data_src, src, _ in rows), base_url,
+                                srcsets=[srcset for _, _, srcset in rows], strip_query=True, absolute=True,
+                                is_valid=is_valid, remove=remove)
+
+
+def normalize_batch_pattern(rows, base_url, remove=None):
+    return normalize_batch(rows, base_url, remove, is_valid=IMAGE_URL_PATTERN)
+
+
+def best_time(function, rows, repeat, remove):
+    """
+    Returns the fastest of `repeat` timed runs, in microseconds, and the URLs from the last one.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        images = function(rows, BASE_URL, remove)
+        elapsed = (time.perf_counter() - started) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best, images
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-element and batch image URL normalization.')
+    parser.add_argument('--photos', type=int, nargs='+', default=[25, 100, 250, 1000],
+                        help='Gallery sizes to benchmark.')
+    parser.add_argument('--repeat', type=int, default=200, help='Runs per gallery; the fastest is reported.')
+    parser.add_argument('--remove', default=r'x\d+',
+                        help="Regex deleted from every URL, as for Ansira size segments ('' to disable).")
+    args = parser.parse_args()
+
+    # batch: is_valid_image_url called once per distinct URL; batch+pattern: IMAGE_URL_PATTERN over the whole batch
+    variants = (('batch', normalize_batch), ('batch+pattern', normalize_batch_pattern))
+    print(f"{'photos':>7} {'candidates':>11} {'per-element us':>15} "
+          + ' '.join(f'{name + " us":>17} {"speedup":>8}' for name, _ in variants) + f" {'urls':>6} {'same':>5}")
+    for photos in args.photos:
+        rows = make_gallery(photos)
+        legacy_us, legacy_images = best_time(normalize_per_element, rows, args.repeat, args.remove or None)
+        cells = []
+        same = True
+        for _, function in variants:
+            batch_us, batch_images = best_time(function, rows, args.repeat, args.remove or None)
+            same = same and set(legacy_images) == set(batch_images)
+            cells.append(f'{batch_us:17.1f} {legacy_us / batch_us:7.2f}x')
+        print(f'{photos:7d} {len(rows):11d} {legacy_us:15.1f} ' + ' '.join(cells)
+              + f' {len(batch_images):6d} {str(same):>5}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
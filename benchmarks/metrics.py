@@ -0,0 +1,116 @@
+import functools
+import multiprocessing
+import resource
+import sys
+import time
+
+from utils.html.compression import get_transfer_stats
+
+
+class ParseTimer:
+    """
+    Sums the CPU time spent inside parse functions across all threads.
+
+    Uses per-thread CPU time, so time other threads spend fetching or serving while a
+    parse is running is not counted. The totals live in shared memory, so parses in
+    extraction worker processes forked after the timer was created are counted too.
+    """
+
+    def __init__(self):
+        self._calls = multiprocessing.Value('q', 0, lock=False)
+        self._cpu_seconds = multiprocessing.Value('d', 0.0, lock=False)
+        self._lock = multiprocessing.Lock()
+
+    @property
+    def calls(self):
+        return self._calls.value
+
+    @property
+    def cpu_seconds(self):
+        return self._cpu_seconds.value
+
+    def wrap(self, parse):
+        """
+        Returns `parse` wrapped so every call is added to this timer.
+        """
+        @functools.wraps(parse)
+        def timed_parse(*args, **kwargs):
+            started = time.thread_time()
+            try:
+                return parse(*args, **kwargs)
+            finally:
+                elapsed = time.thread_time() - started
+                with self._lock:
+                    self._calls.value += 1
+                    self._cpu_seconds.value += elapsed
+
+        return timed_parse
+
+
+def children_cpu_seconds():
+    """
+    Returns the CPU time used by child processes that have exited, e.g. extraction workers.
+    """
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Measurement:
+    """
+    Collects the metrics of one benchmark scenario: wall time, pages/sec, request
+    latency percentiles, parse CPU time, total CPU time (including worker processes)
+    and peak RSS.
+
+    Usage:
+        with Measurement(parse_timer) as measurement:
+            run_scenario()
+        result = measurement.result(pages=len(urls))
+    """
+
+    def __init__(self, parse_timer=None):
+        self.parse_timer = parse_timer
+
+    def __enter__(self):
+        get_transfer_stats().reset()
+        self.rss_before = peak_rss_mb()
+        self.cpu_started = time.process_time() + children_cpu_seconds()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_seconds = time.perf_counter() - self.started
+        self.cpu_seconds = time.process_time() + children_cpu_seconds() - self.cpu_started
+
+    def result(self, pages, **extra):
+        """
+        Returns the scenario metrics as a JSON-serialisable dict.
+
+        Args:
+        pages (int): Number of pages the scenario processed.
+        extra: Additional fields to include, e.g. the number of VINs scraped.
+        """
+        transfer = get_transfer_stats()
+        p50, p99 = transfer.latency_percentile(50), transfer.latency_percentile(99)
+        return {
+            'pages': pages,
+            'wall_seconds': round(self.wall_seconds, 3),
+            'pages_per_second': round(pages / self.wall_seconds, 1) if self.wall_seconds else None,
+            'latency_p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'latency_p99_ms': round(p99 * 1000, 1) if p99 is not None else None,
+            'parse_cpu_seconds': round(self.parse_timer.cpu_seconds, 3) if self.parse_timer else None,
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'baseline_rss_mb': round(self.rss_before, 1),
+            'wire_bytes': transfer.wire_bytes,
+            'body_bytes': transfer.body_bytes,
+            **extra,
+        }
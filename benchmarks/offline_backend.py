@@ -0,0 +1,68 @@
+import os
+import re
+from urllib.parse import urlparse
+
+from utils.html.fetch import fetch_html
+from utils.html.parse import parse_html
+from utils.sitemap.backend import HttpSitemapBackend
+
+# Offline stand-in for the `web_scraping` helpers that dealer_scraping.py imports.
+# In production those helpers drive a headless browser and report to the dealers API.
+# Here browser fetches are served by fetch_html from the local fixture server and the
+# API calls are recorded in memory, so every scrape_* function runs unchanged offline.
+
+IMAGE_EXTENSION_PATTERN = re.compile(r'\.(jpe?g|png|webp|gif|avif)$', re.IGNORECASE)
+
+vin_updates = []
+status_updates = []
+
+
+class OfflineDriver:
+    """
+    Placeholder for a Selenium WebDriver; the scrapers only quit() it when no XPath is configured.
+    """
+
+    def quit(self):
+        pass
+
+
+def _local_url(url):
+    # The scrapers build sitemap URLs as https://{netloc}/...; the fixture server speaks plain HTTP
+    return 'http' + url[len('https'):] if url.startswith('https://') else url
+
+
+def setup_driver():
+    return OfflineDriver()
+
+
+def fetch_html_content_using_selenium(url, wait_time=10):
+    html, _ = fetch_html(_local_url(url), use_cache=False)
+    return parse_html(html)
+
+
+class OfflineSitemapBackend(HttpSitemapBackend):
+    """
+    Sitemap engine backend that fetches the scrapers' https:// sitemap URLs from the fixture server.
+    """
+
+    name = 'offline'
+
+    def open(self, url, headers=None):
+        return super().open(_local_url(url), headers)
+
+
+def create_directory(name):
+    os.makedirs(name, exist_ok=True)
+    return name
+
+
+def is_valid_image_url(url):
+    return bool(url) and IMAGE_EXTENSION_PATTERN.search(urlparse(url).path) is not None
+
+
+def addVins(payload):
+    vin_updates.append(len(payload.get('vins', {})))
+
+
+def updateConfigStatus(payload):
+    status_updates.append(payload)
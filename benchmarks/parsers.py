@@ -0,0 +1,79 @@
+import argparse
+import importlib.util
+import time
+import tracemalloc
+
+from benchmarks.fixtures import FixtureSite, list_fixture_sites
+from utils.html.parse import SELECTOLAX_AVAILABLE, parse_html, parse_html_fast, select_attributes
+
+
+def available_backends(parse_only=None):
+    """
+    Returns (name, parse function) for every parser backend installed here. With
+    `parse_only`, the lxml and html.parser backends are also run with those targets.
+    """
+    # The parsed-document cache is bypassed, so every repeat really parses
+    backends = [('html.parser', lambda html: parse_html(html, 'html.parser', use_cache=False))]
+    if importlib.util.find_spec('lxml'):
+        backends.append(('lxml', lambda html: parse_html(html, 'lxml', use_cache=False)))
+    if importlib.util.find_spec('html5lib'):
+        backends.append(('html5lib', lambda html: parse_html(html, 'html5lib', use_cache=False)))
+    if SELECTOLAX_AVAILABLE:
+        backends.append(('selectolax', parse_html_fast))
+    if parse_only:
+        for name in ('html.parser', 'lxml'):
+            if any(backend == name for backend, _ in backends):
+                backends.append((f'{name}+targets',
+                                 lambda html, name=name: parse_html(html, name, parse_only=parse_only,
+                                                                    use_cache=False)))
+    return backends
+
+
+def benchmark_backend(parse, pages, repeat=3):
+    """
+    Parses every page `repeat` times and returns the best CPU time per page in seconds,
+    the memory allocated for one page's tree in bytes, and the number of <img src>
+    elements found in that tree (to compare trees).
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        for page in pages:
+            parse(page)
+        elapsed = (time.process_time() - started) / len(pages)
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    tree = parse(pages[0])
+    tree_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return best, tree_bytes, len(select_attributes(tree, 'img', 'src'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare HTML parser backends on the recorded dealer pages.')
+    parser.add_argument('sites', nargs='*', help='Fixture sites to use (default: all).')
+    parser.add_argument('--pages', type=int, default=10, help='Pages rendered per site.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per backend; the fastest is reported.')
+    parser.add_argument('--parse-only', nargs='+', metavar='TARGET',
+                        help="Also time partial parsing with these targets, e.g. --parse-only script 'img[src]'.")
+    args = parser.parse_args()
+
+    backends = available_backends(args.parse_only)
+    # Each cell: CPU ms per page, speedup over html.parser, tree size, <img src> count
+    print(f"{'site':>16} {'KiB/page':>9} " + ' '.join(f'{name:>27}' for name, _ in backends))
+    for name in args.sites or list_fixture_sites():
+        site = FixtureSite(name, pages=args.pages)
+        pages = [site.render_vdp(path) for path in site.vdp_paths]
+        size = sum(len(page.encode('utf-8')) for page in pages) / len(pages) / 1024
+        cells = []
+        baseline = None
+        for _, parse in backends:
+            seconds, tree_bytes, images = benchmark_backend(parse, pages, args.repeat)
+            baseline = baseline or seconds
+            cells.append(f'{seconds * 1000:6.1f}ms {baseline / seconds:5.1f}x {tree_bytes / 1024:6.0f}K {images:3d}i')
+        print(f'{name:>16} {size:9.0f} ' + ' '.join(f'{cell:>27}' for cell in cells), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import re
+
+from benchmarks.fixtures import FIXTURES_DIR
+from utils.html.fetch import fetch_html
+
+VIN_PATTERN = re.compile(r'\b[A-HJ-NPR-Z0-9]{17}\b')
+
+
+def record_vdp(url, name, vin=None, sitemap_path=None, vdp_path=None, directory=FIXTURES_DIR):
+    """
+    Records a live VDP as a fixture template. This is the only part of the benchmark
+    suite that uses the network; the recorded fixture is then served offline.
+
+    The page's VIN is replaced with {{VIN}} so the fixture server can render any number
+    of distinct vehicles from the one recording.
+
+    Args:
+    url (str): URL of a vehicle details page on the dealer site.
+    name (str): Fixture directory to write, e.g. 'dealerdotcom'.
+    vin (str): VIN shown on the page. Defaults to the first VIN-shaped token in the HTML.
+    sitemap_path (str): Sitemap path for a new manifest, e.g. '/sitemap.xml'.
+    vdp_path (str): VDP path format for a new manifest, e.g. '/used/{make}/{slug}-{vin}.htm'.
+    directory (str): Directory holding the fixture folders.
+
+    Returns:
+    str: Path of the written template, or None if the page could not be recorded.
+    """
+    html, status_code = fetch_html(url, use_cache=False)
+    if not html:
+        print(f"Failed to fetch {url} (status {status_code})")
+        return None
+    if vin is None:
+        match = VIN_PATTERN.search(html)
+        if not match:
+            print(f"No VIN found on {url}; pass --vin")
+            return None
+        vin = match.group()
+
+    fixture_dir = os.path.join(directory, name)
+    os.makedirs(fixture_dir, exist_ok=True)
+    template_path = os.path.join(fixture_dir, 'vdp.html')
+    with open(template_path, 'w') as f:
+        f.write(html.replace(vin, '{{VIN}}'))
+
+    manifest_path = os.path.join(fixture_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        with open(manifest_path, 'w') as f:
+            json.dump({'sitemap_path': sitemap_path or '/sitemap.xml',
+                       'vdp_path': vdp_path or '/inventory/{slug}-{vin}',
+                       'extra_paths': ['/'],
+                       'photo': '',
+                       'photos': 0}, f, indent=4)
+    print(f"Recorded {url} to {template_path} ({html.count(vin)} VIN occurrences)")
+    return template_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record a live dealer VDP as a benchmark fixture.')
+    parser.add_argument('url', help='URL of a vehicle details page.')
+    parser.add_argument('name', help='Fixture name, e.g. dealerdotcom.')
+    parser.add_argument('--vin', help='VIN shown on the page (default: detect).')
+    parser.add_argument('--sitemap-path', help='Sitemap path the scraper requests, for a new manifest.')
+    parser.add_argument('--vdp-path', help='VDP path format, for a new manifest.')
+    args = parser.parse_args()
+    record_vdp(args.url, args.name, args.vin, args.sitemap_path, args.vdp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import FixtureSite
+from benchmarks.metrics import Measurement, ParseTimer
+from benchmarks.server import FixtureServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# scenario name -> (fixture site, dealer_scraping function or None for a plain fetch_html crawl)
+SCENARIOS = {
+    'fetch_html': ('dealerdotcom', None),
+    'ansira': ('ansira', 'scrape_ansira'),
+    'dealerdotcom': ('dealerdotcom', 'scrape_dealerdotcom'),
+    'overfuel': ('overfuel', 'scrape_overfuel'),
+    'dealer_inspire': ('dealer_inspire', 'scrape_dealer_inspire'),
+    'foxdealer': ('foxdealer', 'scrape_foxdealerdotcom'),
+    'teamvelocity': ('teamvelocity', 'scrape_teamvelocity'),
+    'autocorner': ('autocorner', 'scrape_autocornerdotcom'),
+}
+
+COLUMNS = (
+    ('scenario', 'scenario', 16), ('pages', 'pages', 6), ('vins', 'vins', 6),
+    ('pages_per_second', 'pages/s', 9), ('latency_p50_ms', 'p50 ms', 8), ('latency_p99_ms', 'p99 ms', 8),
+    ('parse_cpu_seconds', 'parse cpu s', 12), ('cpu_seconds', 'cpu s', 8), ('peak_rss_mb', 'peak rss MB', 12),
+)
+
+
+def configure_offline_crawl():
+    """
+    Removes the politeness limits, the response cache, the sitemap location cache and the
+    parsed-document cache so a benchmark measures the crawl itself: every page is downloaded
+    and parsed, and every sitemap discovered, on every run. Sitemaps are fetched from the
+    fixture server without browser escalation.
+    """
+    from utils.html.cache import configure_response_cache
+    from utils.html.parse_cache import configure_parse_cache
+    from utils.html.rate_limit import configure_scheduler
+    from utils.sitemap.engine import configure_sitemap_engine
+    from utils.sitemap.location_cache import configure_sitemap_location_cache
+    from benchmarks.offline_backend import OfflineSitemapBackend
+
+    configure_response_cache('')
+    configure_sitemap_location_cache('')
+    configure_parse_cache(0)
+    configure_scheduler(requests_per_second=0, max_in_flight=1000)
+    # Sitemaps come from the fixture server, which never needs a browser
+    configure_sitemap_engine(OfflineSitemapBackend(), browser='')
+
+
+def run_fetch_html(site, origin, concurrency):
+    """
+    Fetches and parses every VDP of `site` with fetch_html from a thread pool.
+    """
+    from utils.html.fetch import fetch_html
+    from utils.html.parse import parse_html
+
+    parse_timer = ParseTimer()
+    parse = parse_timer.wrap(parse_html)
+    urls = site.vdp_urls(origin)
+
+    def fetch_and_parse(url):
+        html, _ = fetch_html(url, use_cache=False)
+        return parse(html) is not None
+
+    with Measurement(parse_timer) as measurement:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            parsed = sum(executor.map(fetch_and_parse, urls))
+    return measurement.result(pages=len(urls), vins=parsed)
+
+
+def run_scraper(function_name, site, origin):
+    """
+    Runs one dealer_scraping.scrape_* function end to end against the fixture server.
+    """
+    from benchmarks import offline_backend
+
+    sys.modules['web_scraping'] = offline_backend
+    from scrapers.dealership_website_providers import dealer_scraping
+    from utils.html import recipe
+
+    parse_timer = ParseTimer()
+    # Scrapers parse through their compiled recipes; the Selenium stand-in parses in offline_backend
+    dealer_scraping.parse_html = offline_backend.parse_html = recipe.parse_html = parse_timer.wrap(
+        offline_backend.parse_html)
+    recipe.parse_html_fast = parse_timer.wrap(recipe.parse_html_fast)
+
+    with Measurement(parse_timer) as measurement:
+        data = getattr(dealer_scraping, function_name)(f'{origin}/', lambda_id='benchmark',
+                                                        scraper_id='benchmark', end_index=site.pages)
+    return measurement.result(pages=site.pages, vins=len(data['vins']) if data else 0,
+                              failures=len(offline_backend.status_updates))
+
+
+def run_worker(args):
+    """
+    Runs a single scenario in this process and writes its metrics to args.output.
+    """
+    site_name, function_name = SCENARIOS[args.worker]
+    site = FixtureSite(site_name, pages=args.pages)
+    configure_offline_crawl()
+    # Scrapers write their output files relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix=f'bench-{args.worker}-'))
+    if function_name:
+        result = run_scraper(function_name, site, args.origin)
+    else:
+        result = run_fetch_html(site, args.origin, args.concurrency)
+    with open(args.output, 'w') as f:
+        json.dump({'scenario': args.worker, **result}, f)
+
+
+def run_scenario(name, origin, args):
+    """
+    Runs one scenario in a fresh interpreter, so peak RSS and CPU time are its own.
+    """
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    command = [sys.executable, '-m', 'benchmarks.run', '--worker', name, '--origin', origin,
+               '--pages', str(args.pages), '--concurrency', str(args.concurrency), '--output', output]
+    env = {**os.environ, 'PYTHONPATH': REPO_ROOT}
+    if args.parse_workers:
+        env['PARSE_WORKERS'] = str(args.parse_workers)
+    # Forked workers inherit the offline web_scraping stand-in and the parse timers, and count
+    # towards this process's CPU time
+    env.setdefault('PARSE_START_METHOD', 'fork')
+    try:
+        completed = subprocess.run(command, cwd=REPO_ROOT, env=env,
+                                   stdout=None if args.verbose else subprocess.DEVNULL,
+                                   stderr=None if args.verbose else subprocess.DEVNULL)
+        if completed.returncode != 0:
+            return {'scenario': name, 'error': f'exit code {completed.returncode}'}
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        os.remove(output)
+
+
+def format_header():
+    return ' '.join(title.rjust(width) for _, title, width in COLUMNS)
+
+
+def format_row(result):
+    if 'error' in result:
+        return f"{result['scenario'].rjust(COLUMNS[0][2])} {result['error']}"
+    return ' '.join(str(result.get(key, '')).rjust(width) for key, _, width in COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the dealer scrape pipeline.')
+    parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run (default: all): {', '.join(SCENARIOS)}.")
+    parser.add_argument('--pages', type=int, default=100, help='VDPs per fixture site.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads for the fetch_html scenario.')
+    parser.add_argument('--parse-workers', type=int,
+                        help='Extraction processes for the requests-based scrapers (default: PARSE_WORKERS or one per core).')
+    parser.add_argument('--delay', type=float, default=0.0, help='Simulated server think time per request, in seconds.')
+    parser.add_argument('--json', help='Also write the results to this JSON file.')
+    parser.add_argument('--verbose', action='store_true', help='Show scraper and log output.')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--origin', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    print(format_header(), flush=True)
+    servers = {}
+    results = []
+    try:
+        for name in names:
+            site_name = SCENARIOS[name][0]
+            if site_name not in servers:
+                servers[site_name] = FixtureServer(FixtureSite(site_name, pages=args.pages), delay=args.delay).start()
+            results.append(run_scenario(name, servers[site_name].origin, args))
+            print(format_row(results[-1]), flush=True)
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class FixtureServer:
+    """
+    Serves one FixtureSite over HTTP on localhost from a background thread.
+
+    Responses are gzip-compressed when the client asks for it, as dealer sites do, and an
+    optional per-request delay simulates server think time. Nothing leaves the machine.
+    """
+
+    def __init__(self, site, host='127.0.0.1', port=0, delay=0.0):
+        """
+        Args:
+        site (FixtureSite): The site to serve.
+        host (str): Interface to bind. Default is loopback only.
+        port (int): Port to bind, 0 for an ephemeral port.
+        delay (float): Seconds to wait before answering each request.
+        """
+        self.site = site
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def origin(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler_class(self):
+        server = self
+
+        class FixtureRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.delay:
+                    threading.Event().wait(server.delay)
+
+                path = urlparse(self.path).path
+                if path == server.site.sitemap_path:
+                    body, content_type = server.site.render_sitemap(server.origin), 'application/xml'
+                else:
+                    body, content_type = server.site.render_vdp(path), 'text/html; charset=utf-8'
+                if body is None:
+                    self.send_error(404)
+                    return
+
+                body = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=5)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return FixtureRequestHandler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=f'fixture-{self.site.name}',
+                                        daemon=True)
+        self._thread.start()
+        logger.debug(f"Serving fixture site {self.site.name} at {self.origin}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,12 +1,16 @@
+from urllib.parse import urlparse
+
+from utils.sitemap.engine import fetch_sitemap_urls
+
+
 def get_vdp_urls_from_sitemap(sitemap_url):
     """
     Fetch all VDP URLs from the sitemap URL.
     This function parses the sitemap and filters out VDP URLs based on specific patterns.
     """
     try:
-        # Fetch the sitemap content using Selenium
-        sitemap_content = fetch_sitemap_using_selenium(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        # Fetched over HTTP, or in a browser if the host refuses plain HTTP clients
+        all_urls = fetch_sitemap_urls(sitemap_url)
 
         vdp_urls = []
         for url in all_urls:
@@ -21,4 +25,4 @@ def get_vdp_urls_from_sitemap(sitemap_url):
         return vdp_urls
     except Exception as e:
         print(f"Error fetching or parsing sitemap: {e}")
-        return []
\ No newline at end of file
+        return []
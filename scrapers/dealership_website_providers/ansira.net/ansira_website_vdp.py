@@ -1,10 +1,15 @@
 import re
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 
-from helpers.utils.html.fetch_html import fetch_html
-from helpers.utils.html.parse_html import parse_html
+from utils.html.extract_pool import DEFAULT_WORKERS, ExtractionPool
+from utils.html.fetch import fetch_html
+from utils.html.parse import parse_html
+from ansira_sitemap_vdp_urls import get_vdp_urls_from_sitemap
 
+# Threads downloading VDPs; parsing happens in PARSE_WORKERS processes (one per core by default)
+NUMBER_OF_WORKERS = 8
+PARSE_WORKERS = DEFAULT_WORKERS
 
 
 def extract_vin(soup):
@@ -31,20 +36,37 @@ def extract_images(soup):
     pattern = re.compile(r'x\d+')
     return [pattern.sub('', img) for img in images]
 
-def scrape_vdp(vdp_url):
+def fetch_vdp_pages(vdp_urls):
+    """
+    Download VDP pages on NUMBER_OF_WORKERS threads and yield (url, html) as each one completes.
+    """
+    with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
+        futures = {executor.submit(fetch_html, vdp_url): vdp_url for vdp_url in vdp_urls}
+        for future in as_completed(futures):
+            try:
+                html, _ = future.result()
+            except Exception as e:
+                print(f"Error fetching VDP URL {futures[future]}: {e}")
+                continue
+            if html:
+                yield futures[future], html
+
+
+def scrape_vdp(html):
     """
     Scrape a single VDP page for VIN and image URLs.
+    Runs in an extraction worker process, so only the (vin, images) tuple is sent back.
     """
     try:
-        html = fetch_html(vdp_url)
-        soup = parse_html(html)
+        soup = parse_html(html, use_cache=False)
         vin = extract_vin(soup)
         images = extract_images(soup)
         return vin, images
     except Exception as e:
-        print(f"Error scraping VDP URL {vdp_url}: {e}")
+        print(f"Error scraping VDP: {e}")
         return None, []
-    
+
+
 def main(url, start_index=0, end_index=0):
     """
     Main function to fetch and process VDP URLs from the sitemap.
@@ -64,18 +86,18 @@ def main(url, start_index=0, end_index=0):
     # Step 3: Initialize data dictionary
     data = {'website_name': website_name, 'vins': {}}
 
-    # Step 4: Process each VDP URL in parallel using ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-        results = list(executor.map(scrape_vdp, vdp_urls))
-
-    # Step 5: Collect results into the data dictionary
-    for vin, images in results:
-        if vin:
-            data['vins'][vin] = {'scraped_images_url': images}
+    # Step 4: Download VDPs on threads and parse them in worker processes
+    with ExtractionPool(PARSE_WORKERS) as pool:
+        # Step 5: Collect results into the data dictionary as pages finish
+        for vdp_url, (vin, images) in pool.imap_unordered(scrape_vdp, fetch_vdp_pages(vdp_urls)):
+            if vin:
+                data['vins'][vin] = {'scraped_images_url': images}
 
     return data
 
-# Example usage
-url = "https://exampledealership.com"  # Replace with actual dealership URL
-data = main(url, start_index=0, end_index=10)
-print(data)
\ No newline at end of file
+
+if __name__ == '__main__':
+    # Example usage
+    url = "https://exampledealership.com"  # Replace with actual dealership URL
+    data = main(url, start_index=0, end_index=10)
+    print(data)
@@ -1,50 +1,166 @@
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
 import os
 from urllib.parse import urlparse
-import re
 import json
 from selenium.webdriver.common.by import By
-import requests
-from web_scraping import setup_driver, fetch_html_content_using_selenium, fetch_html_content_using_requests, fetch_sitemap_using_requests, fetch_sitemap_using_selenium, parse_sitemap, create_directory, is_valid_image_url, addVins, updateConfigStatus
+from web_scraping import setup_driver, fetch_html_content_using_selenium, create_directory, is_valid_image_url, addVins, updateConfigStatus
+
+from utils.html.cache import NOT_MODIFIED, get_response_cache
+from utils.html.dns import get_dns_cache
+from utils.html.extract_pool import DEFAULT_WORKERS, ExtractionPool
+from utils.html.fetch_async import iter_html
+from utils.html.retry import RetryBudget
+from utils.html.recipe import compile_recipe
+from utils.logger.setup import setup_logger
+from utils.sitemap.discovery import fetch_site_sitemap_urls
+from utils.sitemap.engine import fetch_sitemap_urls
+from scrapers.dealership_website_providers.recipes import RECIPES
+from scrapers.dealership_website_providers.sitemaps import SITEMAP_CANDIDATES
+
+logger = setup_logger(__name__)
 
 NUMBER_OF_WORKERS = 1
+# Requests-based scrapers fetch VDPs on one event loop instead of one thread per URL
+MAX_CONCURRENT_REQUESTS = 100
+MAX_REQUESTS_PER_HOST = 8
+# Processes that parse and extract the pages those scrapers download; one per core unless PARSE_WORKERS is set
+PARSE_WORKERS = DEFAULT_WORKERS
 
-vin_pattern = re.compile(r'[A-HJ-NPR-Z0-9]{17}')
 # updateConfigApiUrl = "https://api.spyne.ai/dealers/v1/scraper/update-config"
 
 
+def fetch_html_pages(urls):
+    """
+    Fetches VDP pages concurrently and yields (url, html) pairs as each one completes.
+    Pages that fail to download are logged by the fetch layer and skipped. All retries
+    in one call share a RetryBudget, so a flaky dealer cannot stall the whole crawl.
+    """
+    for page_url, _, html in fetch_html_responses(urls):
+        yield page_url, html
+
+
+def fetch_html_responses(urls):
+    """
+    Like fetch_html_pages, but yields (url, status, html) triples, so callers can tell a
+    page served from the response cache after a 304 from a fresh download.
+    """
+    # Resolve every VDP host up front so the first request per host skips the DNS lookup
+    get_dns_cache().prefetch(urlparse(page_url).hostname for page_url in urls)
+    retry_budget = RetryBudget()
+    for page_url, status, html in iter_html(urls, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                                            per_host_limit=MAX_REQUESTS_PER_HOST, retry_budget=retry_budget):
+        if html:
+            yield page_url, status, html
+    logger.info(f"Retry stats: {retry_budget.stats()}")
+
+
 def filter_urls(urls, pattern):
     return [url for url in urls if pattern in url]
 
 
+def fetch_dealer_sitemap_urls(website_name, provider, custom_sitemap_url=None):
+    """
+    Returns the page URLs of a dealer site's sitemap.
+
+    A configured custom_sitemap_url is used as-is. Otherwise the sitemap is discovered from
+    the site's robots.txt and the provider's SITEMAP_CANDIDATES, and the location that worked
+    is cached per domain for later runs.
+
+    Raises:
+    IOError: If no sitemap is found or it lists no pages, so the scraper reports the
+    run as failed instead of finishing with no VINs.
+    """
+    if custom_sitemap_url:
+        urls = fetch_sitemap_urls(custom_sitemap_url)
+    else:
+        urls = fetch_site_sitemap_urls(f'https://{website_name}', SITEMAP_CANDIDATES[provider])
+    if not urls:
+        raise IOError(f"No URLs found in the sitemap of {website_name}")
+    return urls
+
+
+@lru_cache(maxsize=None)
+def get_extractor(provider):
+    """
+    Returns the compiled extractor for a provider's recipe in recipes.py. Each recipe is
+    compiled once per process; call the extractor with a page's HTML (or parsed tree).
+    """
+    return compile_recipe(RECIPES[provider], is_valid_image_url)
+
+
+def extract_page(provider, html):
+    """
+    Extracts one VDP with a provider's recipe. Runs in the extraction pool's worker
+    processes, so only the compact result (vin, images, price, currency) is sent back.
+    """
+    return get_extractor(provider)(html)
+
+
+def extract_html_pages(provider, urls):
+    """
+    Fetches VDPs like fetch_html_pages and parses and extracts them in a pool of
+    PARSE_WORKERS processes, so extraction runs on every core while the event loop keeps
+    downloading. Yields (url, vehicle) pairs as pages finish, in completion order.
+
+    Each extracted vehicle is kept in the response cache next to the page. When the server
+    answers 304 for a page extracted from the same body before, that vehicle is reused and
+    the page is neither parsed nor extracted again.
+    """
+    cache = get_response_cache()
+    namespace = f'vehicle:{provider}'
+    reused = deque()
+
+    def pages_to_extract():
+        for page_url, status, html in fetch_html_responses(urls):
+            vehicle = cache.get_derived(page_url, namespace, html) if cache and status == NOT_MODIFIED else None
+            if vehicle is not None:
+                reused.append((page_url, vehicle))
+            else:
+                bodies[page_url] = html
+                yield page_url, html
+
+    bodies = {}
+    # The pool is entered before fetch_html_responses starts its event loop, so its workers are up before any page arrives
+    with ExtractionPool(PARSE_WORKERS) as pool:
+        for page_url, vehicle in pool.imap_unordered(partial(extract_page, provider), pages_to_extract()):
+            html = bodies.pop(page_url, None)
+            if cache and html is not None:
+                cache.put_derived(page_url, namespace, html, vehicle)
+            yield page_url, vehicle
+            while reused:
+                yield reused.popleft()
+        while reused:
+            yield reused.popleft()
+
+
+def extract_with_xpaths(extract, soup, base_url, driver, vin_x_path=None, image_container_x_path=None):
+    """
+    Extracts the VIN and images of a page rendered in Selenium. XPaths configured for the
+    dealer take precedence over the provider recipe; images found through them go through
+    the recipe's URL normalization.
+    """
+    vehicle = extract(soup, base_url=base_url)
+    vin, images = vehicle['vin'], vehicle['images']
+    if vin_x_path:
+        vin = driver.find_element(by=By.XPATH, value=vin_x_path).text
+    if image_container_x_path:
+        image_elements = driver.find_element(
+            by=By.XPATH, value=image_container_x_path).find_elements(By.TAG_NAME, 'img')
+        images = extract.normalize_images(
+            (img.get_attribute('src') for img in image_elements if img.get_attribute('src')), base_url)
+    return vin, images
+
+
 def scrape_ansira(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
-    def extract_vin_data(soup):
-        vin = None
-        images = set()
-        vin = None
-        for text in soup.stripped_strings:
-            match = vin_pattern.search(text)
-            if match:
-                vin = match.group()
-                break
-        for section in soup.find_all('section', id=re.compile(r'vdp-photos-dealershipPhotoGallery.*')):
-            for img in section.find_all('img'):
-                src = img.get('src')
-                if src:
-                    if (is_valid_image_url(src) == False):
-                        continue
-                    src = src.split('?')[0]
-                    images.add(src)
-
-        pattern = re.compile(r'x\d+')
-        images = [pattern.sub('', img) for img in images]
-        # find all the span with item
-        return vin, list(images)
+    extract = get_extractor('ansira')
 
     def process_url(url, website_name, data):
         soup = fetch_html_content_using_selenium(url, 0)
 
-        vin, images = extract_vin_data(soup)
+        vehicle = extract(soup)
+        vin, images = vehicle['vin'], vehicle['images']
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images}
@@ -59,10 +175,8 @@ def scrape_ansira(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
     create_directory(website_name)
-    sitemap_url = f'https://{website_name}/sitemap-inventory-sincro.xml'
     try:
-        sitemap_content = fetch_sitemap_using_selenium(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'ansira')
 
         inventory_urls = []
         for url in all_urls:
@@ -100,17 +214,8 @@ def scrape_ansira(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
 
 def scrape_dealerdotcom(url, lambda_id,scraper_id=None, start_index=0, end_index=0):
 
-    def extract_vin_data(soup):
-
-        vin = soup.find('input', {'name': 'vin'})['value'] if soup.find(
-            'input', {'name': 'vin'}) else 'No VIN found'
-        images = [img['src'] for img in soup.select(
-            '#media1-app-root img[src]') if is_valid_image_url(img['src'])]
-        return vin, ', '.join(images)
-
-    def process_url(url, website_name, data):
-        soup = fetch_html_content_using_requests(url)
-        vin, images = extract_vin_data(soup)
+    def process_url(vehicle, website_name, data):
+        vin, images = vehicle['vin'], vehicle['images']
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images}
@@ -125,10 +230,8 @@ def scrape_dealerdotcom(url, lambda_id,scraper_id=None, start_index=0, end_index
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
     base_directory = create_directory(website_name)
-    sitemap_url = f'https://{website_name}/sitemap.xml'
     try:
-        sitemap_content = fetch_sitemap_using_requests(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'dealerdotcom')
         used_car_urls = filter_urls(all_urls, 'used/')
         new_car_urls = filter_urls(all_urls, 'new/')
 
@@ -143,21 +246,8 @@ def scrape_dealerdotcom(url, lambda_id,scraper_id=None, start_index=0, end_index
             'vins': {}
         }
 
-        with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-            futures = []
-            for used_car_url in used_car_urls:
-                futures.append(executor.submit(
-                    process_url, used_car_url, website_name, data))
-            for future in as_completed(futures):
-                result = future.result()
-
-        with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-            futures = []
-            for new_car_url in new_car_urls:
-                futures.append(executor.submit(
-                    process_url, new_car_url, website_name, data))
-            for future in as_completed(futures):
-                result = future.result()
+        for _, vehicle in extract_html_pages('dealerdotcom', used_car_urls + new_car_urls):
+            process_url(vehicle, website_name, data)
         return data
     except Exception as e:
         updateConfigStatus({
@@ -173,23 +263,8 @@ def scrape_dealerdotcom(url, lambda_id,scraper_id=None, start_index=0, end_index
 
 def scrape_overfuel(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
 
-    def extract_vin_data(soup):
-        vin = None
-        for script in soup.find_all('script'):
-            if script.string:
-                match = vin_pattern.search(script.string)
-                if match:
-                    vin = match.group()
-                    break
-        image_elements = soup.select('img[src]')
-        images = [img['src']
-                  for img in image_elements if 'photos' in img['src']]
-
-        return vin, list(images)
-
-    def process_url(url, website_name, data):
-        soup = fetch_html_content_using_requests(url)
-        vin, images = extract_vin_data(soup)
+    def process_url(vehicle, website_name, data):
+        vin, images = vehicle['vin'], vehicle['images']
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images}
@@ -203,11 +278,9 @@ def scrape_overfuel(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
 
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
-    sitemap_url = f'https://{website_name}/sitemap.xml'
     create_directory(website_name)
     try:
-        sitemap_content = fetch_sitemap_using_requests(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'overfuel')
         used_car_urls = filter_urls(all_urls, 'inventory/')
         used_car_urls = used_car_urls[start_index:end_index]
         # with open(os.path.join(website_name, 'inventory_car_urls.txt'), 'w') as f:
@@ -218,13 +291,8 @@ def scrape_overfuel(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
             'vins': {}
         }
 
-        with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-            futures = []
-            for used_car_url in used_car_urls:
-                futures.append(executor.submit(
-                    process_url, used_car_url, website_name, data))
-            for future in as_completed(futures):
-                result = future.result()
+        for _, vehicle in extract_html_pages('overfuel', used_car_urls):
+            process_url(vehicle, website_name, data)
         return data
     except Exception as e:
         updateConfigStatus({
@@ -239,33 +307,12 @@ def scrape_overfuel(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
 
 
 def scrape_dealer_inspire(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
-    def extract_vin_data(soup, base_url):
-        vin = None
-        images = set()
-
-        for script in soup.find_all('script'):
-            if script.string:
-                match = vin_pattern.search(script.string)
-                if match:
-                    vin = match.group()
-                    break
-        gallery_div = soup.find('div', id='gallery-modal')
-        if gallery_div:
-            for img in gallery_div.find_all('img'):
-                src_urls = [img.get(attr)
-                            for attr in ['src', 'data-src'] if img.get(attr)]
-                for src_url in src_urls:
-                    if src_url.startswith('/'):
-                        src_url = base_url + src_url
-                    if is_valid_image_url(src_url):
-                        images.add(src_url)
-        return vin, list(images)
+    extract = get_extractor('dealer_inspire')
 
     def process_url(url, parsed_url, website_name, data):
         soup = fetch_html_content_using_selenium(url, 30)
-        vin, images = extract_vin_data(
-            soup, base_url=f"{parsed_url.scheme}://{parsed_url.netloc}"
-        )
+        vehicle = extract(soup, base_url=f"{parsed_url.scheme}://{parsed_url.netloc}")
+        vin, images = vehicle['vin'], vehicle['images']
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images}
@@ -275,12 +322,10 @@ def scrape_dealer_inspire(url,lambda_id, scraper_id=None, start_index=0, end_ind
 
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
-    sitemap_url = f'https://{website_name}/dealer-inspire-inventory/inventory_sitemap'
 
     create_directory(website_name)
     try:
-        sitemap_content = fetch_sitemap_using_selenium(sitemap_url, 15)
-        urls = parse_sitemap(sitemap_content)
+        urls = fetch_dealer_sitemap_urls(website_name, 'dealer_inspire')
         inventory_urls = filter_urls(urls, '/inventory')
         inventory_urls = inventory_urls[start_index:end_index]
         # with open(os.path.join(website_name, 'inventory_car_urls.txt'), 'w') as f:
@@ -313,25 +358,8 @@ def scrape_dealer_inspire(url,lambda_id, scraper_id=None, start_index=0, end_ind
 
 def scrape_dealer_car_search(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
 
-    def extract_vin_data(soup):
-        vin = None
-        images = set()
-        vin = None
-        for text in soup.stripped_strings:
-            match = vin_pattern.search(text)
-            if match:
-                vin = match.group()
-                break
-
-        for img in soup.find_all('img'):
-            src = img.get('data-src')
-            if src and is_valid_image_url(src):
-                images.add(src)
-        return vin, list(images)
-
-    def process_url(url, website_name, data):
-        soup = fetch_html_content_using_requests(url)
-        vin, images = extract_vin_data(soup)
+    def process_url(vehicle, website_name, data):
+        vin, images = vehicle['vin'], vehicle['images']
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images}
@@ -346,10 +374,8 @@ def scrape_dealer_car_search(url,lambda_id, scraper_id=None, start_index=0, end_
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
     create_directory(website_name)
-    sitemap_url = f'https://{website_name}/sitemap.xml'
     try:
-        sitemap_content = fetch_sitemap_using_requests(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'dealer_car_search')
 
         inventory_urls = []
         for url in all_urls:
@@ -369,8 +395,8 @@ def scrape_dealer_car_search(url,lambda_id, scraper_id=None, start_index=0, end_
             'vins': {}
         }
 
-        for (url) in inventory_urls:
-            process_url(url, website_name, data)
+        for _, vehicle in extract_html_pages('dealer_car_search', inventory_urls):
+            process_url(vehicle, website_name, data)
         return data
     except Exception as e:
         updateConfigStatus({
@@ -385,23 +411,8 @@ def scrape_dealer_car_search(url,lambda_id, scraper_id=None, start_index=0, end_
 
 
 def scrape_cars_for_sale(url):
-    def extract_vin_data(soup):
-        vin = None
-        for script in soup.find_all('script'):
-            if script.string:
-                match = vin_pattern.search(script.string)
-                if match:
-                    vin = match.group()
-                    break
-        image_elements = soup.select('img[src]')
-        images = [img['src']
-                  for img in image_elements if 'photos' in img['src']]
-
-        return vin, ', '.join(images)
-
-    def process_url(url, website_name, data):
-        soup = fetch_html_content_using_requests(url)
-        vin, images = extract_vin_data(soup)
+    def process_url(vehicle, website_name, data):
+        vin, images = vehicle['vin'], vehicle['images']
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images}
@@ -411,11 +422,9 @@ def scrape_cars_for_sale(url):
 
     website_name = parsed_url.netloc
     parsed_url = urlparse(url)
-    sitemap_url = f'https://{website_name}/sitemap.xml'
     create_directory(website_name)
     try:
-        sitemap_content = fetch_sitemap_using_requests(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'cars_for_sale')
         used_car_urls = filter_urls(all_urls, 'inventory/')
 
         # with open(os.path.join(website_name, 'inventory_car_urls.txt'), 'w') as f:
@@ -426,13 +435,8 @@ def scrape_cars_for_sale(url):
             'vins': {}
         }
 
-        with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-            futures = []
-            for used_car_url in used_car_urls:
-                futures.append(executor.submit(
-                    process_url, used_car_url, website_name, data))
-            for future in as_completed(futures):
-                result = future.result()
+        for _, vehicle in extract_html_pages('cars_for_sale', used_car_urls):
+            process_url(vehicle, website_name, data)
         return data
     except Exception as e:
         print("An error occurred:", str(e))
@@ -441,81 +445,14 @@ def scrape_cars_for_sale(url):
 
 def scrape_autocornerdotcom(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
 
-    def extract_vin_data(soup):
-
-        vin_pattern = re.compile(r'[A-HJ-NPR-Z0-9]{17}')
-        vin = None
-        for text in soup.stripped_strings:
-            match = vin_pattern.search(text)
-            if match:
-                vin = match.group()
-                break
-
-        div_with_xdata = soup.find('div', {'x-data': True})
-
-        if div_with_xdata:
-            xdata_content = div_with_xdata['x-data']
-
-            # Clean the xdata_content to replace single quotes with double quotes and correct boolean values
-            xdata_content_cleaned = xdata_content.replace(
-                "'", '"').replace("true", "true").replace("false", "false")
-
-            # Replace keys without quotes using a regular expression
-            xdata_content_cleaned = re.sub(
-                r'(\w+)\s*:', r'"\1":', xdata_content_cleaned)
-
-            # Remove trailing commas within arrays and objects
-            xdata_content_cleaned = re.sub(
-                r',\s*([\]}])', r'\1', xdata_content_cleaned)
-
-            # Ensure correct quoting of problematic values
-            xdata_content_cleaned = xdata_content_cleaned.replace(
-                '""Owners": no data"', '"Owners: no data"')
-            xdata_content_cleaned = xdata_content_cleaned.replace(
-                '""Accidents": no data"', '"Accidents: no data"')
-            xdata_content_cleaned = xdata_content_cleaned.replace(
-                '""https"://photos.autocorner.com/360_interior/.jpg"', '"https://photos.autocorner.com/360_interior/.jpg"')
-
-            try:
-                # Convert the cleaned string to a JSON object
-                data = json.loads(xdata_content_cleaned)
-
-            except json.JSONDecodeError as e:
-                print("Failed to decode JSON:", e)
-        else:
-            print("No 'x-data' attribute found")
-
-        images = set()
-        photo_ids = data.get('photos', [])
-
-        for photo_id in photo_ids:
-            images.add(
-                f"https://photos.autocorner.com/640x480/{photo_id.get('id')}.webp")
-
-        # Update the selector as per the actual HTML structure
+    def process_url(vehicle, website_name, data):
+        vin, images = vehicle['vin'], vehicle['images']
         price = None
-        price_pattern = re.compile(r'\$\d{1,3}(,\d{3})*(\.\d{2})?')
-        for text in soup.stripped_strings:
-            match = price_pattern.search(text)
-            if match:
-                price = match.group()
-                break
-        price = price.replace(',', '')
-        # make price an object with currecy and base_msrp keys
-        # price is int the format $xx,xxx
-        price = {
-            'currency': price[0],
-            'base_msrp': int(price[1:].replace(',', ''))
-        }
-
-        # print(f"VIN: {vin}")
-        # print(f"Images: {images}")
-        return vin, price, list(images)
-
-    def process_url(url, website_name, data):
-        soup = fetch_html_content_using_requests(url)
-
-        vin, price, images = extract_vin_data(soup)
+        if vehicle['price'] is not None:
+            price = {
+                'currency': vehicle['currency'],
+                'base_msrp': int(vehicle['price'])
+            }
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images,
@@ -531,10 +468,8 @@ def scrape_autocornerdotcom(url,lambda_id, scraper_id=None, start_index=0, end_i
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
     base_directory = create_directory(website_name)
-    sitemap_url = f'https://{website_name}/sitemap.xml'
     try:
-        sitemap_content = fetch_sitemap_using_requests(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'autocorner')
         inventory_urls = filter_urls(all_urls, 'vehicles/')
         inventory_urls = inventory_urls[start_index:end_index]
 
@@ -548,13 +483,8 @@ def scrape_autocornerdotcom(url,lambda_id, scraper_id=None, start_index=0, end_i
             }
         }
 
-        with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-            futures = []
-            for inventory_url in inventory_urls:
-                futures.append(executor.submit(
-                    process_url, inventory_url, website_name, data))
-            for future in as_completed(futures):
-                result = future.result()
+        for _, vehicle in extract_html_pages('autocorner', inventory_urls):
+            process_url(vehicle, website_name, data)
         return data
     except Exception as e:
         updateConfigStatus({
@@ -571,73 +501,13 @@ def scrape_autocornerdotcom(url,lambda_id, scraper_id=None, start_index=0, end_i
 def scrape_foxdealerdotcom(url,lambda_id, custom_sitemap_url='None', vin_x_path=None, images_container_x_path=None, scraper_id=None, start_index=0, end_index=0):
     print("scrape_random")
 
-    def get_highest_resolution_image(srcset):
-        highest_res = 0
-        highest_res_url = None
-        for entry in srcset.split(","):
-            parts = entry.strip().split(" ")
-            if len(parts) == 2 and parts[1].endswith("w"):
-                res = int(parts[1][:-1])
-                if res > highest_res:
-                    highest_res = res
-                    highest_res_url = parts[0]
-        return highest_res_url
-
-    def extract_vin_data(soup, base_url, driver, vin_x_path, image_container_x_path):
-        vin = None
-        images = set()
-        if vin_x_path:
-            vin = driver.find_element(by=By.XPATH, value=vin_x_path).text
-        else:
-            vin_pattern = re.compile(r'[A-HJ-NPR-Z0-9]{17}')
-            vin = None
-            for text in soup.stripped_strings:
-                match = vin_pattern.search(text)
-                if match:
-                    vin = match.group()
-                    break
-
-        if image_container_x_path:
-            image_elements = driver.find_element(
-                by=By.XPATH, value=image_container_x_path).find_elements(By.TAG_NAME, 'img')
-            for img in image_elements:
-                if img.get_attribute('src'):
-                    img_url = img.get_attribute('src')
-                    img_url = img_url.split('?')[0]
-                    if img_url.startswith('/'):
-                        img_url = base_url + img_url
-                    if is_valid_image_url(img_url):
-                        images.add(img_url)
-        else:
-            for img in soup.find_all('img'):
-                src_url = img.get('data-src') or img.get('src')
-                src_url = src_url.split('?')[0]
-                if src_url:
-                    if (src_url.startswith('//')):
-                        src_url = 'https:' + src_url
-
-                    if src_url.startswith('/') and not src_url.startswith('//'):
-                        src_url = base_url + src_url
-
-                    if is_valid_image_url(src_url):
-                        images.add(src_url)
-
-                srcset = img.get('srcset')
-                if srcset:
-                    highest_res_image = get_highest_resolution_image(srcset)
-                    if highest_res_image:
-                        if highest_res_image.startswith('/') and not highest_res_image.startswith('//'):
-                            highest_res_image = base_url + highest_res_image
-                        if is_valid_image_url(highest_res_image):
-                            images.add(highest_res_image)
-        # print(f"VIN: {vin}")
-        # print(f"Images: {images}")
-        return vin, list(images)
+    extract = get_extractor('foxdealer')
 
     def process_url(url, parsed_url, website_name, data, vin_x_path, image_container_x_path):
         driver = setup_driver()
         soup = fetch_html_content_using_selenium(url)
-        vin, images = extract_vin_data(
+        vin, images = extract_with_xpaths(
+            extract,
             soup,
             base_url=f"{parsed_url.scheme}://{parsed_url.netloc}",
             driver=driver,
@@ -660,10 +530,8 @@ def scrape_foxdealerdotcom(url,lambda_id, custom_sitemap_url='None', vin_x_path=
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
     create_directory(website_name)
-    sitemap_url =f'https://{website_name}/inventory_pages-sitemap.xml'
     try:
-        sitemap_content = fetch_sitemap_using_selenium(sitemap_url, 15)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'foxdealer')
 
         inventory_urls = []
         for url in all_urls:
@@ -707,73 +575,13 @@ def scrape_foxdealerdotcom(url,lambda_id, custom_sitemap_url='None', vin_x_path=
 
 def scrape_teamvelocity(url, lambda_id,custom_sitemap_url=None, vin_x_path=None, images_container_x_path=None, scraper_id=None, start_index=0, end_index=0):
 
-    def get_highest_resolution_image(srcset):
-        highest_res = 0
-        highest_res_url = None
-        for entry in srcset.split(","):
-            parts = entry.strip().split(" ")
-            if len(parts) == 2 and parts[1].endswith("w"):
-                res = int(parts[1][:-1])
-                if res > highest_res:
-                    highest_res = res
-                    highest_res_url = parts[0]
-        return highest_res_url
-
-    def extract_vin_data(soup, base_url, driver, vin_x_path, image_container_x_path):
-        vin = None
-        images = set()
-        if vin_x_path:
-            vin = driver.find_element(by=By.XPATH, value=vin_x_path).text
-        else:
-            vin_pattern = re.compile(r'[A-HJ-NPR-Z0-9]{17}')
-            vin = None
-            for text in soup.stripped_strings:
-                match = vin_pattern.search(text)
-                if match:
-                    vin = match.group()
-                    break
-
-        if image_container_x_path:
-            image_elements = driver.find_element(
-                by=By.XPATH, value=image_container_x_path).find_elements(By.TAG_NAME, 'img')
-            for img in image_elements:
-                if img.get_attribute('src'):
-                    img_url = img.get_attribute('src')
-                    img_url = img_url.split('?')[0]
-                    if img_url.startswith('/'):
-                        img_url = base_url + img_url
-                    if is_valid_image_url(img_url):
-                        images.add(img_url)
-        else:
-            for img in soup.find_all('img'):
-                src_url = img.get('data-src') or img.get('src')
-                src_url = src_url.split('?')[0]
-                if src_url:
-                    if (src_url.startswith('//')):
-                        src_url = 'https:' + src_url
-
-                    if src_url.startswith('/') and not src_url.startswith('//'):
-                        src_url = base_url + src_url
-
-                    if is_valid_image_url(src_url):
-                        images.add(src_url)
-
-                srcset = img.get('srcset')
-                if srcset:
-                    highest_res_image = get_highest_resolution_image(srcset)
-                    if highest_res_image:
-                        if highest_res_image.startswith('/') and not highest_res_image.startswith('//'):
-                            highest_res_image = base_url + highest_res_image
-                        if is_valid_image_url(highest_res_image):
-                            images.add(highest_res_image)
-        # print(f"VIN: {vin}")
-        # print(f"Images: {images}")
-        return vin, list(images)
+    extract = get_extractor('teamvelocity')
 
     def process_url(url, parsed_url, website_name, data, vin_x_path, image_container_x_path):
         driver = setup_driver()
         soup = fetch_html_content_using_selenium(url)
-        vin, images = extract_vin_data(
+        vin, images = extract_with_xpaths(
+            extract,
             soup,
             base_url=f"{parsed_url.scheme}://{parsed_url.netloc}",
             driver=driver,
@@ -797,10 +605,8 @@ def scrape_teamvelocity(url, lambda_id,custom_sitemap_url=None, vin_x_path=None,
     website_name = parsed_url.netloc
     create_directory(website_name)
 
-    sitemap_url = custom_sitemap_url or f'https://{website_name}/inventoryvdpsitemap.xml'
     try:
-        sitemap_content = fetch_sitemap_using_selenium(sitemap_url, 15)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'teamvelocity', custom_sitemap_url)
 
         inventory_urls = []
         for url in all_urls:
@@ -844,27 +650,8 @@ def scrape_teamvelocity(url, lambda_id,custom_sitemap_url=None, vin_x_path=None,
 
 
 def scrape_autorevodotcom(url,lambda_id, scraper_id=None, start_index=0, end_index=0):
-    def extract_vin_data(soup):
-        vin_pattern = re.compile(r'[A-HJ-NPR-Z0-9]{17}')
-        vin = None
-        for text in soup.stripped_strings:
-            match = vin_pattern.search(text)
-            if match:
-                vin = match.group()
-                break
-
-        images = set()
-        imagesSection = soup.find('section', {'id': 'gallery'})
-        if imagesSection:
-            for img in imagesSection.find_all('img'):
-                src = img.get('src')
-                if src:
-                    images.add(src)
-        return vin, list(images)
-
-    def process_url(url, data):
-        soup = fetch_html_content_using_requests(url)
-        vin, images = extract_vin_data(soup)
+    def process_url(vehicle, data):
+        vin, images = vehicle['vin'], vehicle['images']
 
         if vin:
             data['vins'][vin] = {'scraped_images_url': images}
@@ -879,10 +666,8 @@ def scrape_autorevodotcom(url,lambda_id, scraper_id=None, start_index=0, end_ind
     parsed_url = urlparse(url)
     website_name = parsed_url.netloc
     create_directory(website_name)
-    sitemap_url = f'https://{website_name}/sitemap.xml'
     try:
-        sitemap_content = fetch_sitemap_using_requests(sitemap_url)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'autorevo')
 
         inventory_urls = []
         for url in all_urls:
@@ -898,12 +683,8 @@ def scrape_autorevodotcom(url,lambda_id, scraper_id=None, start_index=0, end_ind
             'vins': {}
         }
 
-        with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-            futures = []
-            for inventory_url in inventory_urls:
-                futures.append(executor.submit(
-                    process_url, inventory_url, data))
-
+        for _, vehicle in extract_html_pages('autorevo', inventory_urls):
+            process_url(vehicle, data)
         return data
     except Exception as e:
         updateConfigStatus({
@@ -920,73 +701,13 @@ def scrape_autorevodotcom(url,lambda_id, scraper_id=None, start_index=0, end_ind
 def scrape_random(url,lambda_id, custom_sitemap_url=None, vin_x_path=None, images_container_x_path=None, scraper_id=None, start_index=0, end_index=0):
     print("scrape_random")
 
-    def get_highest_resolution_image(srcset):
-        highest_res = 0
-        highest_res_url = None
-        for entry in srcset.split(","):
-            parts = entry.strip().split(" ")
-            if len(parts) == 2 and parts[1].endswith("w"):
-                res = int(parts[1][:-1])
-                if res > highest_res:
-                    highest_res = res
-                    highest_res_url = parts[0]
-        return highest_res_url
-
-    def extract_vin_data(soup, base_url, driver, vin_x_path, image_container_x_path):
-        vin = None
-        images = set()
-        if vin_x_path:
-            vin = driver.find_element(by=By.XPATH, value=vin_x_path).text
-        else:
-            vin_pattern = re.compile(r'[A-HJ-NPR-Z0-9]{17}')
-            vin = None
-            for text in soup.stripped_strings:
-                match = vin_pattern.search(text)
-                if match:
-                    vin = match.group()
-                    break
-
-        if image_container_x_path:
-            image_elements = driver.find_element(
-                by=By.XPATH, value=image_container_x_path).find_elements(By.TAG_NAME, 'img')
-            for img in image_elements:
-                if img.get_attribute('src'):
-                    img_url = img.get_attribute('src')
-                    img_url = img_url.split('?')[0]
-                    if img_url.startswith('/'):
-                        img_url = base_url + img_url
-                    if is_valid_image_url(img_url):
-                        images.add(img_url)
-        else:
-            for img in soup.find_all('img'):
-                src_url = img.get('data-src') or img.get('src')
-                src_url = src_url.split('?')[0]
-                if src_url:
-                    if (src_url.startswith('//')):
-                        src_url = 'https:' + src_url
-
-                    if src_url.startswith('/') and not src_url.startswith('//'):
-                        src_url = base_url + src_url
-
-                    if is_valid_image_url(src_url):
-                        images.add(src_url)
-
-                srcset = img.get('srcset')
-                if srcset:
-                    highest_res_image = get_highest_resolution_image(srcset)
-                    if highest_res_image:
-                        if highest_res_image.startswith('/') and not highest_res_image.startswith('//'):
-                            highest_res_image = base_url + highest_res_image
-                        if is_valid_image_url(highest_res_image):
-                            images.add(highest_res_image)
-        # print(f"VIN: {vin}")
-        # print(f"Images: {images}")
-        return vin, list(images)
+    extract = get_extractor('random')
 
     def process_url(url, parsed_url, website_name, data, vin_x_path, image_container_x_path):
         driver = setup_driver()
         soup = fetch_html_content_using_selenium(url)
-        vin, images = extract_vin_data(
+        vin, images = extract_with_xpaths(
+            extract,
             soup,
             base_url=f"{parsed_url.scheme}://{parsed_url.netloc}",
             driver=driver,
@@ -1010,10 +731,8 @@ def scrape_random(url,lambda_id, custom_sitemap_url=None, vin_x_path=None, image
     website_name = parsed_url.netloc
     create_directory(website_name)
 
-    sitemap_url = custom_sitemap_url or f'https://{website_name}/sitemap.xml'
     try:
-        sitemap_content = fetch_sitemap_using_selenium(sitemap_url, 15)
-        all_urls = parse_sitemap(sitemap_content)
+        all_urls = fetch_dealer_sitemap_urls(website_name, 'random', custom_sitemap_url)
 
         inventory_urls = []
         for url in all_urls:
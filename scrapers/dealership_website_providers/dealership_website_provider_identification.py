@@ -1,9 +1,20 @@
+import csv
 import re
-from collections import defaultdict
+import time
+from urllib.parse import urlparse
+
+import lxml.etree
+import lxml.html
 
 from utils.url.url import parse_url
-from utils.html.fetch_html import fetch_html
-from utils.html.parse_html import parse_html
+from utils.html.extract_pool import DEFAULT_WORKERS, ExtractionPool
+from utils.html.fetch import fetch_html
+from utils.html.fetch_async import iter_html
+from utils.html.retry import RetryBudget
+from utils.logger.setup import setup_logger
+from scrapers.dealership_website_providers.provider_cache import get_provider_cache
+
+logger = setup_logger(__name__)
 
 PROVIDER_LIST = [
     'Dealer.com', 'DealerInspire', 'DealerOn', 'DealerSocket', 'DealerFire',
@@ -89,44 +100,234 @@ SPECIFIC_PATTERNS = {
 }
 
 
-def identify_dealer_provider(url):
+# Batch identification: homepages are read up to this many bytes (the footer credit is usually well within it)
+MAX_HOMEPAGE_BYTES = 2 * 1024 * 1024
+MAX_CONCURRENT_REQUESTS = 100
+MAX_REQUESTS_PER_HOST = 2
+CLASSIFY_WORKERS = DEFAULT_WORKERS
+# Results are written to the provider cache in batches of this many rows
+CACHE_WRITE_BATCH = 100
+# CSV columns that may hold the dealer URL, in order of preference
+URL_COLUMNS = ('url', 'website', 'website_url', 'domain')
+LEADING_LITERAL_PATTERN = re.compile(r'[a-z0-9]*')
 
-    parsed_url_dict = parse_url(url)
-    parsed_url = f"{parsed_url_dict['scheme']}://{parsed_url_dict['netloc']}"
 
-    # Fetch the HTML content
-    html = fetch_html(parsed_url)
-    # Parse HTML content
-    soup = parse_html(html)
-
-    # Initialize a provider count dictionary using defaultdict for ease of updating counts
-    provider_count = defaultdict(int)
-
-    # Search the text content and tag attributes for each provider pattern
-    for tag in soup.find_all(True):  # True selects all tags
-        # Search within the text
-        if tag.string:
-            text_content = tag.string
-            # Check specific patterns first
-            for provider, pattern in SPECIFIC_PATTERNS.items():
-                if pattern.search(text_content):
-                    provider_count[provider] += 1
-
-        # Search within attributes
-        for attr_value in tag.attrs.values():
-            attr_str = ' '.join(attr_value) if isinstance(
-                attr_value, list) else str(attr_value)
-            # Check specific patterns first
+def _trie(alternatives):
+    # Merges alternatives that start with the same characters, so each character of the text
+    # is compared once per branch of the trie instead of once per provider
+    branches, tails = {}, []
+    for literal, tail in alternatives:
+        if literal:
+            branches.setdefault(literal[0], []).append((literal[1:], tail))
+        else:
+            tails.append(tail)
+    choices = [re.escape(char) + _trie(rest) for char, rest in branches.items()] + tails
+    return choices[0] if len(choices) == 1 else f"(?:{'|'.join(choices)})"
+
+
+def build_provider_pattern(patterns):
+    """
+    Combines provider patterns into one pattern that matches wherever any of them does, so
+    a single search tells whether a piece of text mentions a provider at all. The leading
+    words of the patterns are merged into a character trie, which is much faster than
+    trying 60 alternatives one after another.
+
+    Args:
+    patterns (dict): Provider name -> compiled pattern, with sources in lower case.
+
+    Returns:
+    Pattern: The combined case-insensitive pattern.
+    """
+    alternatives = []
+    for pattern in patterns.values():
+        literal = LEADING_LITERAL_PATTERN.match(pattern.pattern).group()
+        alternatives.append((literal, f'(?:{pattern.pattern[len(literal):]})'))
+    return re.compile(_trie(alternatives), re.IGNORECASE)
+
+
+PROVIDER_PATTERN = build_provider_pattern(SPECIFIC_PATTERNS)
+
+
+def _tag_string(element):
+    # BeautifulSoup's .string: the text of an element whose only child is a text node or a
+    # comment, found through elements that are themselves only children
+    while True:
+        if len(element) == 0:
+            return element.text
+        child = element[0]
+        if len(element) > 1 or element.text or child.tail:
+            return None
+        if not isinstance(child.tag, str):
+            return child.text
+        element = child
+
+
+def count_provider_mentions(html):
+    """
+    Counts, for each provider, the tags whose text and the attribute values that mention it.
+
+    The page is parsed once with lxml and every tag is visited once. As in a BeautifulSoup
+    walk, a tag's text is its .string, so text is counted for its parent when it is the
+    parent's only child, and again for each ancestor it is the only descendant of. Each text
+    and attribute value is first checked against PROVIDER_PATTERN, and only the rare ones
+    that mention some provider are searched with every pattern in SPECIFIC_PATTERNS.
+
+    Args:
+    html (str): The page HTML.
+
+    Returns:
+    dict: Provider name -> number of mentions, ordered as the walk first found them.
+    """
+    try:
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses strings that carry an XML encoding declaration
+            root = lxml.html.document_fromstring(html.encode('utf-8', errors='replace'),
+                                                 parser=lxml.html.HTMLParser(encoding='utf-8'))
+    except (lxml.etree.ParserError, ValueError):
+        return {}
+
+    provider_count = {}
+
+    def count(value):
+        if value and PROVIDER_PATTERN.search(value):
             for provider, pattern in SPECIFIC_PATTERNS.items():
-                if pattern.search(attr_str):
-                    provider_count[provider] += 1
+                if pattern.search(value):
+                    provider_count[provider] = provider_count.get(provider, 0) + 1
+
+    for element in root.iter(tag=lxml.etree.Element):
+        count(_tag_string(element))
+        for value in element.attrib.values():
+            count(value)
+    return provider_count
 
+
+def top_provider(provider_count):
+    """
+    Returns the provider with the most mentions and its number of mentions, or (None, 0).
+    Ties go to the provider mentioned first.
+    """
     # Sort the provider_count dictionary by occurrences
     sorted_providers = sorted(provider_count.items(),
                               key=lambda item: item[1], reverse=True)
 
     # Return the top provider or None if no matches found
     if sorted_providers and sorted_providers[0][1] > 0:
-        return sorted_providers[0][0]
+        return sorted_providers[0]
     else:
+        return None, 0
+
+
+def identify_dealer_provider(url):
+
+    parsed_url_dict = parse_url(url)
+    parsed_url = f"{parsed_url_dict['scheme']}://{parsed_url_dict['netloc']}"
+
+    # Fetch the HTML content
+    html, _ = fetch_html(parsed_url)
+    if not html:
         return None
+
+    # Count the provider mentions in one scan of the raw HTML
+    provider_count = count_provider_mentions(html)
+
+    provider, _ = top_provider(provider_count)
+    return provider
+
+
+def read_dealer_urls(csv_path):
+    """
+    Reads dealer URLs from a CSV file with a header row, taking the first of URL_COLUMNS
+    present (case-insensitive) or else the first column. Empty cells are skipped.
+
+    Args:
+    csv_path (str): The path to the CSV file.
+
+    Returns:
+    list: The dealer URLs in file order.
+    """
+    with open(csv_path, mode='r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = [name.strip().lower() for name in next(reader, [])]
+        column = next((header.index(name) for name in URL_COLUMNS if name in header), 0)
+        return [row[column].strip() for row in reader if len(row) > column and row[column].strip()]
+
+
+def dealer_homepage(url):
+    """
+    Returns the homepage URL and the cache domain of a dealer URL. Bare hostnames are read
+    as https, and 'www.' is dropped from the domain so both forms share one cache row.
+
+    Returns:
+    tuple: (homepage URL, domain), or (None, None) if the URL has no host.
+    """
+    parsed_url = urlparse(url if '//' in url else f'https://{url}')
+    if not parsed_url.netloc:
+        return None, None
+    netloc = parsed_url.netloc.lower()
+    domain = netloc[4:] if netloc.startswith('www.') else netloc
+    return f"{parsed_url.scheme or 'https'}://{netloc}", domain
+
+
+def classify_homepage(html):
+    """
+    Returns (provider, score) for a homepage, where score is the provider's number of mentions.
+    Runs in the batch's worker processes, so only this tuple is sent back.
+    """
+    return top_provider(count_provider_mentions(html))
+
+
+def identify_dealer_providers(urls, refresh=False, max_bytes=MAX_HOMEPAGE_BYTES, workers=CLASSIFY_WORKERS):
+    """
+    Identifies the website providers of many dealers at once.
+
+    Domains with a fresh result in the provider cache are not fetched again. The other
+    homepages are downloaded concurrently on one event loop, reading at most `max_bytes` of
+    each. They are classified in a pool of worker processes as they arrive, and every result
+    is persisted to the provider cache as (domain, provider, score, fetched_at). Homepages that
+    cannot be fetched are not cached, so the next run retries them.
+
+    Args:
+    urls (list or str): Dealer URLs (or bare hostnames), or the path of a CSV file of them (see read_dealer_urls).
+    refresh (bool): Classify every domain again, even if its cached result is still fresh.
+    max_bytes (int): Cap on the bytes read from each homepage.
+    workers (int): Classification processes; 1 classifies in this process.
+
+    Returns:
+    dict: Domain -> {'domain', 'provider', 'score', 'fetched_at'}, or None for homepages that could not be fetched.
+    """
+    if isinstance(urls, str):
+        urls = read_dealer_urls(urls)
+    homepages = {}
+    for url in urls:
+        homepage, domain = dealer_homepage(url)
+        if domain:
+            homepages.setdefault(domain, homepage)
+
+    cache = get_provider_cache()
+    results = cache.get_many(homepages) if cache is not None and not refresh else {}
+    pending = {homepage: domain for domain, homepage in homepages.items() if domain not in results}
+    logger.info(f"{len(results)} of {len(homepages)} dealer domains are cached, fetching {len(pending)} homepages")
+
+    def fetched_homepages():
+        for homepage, status, html in iter_html(list(pending), max_concurrency=MAX_CONCURRENT_REQUESTS,
+                                                per_host_limit=MAX_REQUESTS_PER_HOST, retry_budget=RetryBudget(),
+                                                max_bytes=max_bytes):
+            if html:
+                yield homepage, html
+            else:
+                results[pending[homepage]] = None
+
+    rows = []
+    with ExtractionPool(workers) as pool:
+        for homepage, (provider, score) in pool.imap_unordered(classify_homepage, fetched_homepages()):
+            row = {'domain': pending[homepage], 'provider': provider, 'score': score, 'fetched_at': time.time()}
+            results[row['domain']] = row
+            rows.append(row)
+            if cache is not None and len(rows) >= CACHE_WRITE_BATCH:
+                cache.put_many(rows)
+                rows = []
+    if cache is not None and rows:
+        cache.put_many(rows)
+    return results
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Database file, relative to the working directory unless absolute; set PROVIDER_CACHE_PATH to an
+# empty string to disable the cache.
+DEFAULT_CACHE_PATH = os.getenv('PROVIDER_CACHE_PATH', '.provider_cache.sqlite3')
+# How long an identified provider is trusted before the dealer's homepage is classified again
+DEFAULT_TTL_DAYS = float(os.getenv('PROVIDER_CACHE_TTL_DAYS', '30'))
+# SQLite limits the number of parameters in one statement
+MAX_QUERY_PARAMETERS = 500
+
+
+class ProviderCache:
+    """
+    Local SQLite table of (domain, provider, score, fetched_at) rows recording which website
+    provider each dealer domain runs on, so batch identification does not fetch and classify
+    the same homepage again while its result is fresh.
+
+    A provider of None is a known negative (the homepage mentions no provider) and is cached
+    like any other result.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+        """
+        Args:
+        path (str): SQLite database file; created, along with its directory, if missing.
+        ttl_days (float): Age after which a row is no longer returned.
+
+        Raises:
+        sqlite3.Error, OSError: If the database cannot be created or opened.
+        """
+        self.path = path
+        self.ttl = ttl_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS providers ('
+                'domain TEXT PRIMARY KEY, provider TEXT, score INTEGER NOT NULL, fetched_at REAL NOT NULL)')
+
+    def get_many(self, domains):
+        """
+        Returns the fresh rows for `domains`.
+
+        Args:
+        domains (iterable): Dealer domains.
+
+        Returns:
+        dict: Domain -> {'domain', 'provider', 'score', 'fetched_at'} for every domain with a row younger than the TTL.
+        """
+        domains = list(domains)
+        oldest = time.time() - self.ttl
+        rows = {}
+        with self._lock:
+            for start in range(0, len(domains), MAX_QUERY_PARAMETERS):
+                chunk = domains[start:start + MAX_QUERY_PARAMETERS]
+                cursor = self._connection.execute(
+                    f"SELECT domain, provider, score, fetched_at FROM providers "
+                    f"WHERE fetched_at >= ? AND domain IN ({', '.join('?' * len(chunk))})", [oldest, *chunk])
+                for domain, provider, score, fetched_at in cursor:
+                    rows[domain] = {'domain': domain, 'provider': provider, 'score': score, 'fetched_at': fetched_at}
+        return rows
+
+    def get(self, domain):
+        """
+        Returns the fresh row for one domain, or None if it is unknown or older than the TTL.
+        """
+        return self.get_many([domain]).get(domain)
+
+    def put_many(self, rows):
+        """
+        Stores rows, replacing any previous row for the same domain, in one transaction.
+
+        Args:
+        rows (iterable): Dicts with keys domain, provider, score and fetched_at.
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO providers (domain, provider, score, fetched_at) VALUES (?, ?, ?, ?)',
+                [(row['domain'], row['provider'], row['score'], row['fetched_at']) for row in rows])
+
+    def purge_expired(self):
+        """
+        Deletes the rows older than the TTL.
+
+        Returns:
+        int: The number of rows deleted.
+        """
+        with self._lock, self._connection:
+            return self._connection.execute(
+                'DELETE FROM providers WHERE fetched_at < ?', (time.time() - self.ttl,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def configure_provider_cache(path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+    """
+    Replaces the shared provider cache. Pass an empty path to disable caching.
+    A database that cannot be created or opened (e.g. in a read-only directory) also disables it.
+
+    Returns:
+    ProviderCache: The new shared cache, or None if caching is disabled.
+    """
+    global _default_cache
+    with _default_lock:
+        _default_cache = False
+        if path:
+            try:
+                _default_cache = ProviderCache(path, ttl_days)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Cannot use {path} for the provider cache, caching disabled: {e}")
+                return None
+        logger.info(f"Provider cache {f'at {path} (TTL {ttl_days:g} days)' if path else 'disabled'}")
+        return _default_cache or None
+
+
+def get_provider_cache():
+    """
+    Returns the shared provider cache, or None if caching is disabled.
+    """
+    if _default_cache is None:
+        return configure_provider_cache()
+    return _default_cache or None
@@ -0,0 +1,64 @@
+# Extraction recipes per dealer website provider, compiled by utils.html.recipe.compile_recipe.
+# Adding a provider (or fixing one whose markup changed) only needs an entry here.
+
+# Provider sites that lay out galleries as plain <img> tags with lazy-loading attributes and srcsets
+GENERIC_GALLERY_RECIPE = {
+    'vin': ['page'],
+    'images': [{'selector': 'img', 'attributes': ['data-src', 'src'], 'mode': 'first', 'srcset': True}],
+    'strip_query': True,
+    'absolute': True,
+    'validate': True,
+}
+
+RECIPES = {
+    'ansira': {
+        'vin': ['page'],
+        'images': [{'selector': 'section[id*=vdp-photos-dealershipPhotoGallery] img', 'attributes': ['src']}],
+        'strip_query': True,
+        'validate': True,
+        # Gallery URLs carry a size segment (e.g. 1x640.jpg); removing it gives the original image
+        'remove': r'x\d+',
+    },
+    'dealerdotcom': {
+        'vin': ['structured', {'selector': 'input[name="vin"]', 'attribute': 'value'}],
+        # The JSON-LD image is often just the hero shot, so the full gallery wins when the page has one
+        'images': [{'selector': '#media1-app-root img[src]', 'attributes': ['src']}, 'structured'],
+        'parser': 'fast',
+        'validate': True,
+        'join': ', ',
+    },
+    'overfuel': {
+        'vin': ['script'],
+        'images': [{'selector': 'img[src]', 'attributes': ['src']}],
+        'contains': 'photos',
+    },
+    'dealer_inspire': {
+        'vin': ['script'],
+        'images': [{'selector': 'div#gallery-modal img', 'attributes': ['src', 'data-src']}],
+        'absolute': True,
+        'validate': True,
+    },
+    'dealer_car_search': {
+        'vin': ['page'],
+        'images': [{'selector': 'img[data-src]', 'attributes': ['data-src']}],
+        'validate': True,
+    },
+    'cars_for_sale': {
+        'vin': ['script'],
+        'images': [{'selector': 'img[src]', 'attributes': ['src']}],
+        'contains': 'photos',
+        'join': ', ',
+    },
+    'autocorner': {
+        'vin': ['structured', 'page'],
+        'images': [{'x_data': 'photos', 'template': 'https://photos.autocorner.com/640x480/{id}.webp'}],
+        'price': ['structured', 'text'],
+    },
+    'foxdealer': GENERIC_GALLERY_RECIPE,
+    'teamvelocity': GENERIC_GALLERY_RECIPE,
+    'autorevo': {
+        'vin': ['page'],
+        'images': [{'selector': 'section#gallery img', 'attributes': ['src']}],
+    },
+    'random': GENERIC_GALLERY_RECIPE,
+}
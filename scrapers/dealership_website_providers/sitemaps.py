@@ -0,0 +1,18 @@
+# Sitemap locations per dealer website provider, tried by utils.sitemap.discovery.discover_sitemap
+# together with the Sitemap: lines of the dealer's robots.txt. The path a provider's platform
+# uses for its inventory sitemap comes first; later entries are fallbacks for sites that moved it.
+
+SITEMAP_CANDIDATES = {
+    'ansira': ['/sitemap-inventory-sincro.xml', '/sitemap.xml'],
+    'dealerdotcom': ['/sitemap.xml'],
+    'overfuel': ['/sitemap.xml'],
+    'dealer_inspire': ['/dealer-inspire-inventory/inventory_sitemap', '/sitemap.xml'],
+    'dealer_car_search': ['/sitemap.xml'],
+    'cars_for_sale': ['/sitemap.xml'],
+    'autocorner': ['/sitemap.xml'],
+    # WordPress (Yoast) sites
+    'foxdealer': ['/inventory_pages-sitemap.xml', '/sitemap_index.xml'],
+    'teamvelocity': ['/inventoryvdpsitemap.xml', '/sitemap.xml'],
+    'autorevo': ['/sitemap.xml'],
+    'random': ['/sitemap.xml', '/sitemap_index.xml'],
+}
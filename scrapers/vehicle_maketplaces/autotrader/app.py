@@ -2,23 +2,24 @@ import xml.etree.ElementTree as ET
 import json
 
 def parse_sitemap(xml_file):
-    # Parse the XML file
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-
     # Namespace used in the XML
     ns = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9',
           'image': 'http://www.google.com/schemas/sitemap-image/1.1'}
+    url_tag = '{%s}url' % ns['ns']
 
     # Dictionary to store the results
     vehicles_data = []
     vehicle_count = 0
 
-    # Iterate over all <url> elements in the XML
-    for url_elem in root.findall('ns:url', ns):
+    # Stream the XML file and handle each <url> element as it closes, so the whole tree is never built
+    context = ET.iterparse(xml_file, events=('start', 'end'))
+    _, root = next(context)
+    for event, url_elem in context:
+        if event != 'end' or url_elem.tag != url_tag:
+            continue
         vehicle_url = url_elem.find('ns:loc', ns).text
         image_urls = [img.find('image:loc', ns).text for img in url_elem.findall('image:image', ns)]
-        
+
         # Create a dictionary entry for each vehicle URL and its associated image URLs
         vehicle_entry = {
             "vehicle_url": vehicle_url,
@@ -26,6 +27,8 @@ def parse_sitemap(xml_file):
         }
         vehicles_data.append(vehicle_entry)
         vehicle_count += 1  # Increment vehicle count
+        # Drop the processed <url> elements
+        root.clear()
 
     # Add the vehicle count to the data
     output_data = {
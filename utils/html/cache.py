@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Set HTTP_CACHE_DIR to an empty string to disable the cache.
+DEFAULT_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', '.http_cache')
+# Entries kept on disk; the least recently written are removed beyond this
+DEFAULT_MAX_ENTRIES = int(os.getenv('HTTP_CACHE_MAX_ENTRIES', 20000))
+# Entries not rewritten for this long are removed
+DEFAULT_TTL_DAYS = float(os.getenv('HTTP_CACHE_TTL_DAYS', 30))
+
+# Status code reported to callers when a body is served from the cache after a 304.
+NOT_MODIFIED = 304
+
+
+class CachedResponse:
+    """
+    A cached response body together with the validators needed to revalidate it.
+    """
+
+    def __init__(self, url, body, status=200, etag=None, last_modified=None, fetched_at=None, extras=None,
+                 namespace=''):
+        self.url = url
+        # Entries in different namespaces never collide, even for the same URL
+        self.namespace = namespace
+        self.body = body
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at or time.time()
+        # Derived data callers want to keep with the body, e.g. the URLs parsed out of a sitemap
+        self.extras = extras or {}
+
+    def conditional_headers(self):
+        """
+        Returns the If-None-Match / If-Modified-Since headers for revalidating this entry.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'body': self.body,
+            'status': self.status,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'fetched_at': self.fetched_at,
+            'extras': self.extras,
+            'namespace': self.namespace,
+        }
+
+
+class ResponseCache:
+    """
+    On-disk cache of responses keyed by URL, used for conditional (ETag / Last-Modified) requests.
+
+    Each URL is stored as one JSON file named after the SHA-1 of the URL. Writes go to a
+    temporary file that is renamed into place, so concurrent writers never leave a torn entry.
+
+    Data derived from a response that is not the page body itself (e.g. the URLs parsed out
+    of a streamed sitemap) is kept under its own namespace, so fetch_html never revalidates
+    against an entry whose body it cannot serve.
+
+    The directory is swept when the cache is opened and after every `max_entries // 10`
+    writes: entries older than the TTL are removed, then the oldest entries beyond
+    `max_entries`.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES, ttl_days=DEFAULT_TTL_DAYS):
+        """
+        Args:
+        directory (str): Directory holding the entries; created if missing.
+        max_entries (int): Most entries kept on disk.
+        ttl_days (float): Age after which an entry is removed.
+
+        Raises:
+        OSError: If the directory cannot be created.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self.sweep()
+
+    def _path(self, url, namespace=''):
+        key = f"{namespace}:{url}" if namespace else url
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def get(self, url, namespace=''):
+        """
+        Returns the cached entry for `url` in `namespace`, or None if there is none or it cannot be read.
+        """
+        path = self._path(url, namespace)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry for {url}: {e}")
+            return None
+        entry = CachedResponse(**data)
+        if entry.fetched_at < time.time() - self.ttl:
+            return None
+        return entry
+
+    def put(self, entry):
+        """
+        Writes `entry` to disk, replacing any previous entry for the same URL.
+        """
+        path = self._path(entry.url, entry.namespace)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry.to_dict(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry for {entry.url}: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % max(1, self.max_entries // 10) == 0
+        if due:
+            self.sweep()
+
+    def sweep(self):
+        """
+        Removes entries older than the TTL, then the oldest entries beyond max_entries.
+
+        Returns:
+        int: The number of entries removed.
+        """
+        expires = time.time() - self.ttl
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    modified = os.path.getmtime(path)
+                    if modified < expires:
+                        os.remove(path)
+                        removed += 1
+                    elif name.endswith('.json'):
+                        entries.append((modified, path))
+                except OSError:
+                    # Removed or replaced by a concurrent writer
+                    continue
+        if len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+        if removed:
+            logger.info(f"Removed {removed} expired or excess entries from the response cache at {self.directory}")
+            with self._lock:
+                self.evictions += removed
+        return removed
+
+    def store(self, url, status, headers, body, extras=None, namespace=''):
+        """
+        Caches a fresh response if it carries a validator; responses without ETag or
+        Last-Modified cannot be revalidated and are not stored.
+
+        Args:
+        url (str): The requested URL.
+        status (int): The response status code.
+        headers (Mapping): The response headers.
+        body (str): The decoded response body.
+        extras (dict): Optional derived data to keep with the entry.
+        namespace (str): Optional namespace for entries that are not plain page bodies.
+
+        Returns:
+        CachedResponse: The stored entry, or None if the response was not cacheable.
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return None
+        entry = CachedResponse(url, body, status, etag, last_modified, extras=extras, namespace=namespace)
+        self.put(entry)
+        return entry
+
+    def update_extras(self, entry, **extras):
+        """
+        Attaches derived data to an existing entry and persists it.
+        """
+        entry.extras.update(extras)
+        self.put(entry)
+
+    def get_derived(self, url, namespace, body):
+        """
+        Returns the value stored with put_derived for `url` in `namespace`, or None if there is
+        none or it was derived from a different body.
+        """
+        entry = self.get(url, namespace)
+        if entry is None or entry.extras.get('digest') != body_digest(body):
+            return None
+        return entry.extras.get('value')
+
+    def put_derived(self, url, namespace, body, value):
+        """
+        Stores a JSON-serializable value computed from `body` (e.g. the vehicle extracted from a
+        page), so the work need not be repeated while the server keeps answering 304.
+        """
+        self.put(CachedResponse(url, None, extras={'digest': body_digest(body), 'value': value},
+                                namespace=namespace))
+
+
+def body_digest(body):
+    return hashlib.sha1(body.encode('utf-8', errors='replace')).hexdigest()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def configure_response_cache(directory=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES, ttl_days=DEFAULT_TTL_DAYS):
+    """
+    Replaces the shared response cache. Pass an empty directory to disable caching.
+    A directory that cannot be created (e.g. on a read-only filesystem) also disables it.
+
+    Returns:
+    ResponseCache: The new shared cache, or None if caching is disabled.
+    """
+    global _default_cache
+    with _default_lock:
+        _default_cache = False
+        if directory:
+            try:
+                _default_cache = ResponseCache(directory, max_entries, ttl_days)
+            except OSError as e:
+                logger.warning(f"Cannot use {directory} for the HTTP response cache, caching disabled: {e}")
+                return None
+        logger.info(f"HTTP response cache {'at ' + directory if directory else 'disabled'}")
+        return _default_cache or None
+
+
+def get_response_cache():
+    """
+    Returns the shared response cache, or None if caching is disabled.
+    """
+    if _default_cache is None:
+        return configure_response_cache()
+    return _default_cache or None
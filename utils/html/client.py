@@ -0,0 +1,207 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from utils.html.compression import REQUESTS_ACCEPT_ENCODING
+from utils.html.dns import get_dns_cache
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Number of distinct hosts to keep connection pools for, and connections kept per host.
+DEFAULT_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 64))
+DEFAULT_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 16))
+
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": REQUESTS_ACCEPT_ENCODING,
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+}
+
+class CachedDNSConnectionMixin:
+    """
+    Resolves the target through the shared DNS cache before connecting. Only the socket
+    address is swapped; the Host header, SNI and certificate checks still use the hostname.
+
+    Like urllib3's own resolution, every cached address (A and AAAA) is tried in resolver
+    order, and the connection only fails once all of them have. The cached entry is then
+    dropped, so the next connection resolves the host again.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            addresses = [ip for _, ip in get_dns_cache().resolve_all(host)]
+        except OSError as e:
+            logger.debug(f"DNS cache could not resolve {host}, connecting by name: {e}")
+            addresses = []
+        if not addresses:
+            return super()._new_conn()
+
+        error = None
+        try:
+            for ip in addresses:
+                self._dns_host = ip
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    logger.debug(f"Connecting to {host} at {ip} failed: {e}")
+                    error = e
+        finally:
+            self._dns_host = host
+        get_dns_cache().invalidate(host)
+        raise error
+
+
+class CachedDNSHTTPConnection(CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedDNSHTTPSConnection(CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedDNSHTTPConnection
+
+
+class CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedDNSHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools resolve hosts through the shared DNS cache.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CachedDNSHTTPConnectionPool,
+            'https': CachedDNSHTTPSConnectionPool,
+        }
+
+
+_lock = threading.RLock()
+_adapter = None
+_headers = dict(DEFAULT_HEADERS)
+_generation = 0
+_local = threading.local()
+
+
+def configure_http_client(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE, headers=None):
+    """
+    Configures the shared HTTP client used by the fetch helpers.
+
+    The client keeps one connection pool per host (up to `pool_connections` hosts) and
+    reuses keep-alive connections across calls and threads. Hostnames are resolved
+    through the shared DNS cache. Reconfiguring closes the
+    current pools; sessions handed out afterwards use the new settings.
+
+    Args:
+    pool_connections (int): Number of per-host connection pools to cache.
+    pool_maxsize (int): Maximum number of connections kept alive per host.
+    headers (dict): Optional default headers merged over DEFAULT_HEADERS.
+    """
+    global _adapter, _headers, _generation
+    with _lock:
+        if _adapter is not None:
+            _adapter.close()
+        _adapter = PooledHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        _headers = {**DEFAULT_HEADERS, **(headers or {})}
+        _generation += 1
+        logger.info(f"HTTP client configured (pool_connections={pool_connections}, pool_maxsize={pool_maxsize})")
+
+
+def _get_adapter():
+    if _adapter is None:
+        configure_http_client()
+    return _adapter
+
+
+def get_http_session():
+    """
+    Returns a requests session backed by the shared connection pools.
+
+    Each thread gets its own Session object (sessions keep mutable cookie state and are
+    not safe to share), but every session is mounted on the same thread-safe adapter, so
+    connections to a host opened by one thread are reused by the others.
+
+    Returns:
+    requests.Session: A session for the calling thread.
+    """
+    with _lock:
+        adapter = _get_adapter()
+        generation = _generation
+        headers = _headers
+
+    session = getattr(_local, 'session', None)
+    if session is None or getattr(_local, 'generation', None) != generation:
+        session = requests.Session()
+        session.headers.update(headers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+        _local.generation = generation
+    return session
+
+
+def close_http_client():
+    """
+    Closes all pooled connections held by the shared HTTP client.
+    """
+    global _adapter, _generation
+    with _lock:
+        if _adapter is not None:
+            _adapter.close()
+            _adapter = None
+            _generation += 1
+            logger.info("HTTP client closed")
+
+
+def prewarm_connections(urls, connections_per_host=1, max_workers=16, timeout=10):
+    """
+    Resolves DNS for and opens idle keep-alive connections to every host in `urls`.
+
+    Call this before dispatching a batch so the first request to each dealer does not
+    pay for DNS, TCP and TLS setup. Each host gets `connections_per_host` concurrent HEAD
+    requests through the shared session, so the connections they open are returned to the
+    same pools fetch_html draws from.
+
+    Args:
+    urls (iterable): URLs (or origins) whose hosts should be warmed.
+    connections_per_host (int): Connections to open per host; those beyond the pool size are not kept.
+    max_workers (int): Number of warm-up requests sent in parallel.
+    timeout (int): Timeout for each warm-up request in seconds.
+
+    Returns:
+    int: Number of warm-up requests that got a response.
+    """
+    origins = list(dict.fromkeys(
+        f"{parsed.scheme}://{parsed.netloc}" for parsed in map(urlparse, urls) if parsed.scheme and parsed.netloc
+    ))
+    if not origins:
+        return 0
+    get_dns_cache().prefetch(urlparse(origin).hostname for origin in origins)
+
+    def warm(origin):
+        try:
+            get_http_session().head(origin, timeout=timeout, allow_redirects=False).close()
+            return 1
+        except requests.RequestException as e:
+            logger.warning(f"Failed to pre-warm connection to {origin}: {e}")
+            return 0
+
+    targets = [origin for origin in origins for _ in range(max(1, connections_per_host))]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as executor:
+        warmed = sum(executor.map(warm, targets))
+    logger.info(f"Pre-warmed {warmed} connections to {len(origins)} hosts")
+    return warmed
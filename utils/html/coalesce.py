@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def request_key(url, headers=None, *options):
+    """
+    Builds the key under which identical in-flight requests are coalesced.
+
+    Requests only share a result when the URL, the headers and every option that
+    changes what the caller receives are all the same: whether the response cache is
+    used (a cached caller can be served a 304), byte limits and stop predicates.
+    """
+    return (url, tuple(sorted((headers or {}).items())), *options)
+
+
+class RequestCoalescer:
+    """
+    Collapses concurrent identical requests into one.
+
+    The first caller for a key (the leader) performs the request; callers arriving while
+    it is in flight wait for and share its result, including its exception. Waiters are
+    backed by concurrent.futures.Future, so threads, coroutines on any event loop, and a
+    mix of both coalesce with each other.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join(self, key):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def call(self, key, fn, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)` unless an identical call is in flight, in which case its result is shared.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            logger.debug(f"Coalescing duplicate request: {key[0]}")
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def call_async(self, key, coro_fn, *args, **kwargs):
+        """
+        Async counterpart of `call`: awaits `coro_fn(*args, **kwargs)` or shares an in-flight result.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            logger.debug(f"Coalescing duplicate request: {key[0]}")
+            return await asyncio.wrap_future(future)
+        try:
+            result = await coro_fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'leaders': self.leaders, 'coalesced': self.coalesced, 'in_flight': len(self._inflight)}
+
+
+_default_coalescer = RequestCoalescer()
+
+
+def get_request_coalescer():
+    """
+    Returns the process-wide coalescer shared by fetch_html and fetch_html_async.
+    """
+    return _default_coalescer
@@ -0,0 +1,130 @@
+import importlib.util
+import threading
+from collections import defaultdict, deque
+
+from urllib3.util.request import ACCEPT_ENCODING as URLLIB3_ACCEPT_ENCODING
+
+from utils.logger.setup import setup_logger
+from utils.url.url import get_registrable_domain
+
+logger = setup_logger(__name__)
+
+# brotli / brotlicffi and zstandard are optional; when installed, urllib3 and aiohttp
+# pick them up automatically and we advertise br / zstd.
+BROTLI_AVAILABLE = any(importlib.util.find_spec(name) for name in ('brotli', 'brotlicffi'))
+ZSTD_AVAILABLE = importlib.util.find_spec('zstandard') is not None
+
+
+def build_accept_encoding(brotli=BROTLI_AVAILABLE, zstd=ZSTD_AVAILABLE):
+    """
+    Builds an Accept-Encoding header value listing only encodings we can decode.
+
+    Args:
+    brotli (bool): Whether a brotli decoder is available to the HTTP client.
+    zstd (bool): Whether a zstd decoder is available to the HTTP client.
+
+    Returns:
+    str: e.g. 'gzip, deflate, br, zstd'.
+    """
+    encodings = ['gzip', 'deflate']
+    if brotli:
+        encodings.append('br')
+    if zstd:
+        encodings.append('zstd')
+    return ', '.join(encodings)
+
+
+# urllib3 computes its own list from the decoders it managed to import, so requests
+# never advertises an encoding it cannot decode.
+REQUESTS_ACCEPT_ENCODING = ', '.join(URLLIB3_ACCEPT_ENCODING.split(','))
+
+# Request latencies are kept as a sliding window so long crawls use bounded memory.
+LATENCY_SAMPLE_SIZE = 10000
+
+
+class TransferStats:
+    """
+    Thread-safe counters of bytes received over the wire versus bytes after decompression,
+    plus a window of recent request latencies.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all counters, e.g. between benchmark runs.
+        """
+        self.requests = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.requests_by_encoding = defaultdict(int)
+        self.wire_bytes_by_domain = defaultdict(int)
+        self.body_bytes_by_domain = defaultdict(int)
+        self.latencies = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, url, content_encoding, wire_bytes, body_bytes, elapsed=None):
+        """
+        Records one response.
+
+        Args:
+        url (str): The requested URL.
+        content_encoding (str): The response Content-Encoding, or None for identity.
+        wire_bytes (int): Bytes received before decompression. Falls back to body_bytes if unknown.
+        body_bytes (int): Bytes after decompression.
+        elapsed (float): Optional seconds from sending the request to reading the body.
+        """
+        wire_bytes = body_bytes if wire_bytes is None else wire_bytes
+        encoding = (content_encoding or 'identity').lower()
+        domain = get_registrable_domain(url)
+        with self._lock:
+            self.requests += 1
+            self.wire_bytes += wire_bytes
+            self.body_bytes += body_bytes
+            self.requests_by_encoding[encoding] += 1
+            self.wire_bytes_by_domain[domain] += wire_bytes
+            self.body_bytes_by_domain[domain] += body_bytes
+            if elapsed is not None:
+                self.latencies.append(elapsed)
+        logger.debug(f"{url}: {wire_bytes} bytes on the wire, {body_bytes} bytes decoded ({encoding})")
+
+    def latency_percentile(self, percentile):
+        """
+        Returns the given percentile (0-100) of the recorded latencies in seconds, or None if there are none.
+        """
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(percentile / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def stats(self):
+        """
+        Returns a snapshot of the counters, including the overall compression ratio
+        and the p50 / p99 latency.
+        """
+        p50, p99 = self.latency_percentile(50), self.latency_percentile(99)
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'wire_bytes': self.wire_bytes,
+                'body_bytes': self.body_bytes,
+                'compression_ratio': round(self.body_bytes / self.wire_bytes, 2) if self.wire_bytes else None,
+                'requests_by_encoding': dict(self.requests_by_encoding),
+                'wire_bytes_by_domain': dict(self.wire_bytes_by_domain),
+                'body_bytes_by_domain': dict(self.body_bytes_by_domain),
+                'latency_p50': p50,
+                'latency_p99': p99,
+            }
+
+
+_transfer_stats = TransferStats()
+
+
+def get_transfer_stats():
+    """
+    Returns the process-wide transfer counters updated by the fetch helpers.
+    """
+    return _transfer_stats
@@ -0,0 +1,124 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# getaddrinfo does not expose record TTLs, so every entry lives for the same configured time.
+DEFAULT_DNS_TTL = float(os.getenv('DNS_CACHE_TTL', 300))
+
+
+class DNSCache:
+    """
+    Thread-safe in-process cache of getaddrinfo results, keyed by hostname.
+
+    Concurrent lookups of the same host share one resolution, so a burst of first
+    requests to a new dealer triggers a single DNS query.
+    """
+
+    def __init__(self, ttl=DEFAULT_DNS_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve_all(self, host):
+        """
+        Resolves `host` and returns all of its addresses.
+
+        Args:
+        host (str): Hostname to resolve.
+
+        Returns:
+        list: (family, ip) tuples in resolver order.
+
+        Raises:
+        socket.gaierror: If the name cannot be resolved.
+        """
+        key = host
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry:
+                return entry[1]
+            # The owning lookup failed; resolve ourselves so the caller sees the error
+            return self._lookup(host)
+
+        try:
+            addresses = self._lookup(host)
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, addresses)
+            return addresses
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def resolve(self, host):
+        """
+        Returns the first address for `host`, or None if it cannot be resolved.
+        """
+        try:
+            return self.resolve_all(host)[0][1]
+        except (OSError, IndexError) as e:
+            logger.debug(f"DNS resolution failed for {host}: {e}")
+            return None
+
+    def invalidate(self, host):
+        """
+        Drops the cached addresses for `host`.
+        """
+        with self._lock:
+            self._entries.pop(host, None)
+
+    def prefetch(self, hosts, max_workers=16):
+        """
+        Resolves many hosts concurrently so later connections skip the lookup.
+
+        Args:
+        hosts (iterable): Hostnames to resolve.
+        max_workers (int): Number of resolver threads.
+
+        Returns:
+        int: Number of hosts that resolved successfully.
+        """
+        hosts = list(dict.fromkeys(host for host in hosts if host))
+        if not hosts:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts))) as executor:
+            resolved = sum(1 for ip in executor.map(self.resolve, hosts) if ip)
+        logger.info(f"Pre-resolved {resolved}/{len(hosts)} hosts")
+        return resolved
+
+    @staticmethod
+    def _lookup(host):
+        results = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        return list(dict.fromkeys((family, sockaddr[0]) for family, _, _, _, sockaddr in results))
+
+
+_default_cache = DNSCache()
+
+
+def get_dns_cache():
+    """
+    Returns the process-wide DNS cache shared by the fetch clients.
+    """
+    return _default_cache
@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.html.parse_cache import configure_parse_cache
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Most worker processes started by default, however many cores the machine has
+MAX_DEFAULT_WORKERS = 8
+# Worker processes that parse and extract pages; PARSE_WORKERS=1 extracts in the calling process.
+DEFAULT_WORKERS = int(os.getenv('PARSE_WORKERS', '0')) or min(os.cpu_count() or 1, MAX_DEFAULT_WORKERS)
+# How workers are started. forkserver forks them from a clean single-threaded server process, so
+# threads running in the caller (fetch loops, DNS prefetch, browser backends) cannot deadlock them.
+DEFAULT_START_METHOD = os.getenv('PARSE_START_METHOD') or (
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else None)
+# Pages handed to the pool per worker before the feeder waits for a result
+PENDING_PER_WORKER = 4
+
+
+def _start_worker():
+    # Every page reaches a worker once, so cached trees would only hold memory there
+    configure_parse_cache(0)
+
+
+class ExtractionPool:
+    """
+    Runs a CPU-bound extraction function over downloaded pages in worker processes.
+
+    Parsing with BeautifulSoup holds the GIL, so adding threads does not add parse
+    throughput. The pool takes (key, html) pairs from an iterator (typically a fetch
+    generator whose downloads run on an event loop thread) and extracts them on every
+    core. At most max_pending pages are in flight, so a fast download never queues the
+    whole crawl in memory. Only the HTML goes to a worker and only the function's result
+    comes back, so the function should return compact data (a VIN and image URLs), not trees.
+
+    Workers are started with DEFAULT_START_METHOD (forkserver where available, otherwise
+    the platform default) when the pool is entered. Where worker processes cannot run at
+    all (e.g. no /dev/shm on AWS Lambda), the pool logs a warning and extracts in the
+    calling process instead.
+
+    Usage:
+        with ExtractionPool() as pool:
+            for url, vehicle in pool.imap_unordered(extract_page, fetch_html_pages(urls)):
+                ...
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_pending=None, start_method=DEFAULT_START_METHOD):
+        """
+        Args:
+        max_workers (int): Worker processes, at most one per core; 1 or less runs the function in the calling process.
+        max_pending (int): Pages submitted but not yet returned; defaults to PENDING_PER_WORKER per worker.
+        start_method (str): multiprocessing start method; None for the platform default.
+        """
+        self.max_workers = max(1, min(max_workers, os.cpu_count() or 1))
+        self.start_method = start_method
+        self.max_pending = max_pending or self.max_workers * PENDING_PER_WORKER
+        self._executor = None
+        self.submitted = 0
+        self.completed = 0
+
+    def __enter__(self):
+        if self.max_workers > 1:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context(self.start_method),
+                                                     initializer=_start_worker)
+                # Starts the workers now, so a platform that cannot run them is found before any page is fetched
+                self._executor.submit(os.getpid).result()
+                logger.info(f"Started {self.max_workers} extraction worker processes")
+            except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                logger.warning(f"Cannot start extraction worker processes, extracting in-process: {e!r}")
+                if self._executor is not None:
+                    self._executor.shutdown(cancel_futures=True)
+                    self._executor = None
+                self.max_workers = 1
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def imap_unordered(self, function, items):
+        """
+        Applies `function` to the payload of every (key, payload) pair and yields
+        (key, result) pairs in completion order. An exception raised by `function` is
+        re-raised here.
+
+        Args:
+        function (callable): Picklable function of one payload, i.e. a module-level function or a functools.partial of one.
+        items (iterable): (key, payload) pairs, e.g. the (url, html) pairs of fetch_html_pages.
+        """
+        if self._executor is None:
+            for key, payload in items:
+                self.submitted += 1
+                result = function(payload)
+                self.completed += 1
+                yield key, result
+            return
+
+        pending = {}
+        for key, payload in items:
+            pending[self._executor.submit(function, payload)] = key
+            self.submitted += 1
+            if len(pending) >= self.max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from self._collect(done, pending)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from self._collect(done, pending)
+
+    def _collect(self, done, pending):
+        for future in done:
+            key = pending.pop(future)
+            self.completed += 1
+            yield key, future.result()
+
+    def stats(self):
+        """
+        Returns a snapshot of the pool counters.
+        """
+        return {
+            'workers': self.max_workers,
+            'submitted': self.submitted,
+            'completed': self.completed,
+        }
@@ -1,34 +1,138 @@
-import requests
+import time
+
 from requests.exceptions import RequestException, HTTPError
+from utils.html.cache import NOT_MODIFIED, get_response_cache
+from utils.html.client import get_http_session
+from utils.html.coalesce import get_request_coalescer, request_key
+from utils.html.compression import get_transfer_stats
+from utils.html.rate_limit import get_scheduler
+from utils.html.retry import RETRYABLE_STATUS_CODES, backoff_delay, get_retry_budget, parse_retry_after
+from utils.html.stream import DEFAULT_CHUNK_SIZE, BodyReader
 from utils.logger.setup import setup_logger
 
 logger = setup_logger(__name__)
 
 
-def fetch_html(url, headers=None, timeout=30, max_retries=3):
+def fetch_html(url, headers=None, timeout=30, max_retries=3, session=None, scheduler=None, use_cache=True,
+               retry_budget=None, max_bytes=None, stop_when=None, coalesce=True):
     """
     Fetches the HTML content of a web page with improved error handling and retries.
 
+    When the response cache is enabled, a URL fetched before is revalidated with
+    If-None-Match / If-Modified-Since. On a 304 the cached body is returned with status
+    code 304, so callers can tell it apart from a fresh 200 and skip re-processing it.
+
+    Connection errors and throttling/transient statuses (429, 5xx) are retried with
+    exponential backoff and jitter, honouring Retry-After. Other HTTP errors are returned
+    immediately. Every retry is charged to `retry_budget`.
+
+    Passing `max_bytes` or `stop_when` switches to streaming mode: the body is read in
+    chunks and the download stops at the byte limit or as soon as the predicate matches,
+    returning only what was read. Partial bodies are never written to the cache.
+
+    Concurrent calls for the same URL with the same headers, use_cache and streaming
+    options (from threads or from fetch_html_async) are coalesced into one request whose
+    result every caller receives.
+
     Args:
     url (str): The URL of the page to scrape.
     headers (dict): Optional headers to send with the request.
     timeout (int): Timeout for the request in seconds. Default is 30.
-    max_retries (int): Maximum number of retries for failed requests. Default is 3.
+    max_retries (int): Maximum number of attempts for failed requests. Default is 3.
+    session (requests.Session): Optional session to use. Defaults to the shared pooled client.
+    scheduler (DomainScheduler): Optional per-domain rate limiter. Defaults to the shared scheduler.
+    use_cache (bool): Whether to revalidate against and update the response cache. Default is True.
+    retry_budget (RetryBudget): Optional per-crawl retry budget. Defaults to the unbounded process-wide budget.
+    max_bytes (int): Optional cap on the number of body bytes to read.
+    stop_when (callable): Optional predicate called with each new stretch of text (see BodyReader); reading stops once it returns True.
+    coalesce (bool): Whether to share the result of an identical in-flight request. Default is True.
 
     Returns:
-    tuple: (str, int) The HTML content of the page and the status code, or (None, None) on failure.
+    tuple: (str, int) The HTML content of the page and the status code, or (None, status code) on failure.
     """
+    args = (url, headers, timeout, max_retries, session, scheduler, use_cache, retry_budget, max_bytes, stop_when)
+    if not coalesce:
+        return _fetch_html(*args)
+    key = request_key(url, headers, use_cache, max_bytes, stop_when)
+    return get_request_coalescer().call(key, _fetch_html, *args)
+
+
+def _fetch_html(url, headers, timeout, max_retries, session, scheduler, use_cache, retry_budget, max_bytes, stop_when):
+    session = session or get_http_session()
+    scheduler = scheduler or get_scheduler()
+    cache = get_response_cache() if use_cache else None
+    cached = cache.get(url) if cache else None
+    if cached and cached.body is None:
+        # Nothing to serve on a 304, so the page is fetched unconditionally
+        cached = None
+    if cached:
+        headers = {**(headers or {}), **cached.conditional_headers()}
+
+    retry_budget = retry_budget or get_retry_budget()
+    streaming = max_bytes is not None or stop_when is not None
+    status_code = None
     for attempt in range(max_retries):
+        retry_after = None
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            return response.text, response.status_code
+            with scheduler.slot(url):
+                started = time.perf_counter()
+                with session.get(url, headers=headers, timeout=timeout, stream=streaming) as response:
+                    if response.status_code == NOT_MODIFIED and cached:
+                        logger.debug(f"Not modified, serving from cache: {url}")
+                        return cached.body, NOT_MODIFIED
+                    status_code = response.status_code
+                    if status_code in RETRYABLE_STATUS_CODES and attempt < max_retries - 1:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        logger.warning(f"Retryable status {status_code} from {url} (Attempt {attempt + 1}/{max_retries})")
+                    else:
+                        response.raise_for_status()
+                        if streaming:
+                            text, complete, body_bytes = read_streamed_body(response, max_bytes, stop_when)
+                        else:
+                            text, complete, body_bytes = response.text, True, len(response.content)
+                        get_transfer_stats().record(url, response.headers.get('Content-Encoding'),
+                                                    wire_bytes_read(response), body_bytes,
+                                                    time.perf_counter() - started)
+                        if cache and complete:
+                            cache.store(url, response.status_code, response.headers, text)
+                        return text, response.status_code
         except HTTPError as e:
             logger.warning(f"HTTP error occurred: {e}. Status code: {e.response.status_code}")
             return None, e.response.status_code
         except RequestException as e:
             logger.error(f"Error fetching {url} (Attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt == max_retries - 1:
-                return None, None
 
-    return None, None
+        if attempt == max_retries - 1:
+            break
+        delay = backoff_delay(attempt, retry_after)
+        if not retry_budget.acquire(url, delay):
+            logger.warning(f"Retry budget exhausted, giving up on {url}")
+            break
+        time.sleep(delay)
+
+    return None, status_code
+
+
+def read_streamed_body(response, max_bytes=None, stop_when=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Reads a streamed requests response until it ends, `max_bytes` is reached or `stop_when` matches.
+
+    Returns:
+    tuple: (str, bool, int) The text read, whether the whole body was read, and the number of decoded bytes read.
+    """
+    reader = BodyReader(response.encoding, max_bytes, stop_when)
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if reader.feed(chunk):
+            logger.debug(f"Stopped reading {response.url} after {reader.bytes_read} bytes")
+            break
+    return reader.text, reader.complete, reader.bytes_read
+
+
+def wire_bytes_read(response):
+    """
+    Returns the number of (possibly compressed) body bytes urllib3 pulled off the socket, or None if unknown.
+    """
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError):
+        return None
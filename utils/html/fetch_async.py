@@ -0,0 +1,305 @@
+import asyncio
+import queue
+import socket
+import threading
+import time
+
+import aiohttp
+from aiohttp import compression_utils
+from aiohttp.abc import AbstractResolver
+
+from utils.html.cache import NOT_MODIFIED, get_response_cache
+from utils.html.client import DEFAULT_HEADERS
+from utils.html.coalesce import get_request_coalescer, request_key
+from utils.html.compression import build_accept_encoding, get_transfer_stats
+from utils.html.dns import get_dns_cache
+from utils.html.rate_limit import get_scheduler
+from utils.html.retry import RETRYABLE_STATUS_CODES, backoff_delay, get_retry_budget, parse_retry_after
+from utils.html.stream import DEFAULT_CHUNK_SIZE, BodyReader
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 100
+DEFAULT_PER_HOST_LIMIT = 8
+
+# aiohttp decodes br / zstd only when its optional decoders are importable
+ACCEPT_ENCODING = build_accept_encoding(
+    brotli=getattr(compression_utils, 'HAS_BROTLI', False),
+    zstd=getattr(compression_utils, 'HAS_ZSTD', False),
+)
+
+
+class CachedResolver(AbstractResolver):
+    """
+    aiohttp resolver backed by the shared DNS cache, so hosts pre-resolved for the
+    requests client (or by an earlier batch) are not looked up again.
+    """
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        addresses = await asyncio.to_thread(get_dns_cache().resolve_all, host)
+        return [
+            {'hostname': host, 'host': ip, 'port': port, 'family': addr_family, 'proto': 0,
+             'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV}
+            for addr_family, ip in addresses
+            if family in (socket.AF_UNSPEC, addr_family)
+        ]
+
+    async def close(self):
+        pass
+
+
+def create_client_session(max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT, headers=None, timeout=30):
+    """
+    Creates an aiohttp session whose connector enforces the global and per-host connection
+    caps and resolves hosts through the shared DNS cache.
+
+    Must be called from inside a running event loop.
+
+    Args:
+    max_concurrency (int): Maximum number of open connections overall.
+    per_host_limit (int): Maximum number of open connections to a single host.
+    headers (dict): Optional default headers merged over DEFAULT_HEADERS.
+    timeout (int): Total timeout per request in seconds.
+
+    Returns:
+    aiohttp.ClientSession: The configured session.
+    """
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host_limit, resolver=CachedResolver())
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={**DEFAULT_HEADERS, 'Accept-Encoding': ACCEPT_ENCODING, **(headers or {})},
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+async def fetch_html_async(session, url, headers=None, max_retries=3, scheduler=None, use_cache=True,
+                           retry_budget=None, max_bytes=None, stop_when=None, coalesce=True):
+    """
+    Fetches the HTML content of a web page asynchronously.
+
+    Mirrors fetch_html: connection errors, 429 and transient 5xx responses are retried
+    with backoff and jitter (honouring Retry-After) within `retry_budget`, other HTTP
+    errors are returned immediately, and cached pages are revalidated and served with
+    status 304 when unchanged. `max_bytes` / `stop_when` stream the body and stop early.
+    Identical in-flight requests (same URL, headers, use_cache and streaming options), from
+    coroutines or from threads using fetch_html, are coalesced into one.
+
+    Args:
+    session (aiohttp.ClientSession): The session to fetch with.
+    url (str): The URL of the page to fetch.
+    headers (dict): Optional headers to send with the request.
+    max_retries (int): Maximum number of attempts for failed requests. Default is 3.
+    scheduler (DomainScheduler): Optional per-domain rate limiter. Defaults to the shared scheduler.
+    use_cache (bool): Whether to revalidate against and update the response cache. Default is True.
+    retry_budget (RetryBudget): Optional per-crawl retry budget. Defaults to the unbounded process-wide budget.
+    max_bytes (int): Optional cap on the number of body bytes to read.
+    stop_when (callable): Optional predicate called with each new stretch of text (see BodyReader); reading stops once it returns True.
+    coalesce (bool): Whether to share the result of an identical in-flight request. Default is True.
+
+    Returns:
+    tuple: (str, int, str) The URL, the status code and the HTML content. Content is None
+    on failure, and status is None if no response was received.
+    """
+    args = (session, url, headers, max_retries, scheduler, use_cache, retry_budget, max_bytes, stop_when)
+    if not coalesce:
+        return await _fetch_html_async(*args)
+    key = request_key(url, headers, use_cache, max_bytes, stop_when)
+    body, status = await get_request_coalescer().call_async(key, _fetch_html_body_async, *args)
+    return url, status, body
+
+
+async def _fetch_html_body_async(*args):
+    # Shares the (body, status) shape of fetch_html so sync and async callers can coalesce
+    _, status, body = await _fetch_html_async(*args)
+    return body, status
+
+
+async def _fetch_html_async(session, url, headers, max_retries, scheduler, use_cache, retry_budget, max_bytes,
+                            stop_when):
+    scheduler = scheduler or get_scheduler()
+    cache = get_response_cache() if use_cache else None
+    cached = await asyncio.to_thread(cache.get, url) if cache else None
+    if cached and cached.body is None:
+        # Nothing to serve on a 304, so the page is fetched unconditionally
+        cached = None
+    if cached:
+        headers = {**(headers or {}), **cached.conditional_headers()}
+
+    retry_budget = retry_budget or get_retry_budget()
+    status = None
+    for attempt in range(max_retries):
+        retry_after = None
+        try:
+            async with scheduler.slot_async(url):
+                started = time.perf_counter()
+                async with session.get(url, headers=headers) as response:
+                    status = response.status
+                    if status == NOT_MODIFIED and cached:
+                        return url, NOT_MODIFIED, cached.body
+                    if status in RETRYABLE_STATUS_CODES and attempt < max_retries - 1:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        logger.warning(f"Retryable status {status} from {url} (Attempt {attempt + 1}/{max_retries})")
+                    elif status >= 400:
+                        logger.warning(f"HTTP error occurred for {url}. Status code: {status}")
+                        return url, status, None
+                    else:
+                        if max_bytes is not None or stop_when is not None:
+                            body, complete, body_bytes = await read_streamed_body_async(response, max_bytes, stop_when)
+                        else:
+                            raw = await response.read()
+                            body = raw.decode(response.get_encoding(), errors='replace')
+                            complete, body_bytes = True, len(raw)
+                        get_transfer_stats().record(url, response.headers.get('Content-Encoding'),
+                                                    wire_bytes_read(response), body_bytes,
+                                                    time.perf_counter() - started)
+                        if cache and complete:
+                            await asyncio.to_thread(cache.store, url, status, response.headers, body)
+                        return url, status, body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error fetching {url} (Attempt {attempt + 1}/{max_retries}): {e!r}")
+
+        if attempt == max_retries - 1:
+            break
+        delay = backoff_delay(attempt, retry_after)
+        if not retry_budget.acquire(url, delay):
+            logger.warning(f"Retry budget exhausted, giving up on {url}")
+            break
+        await asyncio.sleep(delay)
+
+    return url, status, None
+
+
+async def read_streamed_body_async(response, max_bytes=None, stop_when=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Reads an aiohttp response until it ends, `max_bytes` is reached or `stop_when` matches.
+
+    Returns:
+    tuple: (str, bool, int) The text read, whether the whole body was read, and the number of decoded bytes read.
+    """
+    reader = BodyReader(response.charset, max_bytes, stop_when)
+    async for chunk in response.content.iter_chunked(chunk_size):
+        if reader.feed(chunk):
+            logger.debug(f"Stopped reading {response.url} after {reader.bytes_read} bytes")
+            break
+    return reader.text, reader.complete, reader.bytes_read
+
+
+def wire_bytes_read(response):
+    """
+    Returns the number of (possibly compressed) body bytes received, or None if unknown.
+
+    Newer aiohttp releases count raw bytes on the stream; otherwise fall back to Content-Length.
+    """
+    raw_bytes = getattr(response.content, 'total_raw_bytes', None)
+    if raw_bytes:
+        return raw_bytes
+    return response.content_length
+
+
+async def fetch_many_html_async(urls, max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                                headers=None, timeout=30, max_retries=3, session=None, scheduler=None,
+                                use_cache=True, retry_budget=None, max_bytes=None, stop_when=None):
+    """
+    Fetches many pages concurrently and yields results as they finish.
+
+    At most `max_concurrency` requests are in flight at once and at most `per_host_limit`
+    of them go to the same host; the scheduler additionally paces each domain. URLs are
+    pulled from `urls` lazily, so very large or generated iterables are not materialized up front.
+
+    Args:
+    urls (iterable): URLs to fetch.
+    max_concurrency (int): Global cap on in-flight requests.
+    per_host_limit (int): Cap on in-flight requests per host.
+    headers (dict): Optional headers to send with every request.
+    timeout (int): Total timeout per request in seconds.
+    max_retries (int): Maximum number of attempts per URL.
+    session (aiohttp.ClientSession): Optional session to reuse; one is created and closed otherwise.
+    scheduler (DomainScheduler): Optional per-domain rate limiter. Defaults to the shared scheduler.
+    use_cache (bool): Whether to revalidate against and update the response cache. Default is True.
+    retry_budget (RetryBudget): Optional retry budget shared by every URL in the batch.
+    max_bytes (int): Optional cap on the number of body bytes read per page.
+    stop_when (callable): Optional predicate; reading a page stops once it returns True for a new stretch of text.
+
+    Yields:
+    tuple: (url, status, body) in completion order.
+    """
+    owns_session = session is None
+    if owns_session:
+        session = create_client_session(max_concurrency, per_host_limit, headers, timeout)
+
+    url_iter = iter(urls)
+    pending = set()
+    try:
+        while True:
+            for url in url_iter:
+                pending.add(asyncio.ensure_future(fetch_html_async(
+                    session, url, headers, max_retries, scheduler, use_cache, retry_budget, max_bytes, stop_when)))
+                if len(pending) >= max_concurrency:
+                    break
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if owns_session:
+            await session.close()
+
+
+def iter_html(urls, **kwargs):
+    """
+    Synchronous bridge over fetch_many_html_async for thread-based callers.
+
+    Runs the event loop on a background thread and yields (url, status, body) tuples
+    as they complete, so the caller can parse one page while others are downloading.
+    Accepts the same keyword arguments as fetch_many_html_async.
+
+    Args:
+    urls (iterable): URLs to fetch.
+
+    Yields:
+    tuple: (url, status, body) in completion order.
+    """
+    results = queue.Queue(maxsize=kwargs.get('max_concurrency', DEFAULT_MAX_CONCURRENCY))
+    done = object()
+    stop = threading.Event()
+
+    async def produce():
+        async for result in fetch_many_html_async(urls, **kwargs):
+            while not stop.is_set():
+                try:
+                    results.put_nowait(result)
+                    break
+                except queue.Full:
+                    await asyncio.sleep(0.01)
+            if stop.is_set():
+                return
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except Exception as e:
+            logger.error(f"Async fetch loop failed: {e}")
+        finally:
+            results.put(done)
+
+    thread = threading.Thread(target=run, name='iter-html', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        # Drain so a producer blocked on put() can observe the stop flag and exit
+        while thread.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
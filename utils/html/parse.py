@@ -1,18 +1,209 @@
-from bs4 import BeautifulSoup
+import functools
+import importlib.util
+import os
+import re
 
+from bs4 import BeautifulSoup, SoupStrainer
 
-def parse_html(html_content):
+from utils.html.parse_cache import get_parse_cache
+
+# lxml is several times faster than Python's html.parser and is used whenever it is installed.
+LXML_AVAILABLE = importlib.util.find_spec('lxml') is not None
+# selectolax (a C HTML5 parser) is optional and only backs parse_html_fast.
+SELECTOLAX_AVAILABLE = importlib.util.find_spec('selectolax') is not None
+
+PARSER_BACKENDS = ('lxml', 'html.parser', 'html5lib')
+DEFAULT_PARSER = os.getenv('HTML_PARSER') or ('lxml' if LXML_AVAILABLE else 'html.parser')
+
+if SELECTOLAX_AVAILABLE:
+    from selectolax.lexbor import LexborHTMLParser
+
+# Simple selectors accepted as parse targets: tag, #id, .class and [attr], [attr=v], [attr^=v], [attr*=v], [attr$=v]
+TARGET_PATTERN = re.compile(r'(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<parts>(?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)')
+TARGET_PART_PATTERN = re.compile(
+    r'#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[\^*$]?=)\s*(?P<quote>["\']?)(?P<value>.*?)(?P=quote)\s*)?\]')
+
+
+class ParseTarget:
+    """
+    A simple CSS selector (e.g. 'script', 'input[name=vin]', 'div#gallery-modal',
+    'section[id^=vdp-photos]') that decides whether a tag is kept while parsing.
+    """
+
+    def __init__(self, selector):
+        match = TARGET_PATTERN.fullmatch(selector.strip())
+        if not match or not (match.group('tag') or match.group('parts')):
+            raise ValueError(f"Unsupported parse target: {selector!r}")
+        tag = match.group('tag')
+        self.selector = selector
+        self.tag = None if tag in (None, '*') else tag.lower()
+        self.conditions = []
+        for part in TARGET_PART_PATTERN.finditer(match.group('parts')):
+            if part.group('id'):
+                self.conditions.append(('id', '=', part.group('id')))
+            elif part.group('cls'):
+                self.conditions.append(('class', '~=', part.group('cls')))
+            else:
+                self.conditions.append((part.group('attr').lower(), part.group('op'), part.group('value')))
+
+    def matches(self, name, attrs):
+        if self.tag is not None and name != self.tag:
+            return False
+        for attr, op, expected in self.conditions:
+            value = attrs.get(attr)
+            if value is None:
+                return False
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(value)
+            if op == '=' and value != expected:
+                return False
+            if op == '~=' and expected not in value.split():
+                return False
+            if op == '^=' and not value.startswith(expected):
+                return False
+            if op == '*=' and expected not in value:
+                return False
+            if op == '$=' and not value.endswith(expected):
+                return False
+        return True
+
+
+class TargetStrainer(SoupStrainer):
+    """
+    SoupStrainer that keeps only tags matching any of several ParseTargets, together
+    with everything inside them. Text outside those tags is dropped.
+    """
+
+    def __init__(self, targets):
+        self.targets = [ParseTarget(target) for target in targets]
+        names = {target.tag for target in self.targets}
+        # Name rules only pre-filter; matches() below has the final say
+        super().__init__(name=None if None in names else sorted(names))
+
+    def _matches_targets(self, name, attrs):
+        attrs = attrs or {}
+        return any(target.matches(name, attrs) for target in self.targets)
+
+    # beautifulsoup4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if isinstance(markup_name, str):
+            return self._matches_targets(markup_name, markup_attrs)
+        return super().search_tag(markup_name, markup_attrs)
+
+    # beautifulsoup4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self._matches_targets(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+
+@functools.lru_cache(maxsize=64)
+def build_strainer(targets):
+    """
+    Builds (and caches) a strainer for a tuple of parse targets.
+
+    Args:
+    targets (tuple): Simple CSS selectors, e.g. ('script', 'input[name=vin]', 'section#gallery').
+
+    Returns:
+    TargetStrainer: A strainer to pass as BeautifulSoup's parse_only.
+    """
+    return TargetStrainer(targets)
+
+
+def parse_html(html_content, parser=DEFAULT_PARSER, parse_only=None, use_cache=False):
     """
     Parses the HTML content using BeautifulSoup.
 
+    Passing `parse_only` builds only the listed tags and their subtrees, which is much
+    faster and smaller than a full tree when a caller needs e.g. just the <script> tags
+    or one gallery. Text outside those tags is not kept, so stripped_strings on the
+    result only covers the targets. html5lib ignores parse_only.
+
+    With use_cache=True the tree is kept in the shared parsed-document cache (see
+    utils.html.parse_cache), so parsing the same body again with the same settings returns
+    the same tree object. Only read-only callers should opt in: a tree that is modified
+    (decompose, extract, attribute edits) would corrupt later results for that body.
+
     Args:
     html_content (str): The HTML content to parse.
+    parser (str): BeautifulSoup tree builder, one of PARSER_BACKENDS. Defaults to lxml when
+    installed, otherwise html.parser; the HTML_PARSER environment variable overrides it.
+    parse_only (iterable or SoupStrainer): Optional simple CSS selectors (see ParseTarget) or a SoupStrainer.
+    use_cache (bool): Whether to look the tree up in, and add it to, the parsed-document cache. Default is False.
 
     Returns:
     BeautifulSoup: A BeautifulSoup object for HTML parsing.
     """
+    if parse_only is not None and not isinstance(parse_only, SoupStrainer):
+        parse_only = build_strainer(tuple(parse_only))
+    if not html_content:
+        print("Empty HTML content provided.")
+        return None
+    cache = get_parse_cache() if use_cache else None
+    if cache is None:
+        return BeautifulSoup(html_content, parser, parse_only=parse_only)
+    return cache.get_or_parse(html_content, parser, parse_only,
+                              lambda: BeautifulSoup(html_content, parser, parse_only=parse_only))
+
+
+def parse_html_fast(html_content):
+    """
+    Parses the HTML content with selectolax's C HTML5 parser, for callers that only need CSS selection.
+
+    The returned tree should be queried through select_attributes and select_text, which
+    also work on a BeautifulSoup tree; when selectolax is not installed this falls back to
+    parse_html.
+
+    Args:
+    html_content (str): The HTML content to parse.
+
+    Returns:
+    LexborHTMLParser or BeautifulSoup: The parsed document, or None for empty content.
+    """
+    if not SELECTOLAX_AVAILABLE:
+        # Callers only run CSS selections, so the shared cached tree is safe to hand out
+        return parse_html(html_content, use_cache=True)
     if html_content:
-        return BeautifulSoup(html_content, 'html.parser')
+        return LexborHTMLParser(html_content)
     else:
         print("Empty HTML content provided.")
         return None
+
+
+def select_attributes(tree, selector, attribute):
+    """
+    Returns the values of `attribute` on every element matching a CSS selector.
+
+    Args:
+    tree (LexborHTMLParser or BeautifulSoup): A tree from parse_html_fast or parse_html.
+    selector (str): CSS selector.
+    attribute (str): Attribute to read; elements without it are skipped.
+
+    Returns:
+    list: Attribute values in document order.
+    """
+    if isinstance(tree, BeautifulSoup):
+        return [node[attribute] for node in tree.select(selector) if node.has_attr(attribute)]
+    return [node.attributes[attribute] for node in tree.css(selector)
+            if node.attributes.get(attribute) is not None]
+
+
+def select_attribute_rows(tree, selector, attributes):
+    """
+    Returns, for every element matching a CSS selector, a tuple with the value of each
+    of `attributes` (None where the element does not have it).
+    """
+    if isinstance(tree, BeautifulSoup):
+        return [tuple(node.get(attribute) for attribute in attributes) for node in tree.select(selector)]
+    return [tuple(node.attributes.get(attribute) for attribute in attributes) for node in tree.css(selector)]
+
+
+def select_text(tree, selector):
+    """
+    Returns the stripped text of every element matching a CSS selector.
+    """
+    if isinstance(tree, BeautifulSoup):
+        return [node.get_text(strip=True) for node in tree.select(selector)]
+    return [node.text(strip=True) for node in tree.css(selector)]
@@ -0,0 +1,159 @@
+import os
+import threading
+from collections import OrderedDict
+
+from bs4 import NavigableString
+
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Memory budget for cached trees; set PARSE_CACHE_MAX_MB=0 to disable the cache.
+DEFAULT_MAX_MB = float(os.getenv('PARSE_CACHE_MAX_MB', '128'))
+
+# A full BeautifulSoup tree takes roughly 18 bytes of Python objects per character of HTML
+FULL_TREE_BYTES_PER_CHAR = 18
+# Per-node overhead used to size partial (parse_only) trees, which are walked instead
+TREE_BYTES_PER_NODE = 1000
+
+
+def estimate_tree_size(html_content, tree, partial=False):
+    """
+    Approximates the memory held by a BeautifulSoup tree, in bytes.
+
+    Full trees are sized from the length of the HTML; partial trees are usually a few
+    dozen nodes, so they are walked and sized by node count plus the text they hold.
+    """
+    if not partial:
+        return len(html_content) * FULL_TREE_BYTES_PER_CHAR
+    size = TREE_BYTES_PER_NODE
+    for node in tree.descendants:
+        size += len(node) if isinstance(node, NavigableString) else TREE_BYTES_PER_NODE
+    return size
+
+
+class ParsedDocumentCache:
+    """
+    Bounded in-memory LRU cache of parsed documents keyed by a hash of the HTML.
+
+    Jobs often parse the same body more than once (provider identification and then
+    scraping of the same homepage, re-parsing after a retry); a hit returns the tree built
+    the first time. Entries are evicted least recently used first once the approximate
+    size of all cached trees exceeds max_bytes.
+
+    Cached trees are shared, so callers must not modify a tree they got from the cache.
+    """
+
+    def __init__(self, max_bytes=int(DEFAULT_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(html_content, parser, parse_only=None):
+        """
+        Builds the cache key for one parse. Python's string hash is computed in C and cached
+        on the string object, so keying repeated parses of the same body costs almost nothing;
+        the length guards against hash collisions between different bodies.
+        """
+        if isinstance(parse_only, list):
+            parse_only = tuple(parse_only)
+        return hash(html_content), len(html_content), parser, parse_only
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, tree, size):
+        """
+        Stores a tree under `key`, evicting the least recently used trees to stay within max_bytes.
+        Trees larger than the whole budget are not cached.
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (tree, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_parse(self, html_content, parser, parse_only, parse):
+        """
+        Returns the cached tree for this content and parse settings, or calls `parse()` and caches its result.
+
+        Args:
+        html_content (str or bytes): The HTML that is being parsed.
+        parser (str): Tree builder name, part of the key.
+        parse_only (hashable): Parse targets or strainer, part of the key.
+        parse (callable): Builds the tree on a miss.
+        """
+        key = self.key(html_content, parser, parse_only)
+        tree = self.get(key)
+        if tree is None:
+            tree = parse()
+            if tree is not None:
+                self.put(key, tree, estimate_tree_size(html_content, tree, partial=parse_only is not None))
+        return tree
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def configure_parse_cache(max_mb=DEFAULT_MAX_MB):
+    """
+    Replaces the shared parsed-document cache used by parse_html. Pass 0 to disable it.
+
+    Returns:
+    ParsedDocumentCache: The new shared cache, or None if caching is disabled.
+    """
+    global _default_cache
+    with _default_lock:
+        _default_cache = ParsedDocumentCache(int(max_mb * 1024 * 1024)) if max_mb > 0 else False
+        logger.info(f"Parsed document cache {f'limited to {max_mb:g} MB' if max_mb > 0 else 'disabled'}")
+        return _default_cache or None
+
+
+def get_parse_cache():
+    """
+    Returns the shared parsed-document cache, or None if caching is disabled.
+    """
+    if _default_cache is None:
+        return configure_parse_cache()
+    return _default_cache or None
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from utils.logger.setup import setup_logger
+from utils.url.url import get_registrable_domain
+
+logger = setup_logger(__name__)
+
+DEFAULT_REQUESTS_PER_SECOND = float(os.getenv('CRAWL_REQUESTS_PER_SECOND', 4))
+DEFAULT_BURST = int(os.getenv('CRAWL_BURST', 8))
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv('CRAWL_MAX_IN_FLIGHT', 8))
+
+# How often an async waiter re-checks a full in-flight budget, in seconds.
+ASYNC_POLL_INTERVAL = 0.01
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve a token and are told how long to wait
+    for it, so waiting happens outside the lock and reservations are served in order.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes one token, going into debt if none is available.
+
+        Returns:
+        float: Seconds the caller must wait before using the token.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class DomainBudget:
+    """
+    Rate and concurrency budget for one registrable domain.
+    """
+
+    def __init__(self, domain, requests_per_second, burst, max_in_flight):
+        self.domain = domain
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_in_flight = max_in_flight
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+
+class DomainScheduler:
+    """
+    Politeness scheduler shared by all fetch backends.
+
+    Every registrable domain gets its own token bucket and in-flight limit, so a slow or
+    heavily throttled dealer only holds back the workers talking to that dealer. Both the
+    thread-based (`slot`) and asyncio-based (`slot_async`) entry points draw from the same
+    budgets, so mixing requests, aiohttp and browser fetches still respects one limit.
+    """
+
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, overrides=None):
+        """
+        Args:
+        requests_per_second (float): Sustained request rate per domain. 0 disables rate limiting.
+        burst (int): Number of requests a domain may receive back to back before the rate applies.
+        max_in_flight (int): Maximum concurrent requests per domain.
+        overrides (dict): Optional {domain: {'requests_per_second': ..., 'burst': ..., 'max_in_flight': ...}}.
+        """
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.overrides = dict(overrides or {})
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def set_domain_limits(self, domain, **limits):
+        """
+        Overrides the limits for one domain. Takes effect for requests scheduled afterwards.
+        """
+        domain = get_registrable_domain(domain)
+        with self._lock:
+            self.overrides[domain] = {**self.overrides.get(domain, {}), **limits}
+            self._budgets.pop(domain, None)
+
+    def get_budget(self, url):
+        domain = get_registrable_domain(url)
+        budget = self._budgets.get(domain)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.get(domain)
+                if budget is None:
+                    limits = self.overrides.get(domain, {})
+                    budget = DomainBudget(
+                        domain,
+                        limits.get('requests_per_second', self.requests_per_second),
+                        limits.get('burst', self.burst),
+                        limits.get('max_in_flight', self.max_in_flight),
+                    )
+                    self._budgets[domain] = budget
+        return budget
+
+    @contextmanager
+    def slot(self, url):
+        """
+        Blocks until a request to `url` is allowed, and holds an in-flight slot for the duration.
+        """
+        budget = self.get_budget(url)
+        budget.in_flight.acquire()
+        try:
+            delay = budget.bucket.reserve()
+            if delay > 0:
+                logger.debug(f"Rate limiting {budget.domain}: waiting {delay:.2f}s")
+                time.sleep(delay)
+            yield
+        finally:
+            budget.in_flight.release()
+
+    @asynccontextmanager
+    async def slot_async(self, url):
+        """
+        Async counterpart of `slot`; waits without blocking the event loop.
+        """
+        budget = self.get_budget(url)
+        while not budget.in_flight.acquire(blocking=False):
+            await asyncio.sleep(ASYNC_POLL_INTERVAL)
+        try:
+            delay = budget.bucket.reserve()
+            if delay > 0:
+                logger.debug(f"Rate limiting {budget.domain}: waiting {delay:.2f}s")
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            budget.in_flight.release()
+
+
+_default_scheduler = None
+_default_lock = threading.RLock()
+
+
+def configure_scheduler(requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST,
+                        max_in_flight=DEFAULT_MAX_IN_FLIGHT, overrides=None):
+    """
+    Replaces the shared scheduler used by the fetch helpers.
+
+    Returns:
+    DomainScheduler: The new shared scheduler.
+    """
+    global _default_scheduler
+    with _default_lock:
+        _default_scheduler = DomainScheduler(requests_per_second, burst, max_in_flight, overrides)
+        logger.info(f"Crawl scheduler configured (rps={requests_per_second}, burst={burst}, max_in_flight={max_in_flight})")
+        return _default_scheduler
+
+
+def get_scheduler():
+    """
+    Returns the shared scheduler, creating it with the default limits on first use.
+    """
+    with _default_lock:
+        if _default_scheduler is None:
+            return configure_scheduler()
+        return _default_scheduler
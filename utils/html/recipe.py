@@ -0,0 +1,241 @@
+import re
+
+from bs4 import BeautifulSoup
+
+from utils.html.parse import ParseTarget, parse_html, parse_html_fast, select_attribute_rows, select_attributes, select_text
+from utils.html.structured_data import extract_vehicle, find_text_price, iter_x_data, parse_number
+from utils.re.vin import VIN_PATTERN, find_vin
+from utils.url.images import normalize_image_urls
+
+SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+# Splits a CSS selector into compound selectors, e.g. 'div#gallery img' -> 'div#gallery', 'img'
+SELECTOR_COMBINATOR_PATTERN = re.compile(r'\s*[\s>+~]\s*')
+
+RECIPE_KEYS = {'vin', 'images', 'price', 'parser', 'parse_only', 'strip_query', 'absolute', 'contains',
+               'validate', 'remove', 'join'}
+
+
+class Page:
+    """
+    One document being extracted. The raw HTML, the parsed tree and the embedded
+    structured data are each computed at most once, and only if a source asks for them.
+    """
+
+    def __init__(self, document, extractor, base_url=None):
+        self.document = document
+        self.extractor = extractor
+        self.base_url = base_url
+        self._html = document if isinstance(document, str) else None
+        self._tree = None if isinstance(document, str) else document
+        self._vehicle = False
+
+    @property
+    def html(self):
+        if self._html is None:
+            self._html = str(self._tree) if isinstance(self._tree, BeautifulSoup) else self._tree.html
+        return self._html
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = self.extractor.parse(self._html)
+        return self._tree
+
+    @property
+    def vehicle(self):
+        if self._vehicle is False:
+            self._vehicle = extract_vehicle(self.html)
+        return self._vehicle
+
+
+class Extractor:
+    """
+    A recipe compiled into a callable that extracts a vehicle from a VDP.
+
+    Recipes are plain data, so adding a provider does not need new code:
+
+    vin: VIN sources, tried in order until one finds a VIN. 'structured' (JSON-LD and other
+    embedded data, see extract_vehicle), 'script' (first VIN-shaped token inside a <script>),
+    'page' (best ranked VIN in the whole page, see find_vin) or {'selector': css, 'attribute': name}.
+    images: Image sources, tried in order until one finds images. 'structured',
+    {'selector': css, 'attributes': [names], 'mode': 'all' or 'first', 'srcset': bool} (with
+    mode 'first' only the first attribute present on an element is used; srcset adds the widest
+    srcset candidate) or {'x_data': key, 'template': format string} (items of an Alpine.js x-data list).
+    price: Price sources, tried in order: 'structured' or 'text' (first dollar amount in the page text).
+    parser: 'soup' (parse_html, the default) or 'fast' (parse_html_fast).
+    parse_only: Parse targets for parse_html; by default derived from the selectors in the recipe.
+    strip_query, absolute, contains, validate, remove: Image URL normalization, applied in this
+    order: drop the query string, resolve '//' and '/' URLs, keep URLs containing a substring,
+    keep URLs passing the image validator, delete every match of a regex.
+    join: Return images as one string joined with this separator instead of a list.
+    """
+
+    def __init__(self, recipe, is_valid_image=None):
+        """
+        Args:
+        recipe (dict): The recipe, see the class docstring.
+        is_valid_image (callable): Validator used when the recipe sets validate.
+        """
+        unknown = set(recipe) - RECIPE_KEYS
+        if unknown:
+            raise ValueError(f"Unknown recipe keys: {', '.join(sorted(unknown))}")
+        self.recipe = recipe
+        self.vin_sources = [self._compile_vin_source(source) for source in recipe.get('vin', ['page'])]
+        self.image_sources = [self._compile_image_source(source) for source in recipe.get('images', [])]
+        self.price_sources = [self._compile_price_source(source) for source in recipe.get('price', [])]
+
+        self.parser = recipe.get('parser', 'soup')
+        if self.parser not in ('soup', 'fast'):
+            raise ValueError(f"Unknown parser: {self.parser!r}")
+        self.parse_only = recipe['parse_only'] if 'parse_only' in recipe else self._derive_parse_only()
+
+        self.strip_query = recipe.get('strip_query', False)
+        self.absolute = recipe.get('absolute', False)
+        self.contains = recipe.get('contains')
+        if recipe.get('validate') and is_valid_image is None:
+            raise ValueError("The recipe validates images but no validator was given")
+        self.is_valid_image = is_valid_image if recipe.get('validate') else None
+        self.remove = re.compile(recipe['remove'], re.MULTILINE) if recipe.get('remove') else None
+        self.join = recipe.get('join')
+
+    def _selectors(self):
+        for source in list(self.recipe.get('vin', [])) + list(self.recipe.get('images', [])):
+            if isinstance(source, dict) and 'selector' in source:
+                yield source['selector']
+
+    def _derive_parse_only(self):
+        # Keep only the outermost element of each selector (with its subtree); if any selector
+        # cannot be expressed as a parse target, parse the whole page
+        targets = []
+        for selector in self._selectors():
+            outermost = SELECTOR_COMBINATOR_PATTERN.split(selector.strip())[0]
+            try:
+                ParseTarget(outermost)
+            except ValueError:
+                return None
+            targets.append(outermost)
+        return tuple(dict.fromkeys(targets)) or None
+
+    def _compile_vin_source(self, source):
+        if source == 'structured':
+            return lambda page: page.vehicle['vin'] if page.vehicle else None
+        if source == 'script':
+            return self._script_vin
+        if source == 'page':
+            return lambda page: find_vin(page.document)
+        if isinstance(source, dict) and 'selector' in source:
+            selector, attribute = source['selector'], source.get('attribute', 'value')
+            return lambda page: next(iter(select_attributes(page.tree, selector, attribute)), None)
+        raise ValueError(f"Unknown VIN source: {source!r}")
+
+    def _compile_image_source(self, source):
+        if source == 'structured':
+            return lambda page: (page.vehicle['images'] if page.vehicle else [], ())
+        if isinstance(source, dict) and 'selector' in source:
+            selector = source['selector']
+            attributes = list(source.get('attributes', ['src']))
+            first_only = source.get('mode', 'all') == 'first'
+            srcset = source.get('srcset', False)
+            if srcset:
+                attributes.append('srcset')
+
+            def select_images(page):
+                rows = select_attribute_rows(page.tree, selector, attributes)
+                srcsets = [row[-1] for row in rows] if srcset else ()
+                if srcset:
+                    rows = [row[:-1] for row in rows]
+                if first_only:
+                    urls = [next((value for value in row if value), None) for row in rows]
+                else:
+                    urls = [value for row in rows for value in row]
+                return urls, srcsets
+            return select_images
+        if isinstance(source, dict) and 'x_data' in source:
+            key, template = source['x_data'], source['template']
+
+            def x_data_images(page):
+                items = next((data[key] for data in iter_x_data(page.html) if key in data), [])
+                return [template.format(**item) if isinstance(item, dict) else template.format(item)
+                        for item in items], ()
+            return x_data_images
+        raise ValueError(f"Unknown image source: {source!r}")
+
+    def _compile_price_source(self, source):
+        if source == 'structured':
+            def structured_price(page):
+                if not page.vehicle or page.vehicle['price'] is None:
+                    return None
+                currency = page.vehicle['currency']
+                return page.vehicle['price'], '$' if currency in (None, 'USD') else currency
+            return structured_price
+        if source == 'text':
+            def text_price(page):
+                price = find_text_price(page.html)
+                return (parse_number(price), price[0]) if price else None
+            return text_price
+        raise ValueError(f"Unknown price source: {source!r}")
+
+    def _script_vin(self, page):
+        if page._html is not None:
+            scripts = (match.group(1) for match in SCRIPT_PATTERN.finditer(page.html))
+        else:
+            scripts = select_text(page.tree, 'script')
+        for script in scripts:
+            match = VIN_PATTERN.search(script)
+            if match:
+                return match.group()
+        return None
+
+    def parse(self, html):
+        if self.parser == 'fast':
+            return parse_html_fast(html)
+        # Extraction only reads the tree, so a cached tree can be shared
+        return parse_html(html, parse_only=self.parse_only, use_cache=True)
+
+    def normalize_images(self, urls, base_url=None, srcsets=()):
+        """
+        Applies the recipe's URL normalization to a page's image URLs in one batch (see normalize_image_urls).
+        """
+        return normalize_image_urls(urls, base_url, srcsets, strip_query=self.strip_query, absolute=self.absolute,
+                                    contains=self.contains, is_valid=self.is_valid_image, remove=self.remove)
+
+    def __call__(self, document, base_url=None):
+        """
+        Extracts the vehicle from one page.
+
+        Args:
+        document (str, BeautifulSoup or LexborHTMLParser): Raw HTML, or an already parsed page.
+        base_url (str): Scheme and host the page was served from, for resolving relative image URLs.
+
+        Returns:
+        dict: Keys vin (None if not found), images, price and currency (None without a price source).
+        """
+        page = Page(document, self, base_url)
+        vin = next((vin for vin in (source(page) for source in self.vin_sources) if vin), None)
+        images = []
+        for source in self.image_sources:
+            urls, srcsets = source(page)
+            images = self.normalize_images(urls, base_url, srcsets)
+            if images:
+                break
+        price = next((price for price in (source(page) for source in self.price_sources) if price), None)
+        return {
+            'vin': vin,
+            'images': self.join.join(images) if self.join is not None else images,
+            'price': price[0] if price else None,
+            'currency': price[1] if price else None,
+        }
+
+
+def compile_recipe(recipe, is_valid_image=None):
+    """
+    Compiles an extraction recipe (see Extractor) once, so pages only pay for the extraction itself.
+
+    Args:
+    recipe (dict): The recipe.
+    is_valid_image (callable): Image URL validator, required if the recipe sets validate.
+
+    Returns:
+    Extractor: Call it with a page's HTML (or parsed tree) to get its vin, images and price.
+    """
+    return Extractor(recipe, is_valid_image)
@@ -0,0 +1,141 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+
+from utils.logger.setup import setup_logger
+from utils.url.url import get_registrable_domain
+
+logger = setup_logger(__name__)
+
+# Responses worth retrying: throttling and transient server/gateway failures.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_BUDGET_RETRIES = int(os.getenv('CRAWL_RETRY_BUDGET', 200))
+DEFAULT_BUDGET_WAIT_SECONDS = float(os.getenv('CRAWL_RETRY_WAIT_BUDGET', 300))
+
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header value.
+
+    Args:
+    value (str): Either a number of seconds or an HTTP date.
+
+    Returns:
+    float: Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+    """
+    Returns how long to wait before retry number `attempt + 1`.
+
+    Uses exponential backoff with full jitter (a random delay between 0 and
+    base_delay * 2**attempt, capped at max_delay), so many workers retrying the same
+    host do not come back in lockstep. A server-supplied Retry-After takes precedence,
+    with a little jitter added on top.
+
+    Args:
+    attempt (int): Zero-based index of the attempt that just failed.
+    retry_after (float): Optional Retry-After value in seconds.
+    base_delay (float): Delay scale for the first retry, in seconds.
+    max_delay (float): Upper bound on the computed delay, in seconds.
+
+    Returns:
+    float: Delay in seconds.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base_delay)
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class RetryBudget:
+    """
+    Caps the retries and the total backoff time spent across one crawl.
+
+    A single budget is shared by every fetch in the crawl, so one flaky dealer cannot
+    burn the whole time slice on retries. It also records where retry time went.
+    """
+
+    def __init__(self, max_retries=DEFAULT_BUDGET_RETRIES, max_wait_seconds=DEFAULT_BUDGET_WAIT_SECONDS,
+                 max_delay=DEFAULT_MAX_DELAY):
+        """
+        Args:
+        max_retries (int): Total retries allowed across the crawl. None for unlimited.
+        max_wait_seconds (float): Total seconds of backoff allowed across the crawl. None for unlimited.
+        max_delay (float): Longest single wait accepted; a longer Retry-After gives up instead.
+        """
+        self.max_retries = max_retries
+        self.max_wait_seconds = max_wait_seconds
+        self.max_delay = max_delay
+        self.retries = 0
+        self.wait_seconds = 0.0
+        self.denied = 0
+        self.retries_by_domain = defaultdict(int)
+        self.wait_seconds_by_domain = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def acquire(self, url, delay):
+        """
+        Reserves one retry costing `delay` seconds of waiting.
+
+        Returns:
+        bool: True if the retry may proceed, False if the budget (or max_delay) forbids it.
+        """
+        with self._lock:
+            if (delay > self.max_delay
+                    or (self.max_retries is not None and self.retries >= self.max_retries)
+                    or (self.max_wait_seconds is not None and self.wait_seconds + delay > self.max_wait_seconds)):
+                self.denied += 1
+                return False
+            domain = get_registrable_domain(url)
+            self.retries += 1
+            self.wait_seconds += delay
+            self.retries_by_domain[domain] += 1
+            self.wait_seconds_by_domain[domain] += delay
+            return True
+
+    def stats(self):
+        """
+        Returns a snapshot of the retry counters.
+        """
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'denied': self.denied,
+                'retries_by_domain': dict(self.retries_by_domain),
+                'wait_seconds_by_domain': {domain: round(seconds, 3) for domain, seconds in self.wait_seconds_by_domain.items()},
+            }
+
+
+_default_budget = None
+_default_lock = threading.Lock()
+
+
+def get_retry_budget():
+    """
+    Returns the process-wide retry budget used when a fetch is not given one.
+
+    It has no retry or wait cap and only collects statistics; crawls should create their
+    own RetryBudget to bound retries.
+    """
+    global _default_budget
+    with _default_lock:
+        if _default_budget is None:
+            _default_budget = RetryBudget(max_retries=None, max_wait_seconds=None)
+        return _default_budget
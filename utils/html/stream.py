@@ -0,0 +1,78 @@
+import codecs
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+# Characters of earlier text passed to stop_when along with each new chunk, so a match
+# that straddles a chunk boundary is still seen
+STOP_WHEN_OVERLAP = 1024
+
+
+class BodyReader:
+    """
+    Accumulates a response body chunk by chunk and decides when to stop reading.
+
+    Reading stops once more than `max_bytes` arrive, or as soon as `stop_when` returns True
+    (e.g. once a VIN has appeared). Bytes are decoded incrementally, so multi-byte
+    characters split across chunks are handled correctly.
+
+    `stop_when` only sees the newly decoded text, preceded by the last `overlap` characters
+    read before it, so the cost of checking stays linear in the size of the body. A pattern
+    up to `overlap` characters long is found even when it straddles two chunks.
+    """
+
+    def __init__(self, encoding=None, max_bytes=None, stop_when=None, overlap=STOP_WHEN_OVERLAP):
+        """
+        Args:
+        encoding (str): Charset of the body. Defaults to UTF-8.
+        max_bytes (int): Read at most this many body bytes (after content decoding). None for no limit.
+        stop_when (callable): Optional predicate called with each new stretch of text.
+        overlap (int): Characters of earlier text prepended to each stretch passed to stop_when.
+        """
+        try:
+            decoder_factory = codecs.getincrementaldecoder(encoding or 'utf-8')
+        except LookupError:
+            decoder_factory = codecs.getincrementaldecoder('utf-8')
+        self._decoder = decoder_factory(errors='replace')
+        self._parts = []
+        self.max_bytes = max_bytes
+        self.stop_when = stop_when
+        self.overlap = overlap
+        self._tail = ''
+        self.bytes_read = 0
+        self.truncated = False
+        self.stopped_early = False
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of the body.
+
+        Returns:
+        bool: True if the caller should stop reading.
+        """
+        if self.max_bytes is not None and self.bytes_read + len(chunk) > self.max_bytes:
+            # Only bytes beyond the cap make the body truncated; one of exactly max_bytes is complete
+            chunk = chunk[:self.max_bytes - self.bytes_read]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        text = self._decoder.decode(chunk)
+        self._parts.append(text)
+
+        if self.stop_when is not None and text:
+            window = self._tail + text
+            self._tail = window[-self.overlap:] if self.overlap > 0 else ''
+            if self.stop_when(window):
+                self.stopped_early = True
+                return True
+        return self.truncated
+
+    @property
+    def text(self):
+        if len(self._parts) > 1:
+            self._parts = [''.join(self._parts)]
+        return self._parts[0] if self._parts else ''
+
+    @property
+    def complete(self):
+        """
+        True if the whole body was read.
+        """
+        return not (self.truncated or self.stopped_early)
@@ -0,0 +1,285 @@
+import html as html_lib
+import json
+import re
+
+from utils.logger.setup import setup_logger
+from utils.re.vin import is_valid_vin
+
+logger = setup_logger(__name__)
+
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+NEXT_DATA_PATTERN = re.compile(r'<script[^>]*\bid\s*=\s*["\']__NEXT_DATA__["\'][^>]*>(.*?)</script\s*>',
+                               re.IGNORECASE | re.DOTALL)
+X_DATA_PATTERN = re.compile(r'x-data\s*=\s*"([^"]*)"')
+MICRODATA_PATTERN = re.compile(
+    r'itemprop\s*=\s*["\'](vehicleIdentificationNumber|price|priceCurrency|mileageFromOdometer)["\']'
+    r'[^>]*?\bcontent\s*=\s*["\']([^"\']*)["\']')
+STATE_ASSIGNMENT_PATTERN = re.compile(r'\s*=\s*(?=[{\[])')
+# Splits HTML into script/style blocks, comments, tags and text runs; only text runs are captured
+TEXT_TOKEN_PATTERN = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>|([^<]+)', re.IGNORECASE | re.DOTALL)
+PRICE_PATTERN = re.compile(r'\$\d{1,3}(,\d{3})*(\.\d{2})?')
+
+# Inline state assignments of the form `window.NAME = {...}` used by common front-end frameworks
+STATE_VARIABLES = ('__INITIAL_STATE__', '__PRELOADED_STATE__', '__APOLLO_STATE__', '__STATE__', 'DDC.dataLayer')
+VEHICLE_TYPES = {'vehicle', 'car', 'motorvehicle', 'product'}
+
+VIN_KEYS = ('vin', 'vehicleidentificationnumber')
+PRICE_KEYS = ('internetprice', 'saleprice', 'price', 'finalprice', 'sellingprice', 'askingprice', 'msrp')
+MILEAGE_KEYS = ('mileage', 'odometer', 'miles', 'mileagefromodometer')
+IMAGE_KEYS = ('photos', 'images', 'image', 'imageurls', 'media', 'gallery', 'pictures')
+IMAGE_URL_KEYS = ('url', 'src', 'href', 'contenturl', 'uri')
+
+_decoder = json.JSONDecoder()
+
+
+def _text(document):
+    return document.decode('utf-8', errors='replace') if isinstance(document, bytes) else document
+
+
+def _loads(blob, source):
+    try:
+        return json.loads(blob)
+    except (ValueError, TypeError) as e:
+        logger.debug(f"Could not decode {source}: {e}")
+        return None
+
+
+def iter_json_ld(document):
+    """
+    Yields every JSON-LD object in the document, flattening top-level lists and @graph arrays.
+
+    Args:
+    document (str or bytes): Raw HTML.
+    """
+    for match in JSON_LD_PATTERN.finditer(_text(document)):
+        data = _loads(match.group(1).strip(), 'JSON-LD')
+        pending = data if isinstance(data, list) else [data]
+        while pending:
+            item = pending.pop(0)
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get('@graph'), list):
+                pending.extend(item['@graph'])
+            yield item
+
+
+def extract_next_data(document):
+    """
+    Returns the parsed Next.js __NEXT_DATA__ blob, or None.
+    """
+    match = NEXT_DATA_PATTERN.search(_text(document))
+    return _loads(match.group(1), '__NEXT_DATA__') if match else None
+
+
+def extract_state(document, names=STATE_VARIABLES):
+    """
+    Returns inline state objects assigned in scripts, e.g. `window.__INITIAL_STATE__ = {...};`.
+
+    Only the assigned value is decoded: the JSON decoder stops at the end of the object,
+    so the rest of the script is never looked at.
+
+    Args:
+    document (str or bytes): Raw HTML.
+    names (iterable): Variable names to look for.
+
+    Returns:
+    dict: Variable name to decoded value, for every variable that was found and is valid JSON.
+    """
+    text = _text(document)
+    states = {}
+    for name in names:
+        position = text.find(name)
+        while position != -1 and name not in states:
+            match = STATE_ASSIGNMENT_PATTERN.match(text, position + len(name))
+            if match:
+                try:
+                    states[name], _ = _decoder.raw_decode(text, match.end())
+                except ValueError as e:
+                    logger.debug(f"Could not decode {name}: {e}")
+                    break
+            position = text.find(name, position + len(name))
+    return states
+
+
+def parse_js_object(text):
+    """
+    Decodes a JavaScript object literal that is JSON apart from single quotes, unquoted keys
+    and trailing commas, as found in Alpine.js x-data attributes.
+
+    Returns:
+    The decoded value, or None if it cannot be decoded.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # Quote strings and keys token by token, so colons inside string values (URLs) are left alone
+    tokens = re.sub(
+        r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"|([A-Za-z_$][\w$]*)(\s*:)",
+        lambda m: (json.dumps(m.group(1).replace("\\'", "'")) if m.group(1) is not None
+                   else f'"{m.group(2)}"' if m.group(2) is not None
+                   else f'"{m.group(3)}"{m.group(4)}'),
+        text)
+    tokens = re.sub(r',\s*([\]}])', r'\1', tokens)
+    try:
+        return json.loads(tokens)
+    except ValueError as e:
+        logger.debug(f"Could not decode JavaScript object: {e}")
+        return None
+
+
+def iter_x_data(document):
+    """
+    Yields the decoded Alpine.js x-data objects in the document.
+    """
+    for match in X_DATA_PATTERN.finditer(_text(document)):
+        data = parse_js_object(html_lib.unescape(match.group(1)))
+        if isinstance(data, dict):
+            yield data
+
+
+def _first(data, keys):
+    lowered = {key.lower(): value for key, value in data.items() if isinstance(key, str)}
+    for key in keys:
+        value = lowered.get(key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+
+def parse_number(value):
+    """
+    Returns the number in a price or mileage value (24500, '24,500', '$24,500.00', {'value': 24500}), or None.
+    """
+    if isinstance(value, dict):
+        value = _first(value, ('value', 'amount', 'price'))
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    digits = re.sub(r'[^\d.]', '', str(value))
+    try:
+        number = float(digits)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def _image_urls(value):
+    urls = []
+    for item in value if isinstance(value, list) else [value]:
+        if isinstance(item, dict):
+            item = _first(item, IMAGE_URL_KEYS)
+        if isinstance(item, str) and item:
+            urls.append(item)
+    return urls
+
+
+def _vehicle_from_dict(data):
+    vin = _first(data, VIN_KEYS)
+    if not isinstance(vin, str) or not is_valid_vin(vin.strip().upper(), check_digit=False):
+        return None
+    offers = data.get('offers')
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    price_source = offers if isinstance(offers, dict) else data
+    currency = price_source.get('priceCurrency') or data.get('currency')
+    return {
+        'vin': vin.strip().upper(),
+        'price': parse_number(_first(price_source, PRICE_KEYS)),
+        'currency': currency if isinstance(currency, str) else None,
+        'mileage': parse_number(_first(data, MILEAGE_KEYS)),
+        'images': _image_urls(_first(data, IMAGE_KEYS)),
+    }
+
+
+def find_vehicle(data, max_depth=12):
+    """
+    Searches decoded JSON for the first object that carries a VIN and returns it as a vehicle.
+
+    Returns:
+    dict: Keys vin, price, currency, mileage and images, or None if no object has a VIN.
+    """
+    pending = [(data, 0)]
+    while pending:
+        item, depth = pending.pop(0)
+        if isinstance(item, dict):
+            vehicle = _vehicle_from_dict(item)
+            if vehicle:
+                return vehicle
+            children = item.values()
+        elif isinstance(item, list):
+            children = item
+        else:
+            continue
+        if depth < max_depth:
+            pending.extend((child, depth + 1) for child in children if isinstance(child, (dict, list)))
+    return None
+
+
+def extract_microdata(document):
+    """
+    Returns the schema.org microdata properties (VIN, price, currency, mileage) found in meta/content attributes.
+    """
+    properties = {}
+    for name, content in MICRODATA_PATTERN.findall(_text(document)):
+        properties.setdefault(name, html_lib.unescape(content))
+    if 'vehicleIdentificationNumber' not in properties:
+        return None
+    return _vehicle_from_dict(properties)
+
+
+def find_text_price(document):
+    """
+    Returns the first dollar amount (e.g. '$24,500') in the visible text of the page, or None.
+
+    Matches what searching BeautifulSoup's stripped_strings would find, in one pass over the
+    raw HTML: script and style contents, comments and attribute values are skipped.
+    """
+    for token in TEXT_TOKEN_PATTERN.finditer(_text(document)):
+        text = token.group(2)
+        if text and '$' in text:
+            match = PRICE_PATTERN.search(html_lib.unescape(text))
+            if match:
+                return match.group()
+    return None
+
+
+def extract_vehicle(document):
+    """
+    Extracts the vehicle a VDP describes from its embedded structured data, without building a DOM.
+
+    Sources are tried in order: JSON-LD Vehicle/Car/Product, Next.js __NEXT_DATA__,
+    inline state (window.__INITIAL_STATE__ and similar), Alpine.js x-data and microdata.
+    The first source that yields an object with a VIN wins; missing fields stay None
+    (images: empty list), so callers can fall back to DOM extraction for them.
+
+    Args:
+    document (str or bytes): Raw HTML of the page.
+
+    Returns:
+    dict: Keys vin, price, currency, mileage, images and source, or None if no source has a VIN.
+    """
+    text = _text(document)
+    if not text:
+        return None
+
+    for item in iter_json_ld(text):
+        types = item.get('@type')
+        types = types if isinstance(types, list) else [types]
+        if any(isinstance(kind, str) and kind.lower() in VEHICLE_TYPES for kind in types):
+            vehicle = _vehicle_from_dict(item)
+            if vehicle:
+                return {**vehicle, 'source': 'json-ld'}
+
+    candidates = [('__NEXT_DATA__', extract_next_data(text))]
+    candidates += list(extract_state(text).items())
+    candidates += [('x-data', data) for data in iter_x_data(text)]
+    for source, data in candidates:
+        vehicle = find_vehicle(data) if data else None
+        if vehicle:
+            return {**vehicle, 'source': source}
+
+    vehicle = extract_microdata(text)
+    return {**vehicle, 'source': 'microdata'} if vehicle else None
@@ -1,15 +1,17 @@
+from utils.html.rate_limit import get_scheduler
 from utils.logger.setup import setup_logger
 
 logger = setup_logger(__name__)
 
 
-async def visit_url_async(browser, url, timeout=60000):
+async def visit_url_async(browser, url, timeout=60000, scheduler=None):
     """
     Opens a new page and navigates to the specified URL asynchronously with enhanced error handling and timeout.
 
     :param browser: The browser instance to use.
     :param url: The URL to navigate to.
     :param timeout: The maximum time to wait for navigation, in milliseconds. Defaults to 60 seconds.
+    :param scheduler: Optional per-domain rate limiter. Defaults to the shared scheduler.
     :return: The page object if successful, None otherwise.
     """
     try:
@@ -17,8 +19,9 @@ async def visit_url_async(browser, url, timeout=60000):
         context = await browser.new_context()
         page = await context.new_page()
 
-        # Navigate to the URL with timeout
-        response = await page.goto(url, timeout=timeout, wait_until="networkidle")
+        # Navigate to the URL with timeout, within the domain's request budget
+        async with (scheduler or get_scheduler()).slot_async(url):
+            response = await page.goto(url, timeout=timeout, wait_until="networkidle")
 
         # Check if the navigation was successful
         if response is None or not response.ok:
@@ -37,20 +40,21 @@ async def visit_url_async(browser, url, timeout=60000):
         return None
 
 
-def visit_url_sync(browser, url, timeout=60000):
+def visit_url_sync(browser, url, timeout=60000, scheduler=None):
     """
     Opens a new page and navigates to the specified URL synchronously with enhanced error handling, timeout, and custom headers.
 
     :param browser: The browser instance to use.
     :param url: The URL to navigate to.
     :param timeout: The maximum time to wait for navigation, in milliseconds. Defaults to 60 seconds.
+    :param scheduler: Optional per-domain rate limiter. Defaults to the shared scheduler.
     :return: The page object if successful, None otherwise.
     """
     try:
-        # Define custom headers to be used in the browser context
+        # Define custom headers to be used in the browser context. Accept-Encoding is left
+        # to the browser so it can negotiate br / zstd as well as gzip.
         custom_headers = {
             "Accept": "application/xhtml+xml, text/html, application/xml, */*; q=0.9,image/webp,image/apng, */*;",
-            "Accept-Encoding": "gzip, deflate",
             "Accept-Language": "en-IN,en-GB;q=0.9,en-US;q=0.8,en;q=0.7",
             "Connection": "keep-alive",
             "Referer": "https://www.google.com",
@@ -61,8 +65,9 @@ def visit_url_sync(browser, url, timeout=60000):
         context = browser.new_context(extra_http_headers=custom_headers)
         page = context.new_page()
 
-        # Navigate to the URL with timeout
-        response = page.goto(url, timeout=timeout, wait_until="load")
+        # Navigate to the URL with timeout, within the domain's request budget
+        with (scheduler or get_scheduler()).slot(url):
+            response = page.goto(url, timeout=timeout, wait_until="load")
 
         # Check if the navigation was successful
         if response is None or not response.ok:
@@ -1,6 +1,5 @@
-import re
+from utils.re.vin import is_valid_vin
 
 
-def vin_validator(vin):
-    pattern = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
-    return pattern.match(vin) is not None
+def vin_validator(vin, check_digit=False):
+    return is_valid_vin(vin, check_digit)
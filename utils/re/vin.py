@@ -0,0 +1,112 @@
+import re
+from collections import namedtuple
+
+VIN_PATTERN = re.compile(r'[A-HJ-NPR-Z0-9]{17}')
+# A VIN-shaped token that is not part of a longer alphanumeric run
+VIN_CANDIDATE_PATTERN = re.compile(r'(?<![A-Za-z0-9])[A-HJ-NPR-Z0-9]{17}(?![A-Za-z0-9])')
+VIN_LABEL_PATTERN = re.compile(r'(?<![a-z])vin(?:[_-]?(?:number|no|code))?(?![a-z])', re.IGNORECASE)
+JSON_LD_VIN_KEY = 'vehicleIdentificationNumber'
+
+# Check digit (position 9) per 49 CFR 565: transliterated values weighted by position, mod 11
+VIN_TRANSLITERATION = {
+    **{str(digit): digit for digit in range(10)},
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'P': 7, 'R': 9,
+    'S': 2, 'T': 3, 'U': 4, 'V': 5, 'W': 6, 'X': 7, 'Y': 8, 'Z': 9,
+}
+VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# How many characters before a candidate are searched for a "VIN" label
+DEFAULT_CONTEXT_WINDOW = 64
+
+VinCandidate = namedtuple('VinCandidate', ['vin', 'score', 'position', 'count', 'check_digit_valid'])
+
+
+def vin_check_digit(vin):
+    """
+    Computes the check digit of a 17 character VIN; the character at position 9 is ignored.
+
+    Returns:
+    str: '0'-'9' or 'X'.
+    """
+    total = sum(VIN_TRANSLITERATION[char] * weight for char, weight in zip(vin, VIN_WEIGHTS))
+    remainder = total % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def is_valid_vin(vin, check_digit=True):
+    """
+    Checks that `vin` is 17 VIN characters (no I, O or Q) and, optionally, that its check digit is correct.
+    """
+    if not vin or VIN_PATTERN.fullmatch(vin) is None:
+        return False
+    return not check_digit or vin[8] == vin_check_digit(vin)
+
+
+def scan_vins(document, window=DEFAULT_CONTEXT_WINDOW):
+    """
+    Finds every VIN candidate in a document in one linear pass and ranks them.
+
+    Works on raw HTML (str or bytes), so no DOM has to be built. Candidates are scored
+    by, in order of weight: a valid check digit, appearing as a JSON-LD
+    vehicleIdentificationNumber, having a "VIN" label (VIN:, name="vin", "vin": ...)
+    just before them, and appearing more than once. Tokens made only of digits or only
+    of letters are ignored, since real VINs always mix both.
+
+    Args:
+    document (str, bytes or BeautifulSoup): Raw HTML, or a parsed tree whose text is scanned.
+    window (int): Characters before each candidate searched for a label.
+
+    Returns:
+    list: VinCandidate tuples, best first; ties go to the earliest candidate.
+    """
+    if isinstance(document, bytes):
+        # latin-1 maps every byte to one character, so positions and ASCII matches are preserved
+        document = document.decode('latin-1')
+    elif not isinstance(document, str):
+        document = document.get_text(' ') if document is not None else ''
+
+    candidates = {}
+    for match in VIN_CANDIDATE_PATTERN.finditer(document):
+        vin = match.group()
+        if vin.isdigit() or vin.isalpha():
+            continue
+        candidate = candidates.get(vin)
+        if candidate is None:
+            candidates[vin] = candidate = {'position': match.start(), 'count': 0, 'labelled': False, 'json_ld': False}
+        candidate['count'] += 1
+        if not (candidate['labelled'] and candidate['json_ld']):
+            context = document[max(0, match.start() - window):match.start()]
+            candidate['labelled'] = candidate['labelled'] or VIN_LABEL_PATTERN.search(context) is not None
+            candidate['json_ld'] = candidate['json_ld'] or JSON_LD_VIN_KEY in context
+
+    ranked = []
+    for vin, candidate in candidates.items():
+        check_digit_valid = vin[8] == vin_check_digit(vin)
+        score = (8 * check_digit_valid + 4 * candidate['json_ld'] + 2 * candidate['labelled']
+                 + (candidate['count'] > 1))
+        ranked.append(VinCandidate(vin, score, candidate['position'], candidate['count'], check_digit_valid))
+    ranked.sort(key=lambda candidate: (-candidate.score, candidate.position))
+    return ranked
+
+
+def find_vin(document, require_check_digit=False, window=DEFAULT_CONTEXT_WINDOW):
+    """
+    Returns the most likely VIN in a document, or None.
+
+    Candidates with a valid check digit always win; with `require_check_digit`, candidates
+    without one are never returned (use this for North American inventory only).
+
+    Args:
+    document (str, bytes or BeautifulSoup): Raw HTML, or a parsed tree whose text is scanned.
+    require_check_digit (bool): Whether to reject VINs whose check digit does not match.
+    window (int): Characters before each candidate searched for a label.
+
+    Returns:
+    str: The VIN, or None if no candidate was found.
+    """
+    candidates = scan_vins(document, window)
+    # A valid check digit outweighs every other signal, so if the best candidate fails it, all do
+    if not candidates or (require_check_digit and not candidates[0].check_digit_valid):
+        return None
+    return candidates[0].vin
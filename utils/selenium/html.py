@@ -6,11 +6,12 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from utils.html.rate_limit import get_scheduler
 from utils.logger.setup import setup_logger
 logger = setup_logger(__name__)
 
 
-def fetch_html_selenium(driver, url, wait_time=10):
+def fetch_html_selenium(driver, url, wait_time=10, scheduler=None):
     """
     Navigates to the URL and fetches the HTML content.
 
@@ -18,6 +19,7 @@ def fetch_html_selenium(driver, url, wait_time=10):
         driver (WebDriver): The Selenium WebDriver instance.
         url (str): The URL to navigate to.
         wait_time (int): Time in seconds to wait for the page to load.
+        scheduler (DomainScheduler): Optional per-domain rate limiter. Defaults to the shared scheduler.
 
     Returns:
         str: The HTML content of the page, or None if an error occurs.
@@ -26,10 +28,11 @@ def fetch_html_selenium(driver, url, wait_time=10):
         TimeoutException: If the page fails to load within the specified wait time.
     """
     try:
-        driver.get(url)
-        WebDriverWait(driver, wait_time).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
+        with (scheduler or get_scheduler()).slot(url):
+            driver.get(url)
+            WebDriverWait(driver, wait_time).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
         return driver.page_source
     except TimeoutException as e:
         logger.error(f"Timeout while waiting for page to load: {
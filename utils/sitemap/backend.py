@@ -0,0 +1,198 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from utils.html.client import get_http_session
+from utils.html.rate_limit import get_scheduler
+from utils.html.stream import DEFAULT_CHUNK_SIZE
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Sitemap fetch backends. Every backend exposes the same interface to the sitemap engine:
+#
+#     with backend.open(url, headers) as response:
+#         ... response.status, response.headers, response.chunks ...
+#
+# `headers` are conditional request headers, which backends that cannot send them ignore.
+
+
+class SitemapResponse:
+    """
+    The status, headers and body of one fetched sitemap. `chunks` may stream from the
+    network, so it is only valid inside the backend's open() block.
+    """
+
+    def __init__(self, url, status, headers=None, chunks=(), encoding=None):
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self.chunks = chunks
+        self.encoding = encoding
+
+    @property
+    def ok(self):
+        return self.status is not None and self.status < 400
+
+
+class HttpSitemapBackend:
+    """
+    Fetches sitemaps with the shared pooled requests session, streaming the body.
+    """
+
+    name = 'http'
+    is_browser = False
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    @contextmanager
+    def open(self, url, headers=None):
+        with get_scheduler().slot(url), \
+                get_http_session().get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            yield SitemapResponse(response.url, response.status_code, response.headers,
+                                  response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE), response.encoding)
+
+    def close(self):
+        pass
+
+
+class BrowserSitemapBackend:
+    """
+    Base class of the backends that load sitemaps in a real browser, for hosts that refuse
+    plain HTTP clients.
+
+    One browser serves one page at a time, so loads are serialized. A backend given an
+    existing browser uses it from the calling thread. A backend that launches its own does
+    so only on the first load, and runs every load on one dedicated thread, because
+    Playwright's sync API only works on the thread that started it.
+    """
+
+    name = 'browser'
+    is_browser = True
+
+    def __init__(self, browser=None, launch=None):
+        """
+        Args:
+        browser: An existing driver or browser, used from the calling thread.
+        launch (callable): Creates the browser on first use when `browser` is not given.
+        """
+        self.browser = browser
+        self.launch = launch
+        self._lock = threading.Lock()
+        self._executor = None if browser is not None else ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f'sitemap-{self.name}')
+
+    @contextmanager
+    def open(self, url, headers=None):
+        if self._executor is None:
+            with self._lock:
+                status, content = self._load(url)
+        else:
+            status, content = self._executor.submit(self._load_launched, url).result()
+        yield SitemapResponse(url, status, chunks=[content] if content else [])
+
+    def _load_launched(self, url):
+        if self.browser is None:
+            logger.info(f"Launching {self.name} browser for sitemaps")
+            self.browser = self.launch()
+        return self._load(url)
+
+    def _load(self, url):
+        """
+        Loads `url` in the browser.
+
+        Returns:
+        tuple: (status (int or None), content (str or None))
+        """
+        raise NotImplementedError
+
+    def _quit(self):
+        pass
+
+    def close(self):
+        """
+        Quits a browser this backend launched; browsers passed in are left to their owner.
+        """
+        if self._executor is not None:
+            if self.browser is not None:
+                self._executor.submit(self._quit).result()
+                self.browser = None
+            self._executor.shutdown()
+            self._executor = None
+
+
+class SeleniumSitemapBackend(BrowserSitemapBackend):
+    """
+    Loads sitemaps with a Selenium WebDriver. WebDriver does not expose the status code,
+    so a page that loaded with any content counts as a 200.
+    """
+
+    name = 'selenium'
+
+    def __init__(self, driver=None, create_driver=None, wait_time=10):
+        """
+        Args:
+        driver (WebDriver): An existing driver.
+        create_driver (callable): Creates a driver on first use, e.g. a headless create_chrome_driver.
+        wait_time (int): Seconds to wait for the page body.
+        """
+        self.wait_time = wait_time
+        super().__init__(driver, create_driver)
+
+    def _load(self, url):
+        from utils.selenium.html import fetch_html_selenium
+
+        content = fetch_html_selenium(self.browser, url, self.wait_time)
+        return (200 if content else None), content
+
+    def _quit(self):
+        self.browser.quit()
+
+
+class PlaywrightSitemapBackend(BrowserSitemapBackend):
+    """
+    Loads sitemaps with a Playwright browser. The body is the raw response text where
+    Playwright exposes it, not the browser's rendering of the XML.
+    """
+
+    name = 'playwright'
+
+    def __init__(self, browser=None, launch=None, timeout=60000):
+        """
+        Args:
+        browser: An existing Playwright browser.
+        launch (callable): Returns a (browser, playwright) pair on first use, e.g. launch_browser_sync.
+        timeout (int): Navigation timeout in milliseconds.
+        """
+        self.timeout = timeout
+        self._playwright = None
+        super().__init__(browser, launch)
+
+    def _load_launched(self, url):
+        if self.browser is None:
+            logger.info(f"Launching {self.name} browser for sitemaps")
+            self.browser, self._playwright = self.launch()
+        return self._load(url)
+
+    def _load(self, url):
+        context = self.browser.new_context()
+        try:
+            page = context.new_page()
+            with get_scheduler().slot(url):
+                response = page.goto(url, timeout=self.timeout, wait_until='load')
+            if response is None:
+                return None, None
+            try:
+                content = response.text()
+            except Exception:
+                content = page.content()
+            return response.status, content
+        finally:
+            context.close()
+
+    def _quit(self):
+        self.browser.close()
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
@@ -0,0 +1,197 @@
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+from utils.logger.setup import setup_logger
+from utils.sitemap.engine import BROWSER_STATUSES, get_sitemap_engine
+from utils.sitemap.location_cache import get_sitemap_location_cache
+from utils.sitemap.stream import SitemapStreamParser, is_sitemap_url, iter_decompressed
+from utils.sitemap.type import identify_sitemap_type
+
+logger = setup_logger(__name__)
+
+# Paths tried on every site when the caller has no provider-specific candidates
+DEFAULT_CANDIDATES = ('/sitemap.xml', '/sitemap_index.xml')
+# Candidate sitemaps probed at once
+MAX_PROBE_WORKERS = 8
+# A probe reads only enough of a candidate to see what kind of document it is
+PROBE_BYTES = 16 * 1024
+# robots.txt files larger than this are not read further
+ROBOTS_MAX_BYTES = 512 * 1024
+ROBOTS_SITEMAP_PATTERN = re.compile(r'^\s*sitemap\s*:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+
+# Probe outcomes
+FOUND = 'found'
+BLOCKED = 'blocked'
+MISSING = 'missing'
+
+
+def _site_origin(site_url):
+    parsed = urlparse(site_url if '//' in site_url else f'https://{site_url}')
+    return f'{parsed.scheme}://{parsed.netloc}', parsed.netloc.lower()
+
+
+def _decode(chunks):
+    if chunks and isinstance(chunks[0], str):
+        return ''.join(chunks)
+    return b''.join(chunks).decode('utf-8', errors='replace')
+
+
+def _read_head(chunks, max_bytes):
+    head, size = [], 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            break
+    return head
+
+
+def read_robots_sitemaps(origin, backend=None):
+    """
+    Returns the sitemap URLs declared by `Sitemap:` lines in a site's robots.txt.
+
+    Args:
+    origin (str): Scheme and host of the site, e.g. 'https://dealer.com'.
+    backend: Sitemap fetch backend; defaults to the shared engine's.
+
+    Returns:
+    list: Absolute sitemap URLs, in file order; empty if there is no readable robots.txt.
+    """
+    backend = backend or get_sitemap_engine().backend
+    robots_url = f'{origin}/robots.txt'
+    try:
+        with backend.open(robots_url) as response:
+            if not response.ok:
+                logger.debug(f"No robots.txt at {robots_url}: status {response.status}")
+                return []
+            text = _decode(_read_head(response.chunks, ROBOTS_MAX_BYTES))
+    except Exception as e:
+        logger.debug(f"Could not read {robots_url}: {e}")
+        return []
+    return list(dict.fromkeys(urljoin(robots_url, url) for url in ROBOTS_SITEMAP_PATTERN.findall(text)))
+
+
+def probe_sitemap(url, backend=None):
+    """
+    Checks whether `url` serves a sitemap, reading only the start of the body.
+
+    XML sitemaps, sitemap indexes and plain-text sitemaps (gzip-compressed or not) count as
+    found. An HTML page only counts for candidates without an .xml extension that were not
+    redirected, since sites commonly answer a missing sitemap.xml with their homepage.
+
+    Returns:
+    str: FOUND, BLOCKED (the host turned the request away with one of BROWSER_STATUSES), or MISSING.
+    """
+    backend = backend or get_sitemap_engine().backend
+    try:
+        with backend.open(url) as response:
+            if response.status in BROWSER_STATUSES:
+                return BLOCKED
+            if not response.ok:
+                return MISSING
+            head = _read_head(iter_decompressed(response.chunks), PROBE_BYTES)
+            redirected = urlparse(response.url).path != urlparse(url).path
+    except Exception as e:
+        logger.debug(f"Probe of {url} failed: {e}")
+        return MISSING
+
+    parser = SitemapStreamParser()
+    try:
+        for chunk in head:
+            parser.feed(chunk)
+            if parser.sitemap_type is not None:
+                break
+    except ET.ParseError:
+        pass
+    sitemap_type = parser.sitemap_type
+    if sitemap_type in (None, 'Unknown'):
+        sitemap_type = identify_sitemap_type(_decode(head))
+    if sitemap_type in ('XML', 'Sitemap Index', 'Text'):
+        return FOUND
+    if sitemap_type == 'HTML' and not is_sitemap_url(url) and not redirected:
+        return FOUND
+    return MISSING
+
+
+def discover_sitemap(site_url, candidates=DEFAULT_CANDIDATES, refresh=False, engine=None):
+    """
+    Finds the sitemap of a site.
+
+    A sitemap URL found on an earlier run is returned straight from the sitemap location
+    cache. Otherwise the `Sitemap:` lines of robots.txt and the candidate paths are probed
+    concurrently, with the engine's plain HTTP backend. The first candidate that serves
+    a sitemap wins, then the first robots.txt sitemap. The winner is cached per domain.
+
+    If nothing is found but some probe was turned away by bot protection, the first
+    candidate is returned uncached, and the sitemap engine will load it in a browser. If
+    every probe simply fails, None is returned, so no browser is launched for a sitemap
+    that does not exist.
+
+    Args:
+    site_url (str): Any URL on the site, or its host.
+    candidates (iterable): Sitemap paths (or absolute URLs) to try, most specific first.
+    refresh (bool): Whether to ignore the cached location and probe again.
+    engine (SitemapEngine): Engine whose backend probes the site; defaults to the shared engine.
+
+    Returns:
+    str: The sitemap URL, or None.
+    """
+    origin, domain = _site_origin(site_url)
+    cache = get_sitemap_location_cache()
+    if cache and not refresh:
+        sitemap_url = cache.get(domain)
+        if sitemap_url:
+            logger.info(f"Using cached sitemap location for {domain}: {sitemap_url}")
+            return sitemap_url
+
+    backend = (engine or get_sitemap_engine()).backend
+    candidate_urls = [urljoin(origin + '/', candidate) for candidate in candidates]
+    urls = list(dict.fromkeys(candidate_urls + read_robots_sitemaps(origin, backend)))
+    if not urls:
+        return None
+
+    with ThreadPoolExecutor(max_workers=min(len(urls), MAX_PROBE_WORKERS)) as executor:
+        outcomes = dict(zip(urls, executor.map(lambda url: probe_sitemap(url, backend), urls)))
+
+    for url in urls:
+        if outcomes[url] == FOUND:
+            logger.info(f"Discovered sitemap for {domain}: {url}")
+            if cache:
+                cache.put(domain, url)
+            return url
+    if BLOCKED in outcomes.values():
+        logger.info(f"{domain} refuses sitemap probes over plain HTTP, trying {urls[0]}")
+        return urls[0]
+    logger.warning(f"No sitemap found for {domain} among {len(urls)} candidates")
+    return None
+
+
+def fetch_site_sitemap_urls(site_url, candidates=DEFAULT_CANDIDATES, engine=None):
+    """
+    Discovers a site's sitemap (see discover_sitemap) and returns its page URLs.
+
+    A cached location that no longer yields any URLs is forgotten and the site is probed
+    again once.
+
+    Returns:
+    list: The page URLs, each once.
+
+    Raises:
+    IOError: If no sitemap was found for the site.
+    """
+    engine = engine or get_sitemap_engine()
+    sitemap_url = discover_sitemap(site_url, candidates, engine=engine)
+    if sitemap_url is None:
+        raise IOError(f"No sitemap found for {_site_origin(site_url)[1]}")
+    urls = engine.fetch_urls(sitemap_url)
+    if not urls:
+        _, domain = _site_origin(site_url)
+        cache = get_sitemap_location_cache()
+        if cache:
+            cache.delete(domain)
+        rediscovered = discover_sitemap(site_url, candidates, refresh=True, engine=engine)
+        if rediscovered not in (None, sitemap_url):
+            urls = engine.fetch_urls(rediscovered)
+    return urls
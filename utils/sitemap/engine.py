@@ -0,0 +1,379 @@
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+from utils.html.cache import NOT_MODIFIED, get_response_cache
+from utils.html.coalesce import get_request_coalescer, request_key
+from utils.logger.setup import setup_logger
+from utils.sitemap.backend import HttpSitemapBackend, PlaywrightSitemapBackend, SeleniumSitemapBackend
+from utils.sitemap.stream import is_sitemap_url, iter_sitemap_locs, iter_text_chunks, read_sitemap
+from utils.sitemap.type import identify_sitemap_type
+
+logger = setup_logger(__name__)
+
+# Sitemaps fetched at once while expanding a sitemap index
+MAX_SITEMAP_WORKERS = 8
+# Sitemaps nested deeper than this below the first one are not followed
+MAX_SITEMAP_DEPTH = 10
+# Statuses with which bot protection turns plain HTTP clients away. A host that answers a
+# sitemap request with one of them has its sitemaps loaded in the browser from then on.
+BROWSER_STATUSES = (403, 429, 503)
+# Browser the shared engine escalates to: 'selenium', 'playwright', or empty to never escalate
+DEFAULT_BROWSER = os.getenv('SITEMAP_BROWSER', 'selenium')
+# Response cache namespace of sitemap URL lists, kept apart from the page bodies fetch_html caches
+SITEMAP_CACHE_NAMESPACE = 'sitemap-locs'
+
+
+def parse_xml_sitemap_locs(content):
+    """
+    Returns the <loc> URLs of an XML sitemap or sitemap index held in a string.
+
+    The string is parsed incrementally, entry by entry, rather than into a full tree.
+    Malformed XML falls back to BeautifulSoup's recovering XML parser.
+    """
+    try:
+        return list(iter_sitemap_locs(iter_text_chunks(content)))
+    except ET.ParseError as e:
+        logger.debug(f"Sitemap is not well-formed XML, parsing it leniently: {e}")
+    soup = BeautifulSoup(content, 'xml')
+    return [loc.text.strip() for loc in soup.find_all('loc')]
+
+
+def parse_html_sitemap_links(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    return [a['href'].strip() for a in soup.find_all('a', href=True) if a['href'].startswith('http')]
+
+
+def parse_text_sitemap_lines(content):
+    return [line.strip() for line in content.split('\n') if line.strip().startswith('http')]
+
+
+def parse_sitemap_content(content):
+    """
+    Identifies the type of a sitemap held in a string and returns the URLs listed in it.
+
+    Returns:
+    tuple: (sitemap_type (str), locs (list))
+    """
+    sitemap_type = identify_sitemap_type(content)
+    if sitemap_type in ('XML', 'Sitemap Index'):
+        return sitemap_type, parse_xml_sitemap_locs(content)
+    if sitemap_type == 'HTML':
+        return sitemap_type, parse_html_sitemap_links(content)
+    if sitemap_type == 'Text':
+        return sitemap_type, parse_text_sitemap_lines(content)
+    return sitemap_type, []
+
+
+def _completed_future(function, *args):
+    future = Future()
+    try:
+        future.set_result(function(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+class SitemapEngine:
+    """
+    Collects the page URLs of a sitemap, whatever fetches it.
+
+    The engine owns everything above the transport:
+    - sniffing the type of each sitemap, and parsing XML as it streams;
+    - following sitemap indexes and nested .xml / .xml.gz sitemaps on a bounded pool of
+      threads, fetching each sitemap once and at most max_depth levels deep;
+    - reporting each page URL once;
+    - revalidating sitemaps against the response cache and coalescing concurrent fetches.
+
+    Sitemaps are fetched with `backend` (plain HTTP by default). When a host turns the
+    backend away with one of BROWSER_STATUSES and a `browser_backend` is configured, that
+    sitemap and every later one on the same host are loaded in the browser instead, so a
+    browser is only launched for the hosts that need it.
+
+    With max_workers of 1 or less, sitemaps are fetched one at a time in the calling
+    thread, which is what a caller-owned Playwright browser requires.
+
+    Usage:
+        engine = SitemapEngine(browser_backend=SeleniumSitemapBackend(create_driver=...))
+        for url in engine.iter_urls('https://dealer.com/sitemap.xml'):
+            ...
+    """
+
+    def __init__(self, backend=None, browser_backend=None, max_workers=MAX_SITEMAP_WORKERS,
+                 max_depth=MAX_SITEMAP_DEPTH, use_cache=True):
+        """
+        Args:
+        backend: Fetch backend tried first; defaults to HttpSitemapBackend.
+        browser_backend: Optional browser backend for hosts that refuse `backend`.
+        max_workers (int): Most sitemaps fetched at once.
+        max_depth (int): Maximum depth for nested sitemaps.
+        use_cache (bool): Whether to revalidate sitemaps against the shared response cache.
+        """
+        self.backend = backend or HttpSitemapBackend()
+        self.browser_backend = browser_backend
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.use_cache = use_cache
+        self._browser_hosts = set()
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.failures = 0
+
+    def fetch_urls(self, sitemap_url, visited=None, results=None):
+        """
+        Returns the page URLs of a sitemap; see iter_urls.
+        """
+        logger.info(f"Fetching sitemap using {self.backend.name} from URL: {sitemap_url}")
+        urls = list(self.iter_urls([sitemap_url], visited=visited, results=results))
+        logger.info(f"Found {len(urls)} URLs in sitemap: {sitemap_url}")
+        return urls
+
+    def iter_urls(self, sitemap_urls, visited=None, depth=0, results=None):
+        """
+        Yields the page URLs of one or more sitemaps, following sitemap indexes and nested sitemaps.
+
+        Child sitemaps (every entry of a sitemap index, and .xml / .xml.gz entries of an XML
+        sitemap) are queued as soon as their parent has been read. A sitemap that fails to
+        download or parse is logged and skipped; the others still complete.
+
+        Args:
+        sitemap_urls (str or iterable): The sitemap, or sitemaps, to start from.
+        visited (set, optional): Sitemap URLs already fetched; updated in place.
+        depth (int): Nesting depth of `sitemap_urls`.
+        results (dict, optional): Filled with sitemap URL -> (sitemap_type, error) as each sitemap
+        completes; error is None on success and sitemap_type is None on failure.
+
+        Yields:
+        str: Each page URL once, in document order within a sitemap and in completion order across sitemaps.
+        """
+        if isinstance(sitemap_urls, str):
+            sitemap_urls = [sitemap_urls]
+        if visited is None:
+            visited = set()
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        pending = {}
+
+        def submit(url, url_depth):
+            if url in visited:
+                logger.debug(f"Already visited sitemap: {url}. Skipping.")
+            elif url_depth > self.max_depth:
+                logger.warning(f"Maximum sitemap nesting depth reached at: {url}. Skipping further nesting.")
+            else:
+                visited.add(url)
+                future = executor.submit(self.fetch_locs, url) if executor else _completed_future(self.fetch_locs, url)
+                pending[future] = (url, url_depth)
+
+        def new_urls(locs):
+            for loc in locs:
+                if loc not in seen:
+                    seen.add(loc)
+                    yield loc
+
+        try:
+            for url in sitemap_urls:
+                submit(url, depth)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                # Submission order keeps runs without workers in document order
+                for future in [future for future in pending if future in done]:
+                    url, url_depth = pending.pop(future)
+                    try:
+                        sitemap_type, locs = future.result()
+                    except Exception as e:
+                        logger.error(f"Error fetching sitemap {url}: {e}")
+                        with self._lock:
+                            self.failures += 1
+                        if results is not None:
+                            results[url] = (None, str(e))
+                        continue
+                    if results is not None:
+                        results[url] = (sitemap_type, None)
+
+                    if sitemap_type == 'Sitemap Index':
+                        for loc in locs:
+                            submit(loc, url_depth + 1)
+                    elif sitemap_type == 'XML':
+                        for loc in locs:
+                            if is_sitemap_url(loc):
+                                logger.debug(f"Found nested sitemap: {loc}")
+                                submit(loc, url_depth + 1)
+                        yield from new_urls(loc for loc in locs if not is_sitemap_url(loc))
+                    elif sitemap_type in ('HTML', 'Text'):
+                        yield from new_urls(locs)
+                    else:
+                        logger.warning(f"Unknown sitemap type for URL: {url}")
+        finally:
+            if executor is not None:
+                # Stops queued fetches if the caller stops reading early
+                executor.shutdown(cancel_futures=True)
+
+    def fetch_locs(self, sitemap_url):
+        """
+        Fetches one sitemap and returns its type and the URLs listed directly in it.
+
+        The sitemap is revalidated against the response cache. When the server answers 304,
+        the URLs parsed on the previous run are reused, so neither the body nor the parse is
+        repeated. Nested sitemaps are returned as-is and not followed. Concurrent fetches of
+        the same sitemap (e.g. a child listed in several indexes) share one request.
+
+        Returns:
+        tuple: (sitemap_type (str), locs (list))
+        """
+        key = request_key(sitemap_url, None, 'sitemap-locs', self.backend.name)
+        sitemap_type, locs = get_request_coalescer().call(key, self._fetch_locs, sitemap_url)
+        return sitemap_type, list(locs)
+
+    def needs_browser(self, url):
+        """
+        Returns True if sitemaps on the host of `url` are loaded in the browser backend.
+        """
+        return self.browser_backend is not None and urlparse(url).netloc in self._browser_hosts
+
+    def _fetch_locs(self, sitemap_url):
+        if self.needs_browser(sitemap_url):
+            return self._read_locs(self.browser_backend, sitemap_url)
+        result = self._read_locs(self.backend, sitemap_url, escalate=self.browser_backend is not None)
+        if result is None:
+            host = urlparse(sitemap_url).netloc
+            logger.info(f"{host} refuses plain HTTP clients, loading its sitemaps with {self.browser_backend.name}")
+            with self._lock:
+                self._browser_hosts.add(host)
+            result = self._read_locs(self.browser_backend, sitemap_url)
+        return result
+
+    def _read_locs(self, backend, sitemap_url, escalate=False):
+        # Returns None when `escalate` is set and the host turned the backend away
+        cache = get_response_cache() if self.use_cache else None
+        cached = cache.get(sitemap_url, SITEMAP_CACHE_NAMESPACE) if cache else None
+        headers = cached.conditional_headers() if cached else None
+
+        # XML sitemaps are parsed as chunks arrive and are never held whole
+        with backend.open(sitemap_url, headers) as response:
+            with self._lock:
+                self.fetched += 1
+            if response.status == NOT_MODIFIED and cached:
+                if 'sitemap_locs' in cached.extras:
+                    logger.info(f"Sitemap not modified, reusing {len(cached.extras['sitemap_locs'])} cached URLs: {sitemap_url}")
+                    return cached.extras['sitemap_type'], cached.extras['sitemap_locs']
+                sitemap_type, locs, content = read_sitemap(iter_text_chunks(cached.body or ''))
+            elif escalate and response.status in BROWSER_STATUSES:
+                return None
+            elif not response.ok:
+                raise IOError(f"{backend.name} got status {response.status} for sitemap {sitemap_url}")
+            else:
+                sitemap_type, locs, content = read_sitemap(response.chunks, response.encoding)
+
+        if content is not None:
+            sitemap_type, locs = parse_sitemap_content(content)
+
+        if cache:
+            # Streamed XML sitemaps keep only their URLs; revalidation never needs the body back
+            extras = {'sitemap_type': sitemap_type, 'sitemap_locs': locs}
+            if response.status == NOT_MODIFIED:
+                cache.update_extras(cached, **extras)
+            else:
+                cache.store(sitemap_url, response.status, response.headers, content, extras=extras,
+                            namespace=SITEMAP_CACHE_NAMESPACE)
+        return sitemap_type, locs
+
+    def close(self):
+        """
+        Quits any browser the backends launched.
+        """
+        self.backend.close()
+        if self.browser_backend is not None:
+            self.browser_backend.close()
+
+    def stats(self):
+        """
+        Returns a snapshot of the engine counters.
+        """
+        with self._lock:
+            return {
+                'fetched': self.fetched,
+                'failures': self.failures,
+                'browser_hosts': len(self._browser_hosts),
+            }
+
+
+def _create_headless_chrome():
+    from utils.selenium.webdriver import create_chrome_driver
+
+    return create_chrome_driver(headless=True)
+
+
+def _launch_headless_chromium():
+    from utils.playwright.browser import launch_browser_sync
+
+    return launch_browser_sync(headless=True, browser_type='chromium')
+
+
+def build_browser_backend(browser=DEFAULT_BROWSER):
+    """
+    Returns a browser backend that launches its browser on first use, or None if `browser` is empty.
+
+    Args:
+    browser (str): 'selenium' or 'playwright'.
+    """
+    if not browser:
+        return None
+    if browser == 'selenium':
+        return SeleniumSitemapBackend(create_driver=_create_headless_chrome)
+    if browser == 'playwright':
+        return PlaywrightSitemapBackend(launch=_launch_headless_chromium)
+    raise ValueError(f"Unsupported sitemap browser: {browser!r}")
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def configure_sitemap_engine(backend=None, browser=DEFAULT_BROWSER, max_workers=MAX_SITEMAP_WORKERS,
+                             max_depth=MAX_SITEMAP_DEPTH, use_cache=True):
+    """
+    Replaces the shared sitemap engine, closing the previous one.
+
+    Args:
+    backend: Fetch backend tried first; defaults to HttpSitemapBackend.
+    browser (str or backend): Browser backend, or the name of one for build_browser_backend; empty to never escalate.
+
+    Returns:
+    SitemapEngine: The new shared engine.
+    """
+    global _default_engine
+    if not browser or isinstance(browser, str):
+        browser = build_browser_backend(browser)
+    with _default_lock:
+        if _default_engine is not None:
+            _default_engine.close()
+        _default_engine = SitemapEngine(backend, browser, max_workers, max_depth, use_cache)
+        logger.info(f"Sitemap engine using {_default_engine.backend.name}"
+                    f"{f', escalating to {browser.name}' if browser else ''}")
+        return _default_engine
+
+
+def get_sitemap_engine():
+    """
+    Returns the shared sitemap engine.
+    """
+    if _default_engine is None:
+        return configure_sitemap_engine()
+    return _default_engine
+
+
+def fetch_sitemap_urls(sitemap_url):
+    """
+    Returns the page URLs of a sitemap, fetched with the shared sitemap engine.
+
+    Args:
+    sitemap_url (str): The URL of the sitemap.
+
+    Returns:
+    list: The page URLs, each once.
+    """
+    return get_sitemap_engine().fetch_urls(sitemap_url)
@@ -1,68 +1,64 @@
-import requests
-from bs4 import BeautifulSoup
-
-from utils.sitemap.type import identify_sitemap_type
+from utils.sitemap.engine import (MAX_SITEMAP_DEPTH, MAX_SITEMAP_WORKERS, SitemapEngine, parse_html_sitemap_links,
+                                  parse_text_sitemap_lines, parse_xml_sitemap_locs)
+from utils.sitemap.stream import is_sitemap_url
 from utils.logger.setup import setup_logger
 logger = setup_logger(__name__)
 
-# Requests function
+# Requests functions: the sitemap engine over plain HTTP, without browser escalation
 
 
-def fetch_sitemap_urls_requests(sitemap_url):
+def fetch_sitemap_urls_requests(sitemap_url, max_workers=MAX_SITEMAP_WORKERS, max_depth=MAX_SITEMAP_DEPTH):
     """
     Fetches all URLs from a given sitemap URL using requests based on its type.
+
+    Nested sitemaps are fetched concurrently (see SitemapEngine.iter_urls), so URLs from
+    different child sitemaps come back in the order the children finished.
+    """
+    return SitemapEngine(max_workers=max_workers, max_depth=max_depth).fetch_urls(sitemap_url)
+
+
+def iter_sitemap_urls_requests(sitemap_url, max_workers=MAX_SITEMAP_WORKERS, max_depth=MAX_SITEMAP_DEPTH, visited=None):
     """
-    urls = []
-    try:
-        logger.info(f"Fetching sitemap using requests from URL: {sitemap_url}")
-        response = requests.get(sitemap_url)
-        response.raise_for_status()
-
-        sitemap_type = identify_sitemap_type(response.text)
-
-        if sitemap_type == 'XML':
-            urls = fetch_xml_sitemap_urls_requests(response.text)
-        elif sitemap_type == 'HTML':
-            urls = fetch_html_sitemap_urls_requests(response.text)
-        elif sitemap_type == 'Text':
-            urls = fetch_text_sitemap_urls_requests(response.text)
-        elif sitemap_type == 'Sitemap Index':
-            urls = fetch_sitemap_index_urls_requests(response.text)
-        else:
-            logger.warning(f"Unknown sitemap type for URL: {sitemap_url}")
-
-        logger.info(f"Found {len(urls)} URLs in sitemap using requests")
-    except Exception as e:
-        logger.error(f"Error fetching sitemap with requests: {e}")
+    Yields the page URLs of a sitemap as each sitemap listing them is read, following
+    sitemap indexes and nested sitemaps.
+    """
+    logger.info(f"Fetching sitemap using requests from URL: {sitemap_url}")
+    yield from SitemapEngine(max_workers=max_workers, max_depth=max_depth).iter_urls(sitemap_url, visited)
+
+
+def iter_nested_sitemap_urls_requests(sitemap_urls, max_workers=MAX_SITEMAP_WORKERS, max_depth=MAX_SITEMAP_DEPTH,
+                                      visited=None, depth=0):
+    return SitemapEngine(max_workers=max_workers, max_depth=max_depth).iter_urls(sitemap_urls, visited, depth)
+
+
+def fetch_sitemap_locs_requests(sitemap_url):
+    """
+    Fetches one sitemap and returns its type and the URLs listed directly in it.
+
+    Returns:
+    tuple: (sitemap_type (str), locs (list))
+    """
+    return SitemapEngine().fetch_locs(sitemap_url)
+
+
+def expand_nested_sitemaps_requests(locs, max_workers=MAX_SITEMAP_WORKERS, max_depth=MAX_SITEMAP_DEPTH):
+    urls = [url for url in locs if not is_sitemap_url(url)]
+    nested = [url for url in locs if is_sitemap_url(url)]
+    urls.extend(iter_nested_sitemap_urls_requests(nested, max_workers, max_depth, depth=1))
     return urls
 
 
 def fetch_xml_sitemap_urls_requests(content):
-    soup = BeautifulSoup(content, 'xml')
-    urls = []
-    for loc in soup.find_all('loc'):
-        url = loc.text.strip()
-        if url.endswith('.xml'):
-            logger.debug(f"Found nested sitemap: {url}")
-            urls.extend(fetch_sitemap_urls_requests(url))
-        else:
-            urls.append(url)
-    return urls
+    return expand_nested_sitemaps_requests(parse_xml_sitemap_locs(content))
 
 
 def fetch_html_sitemap_urls_requests(content):
-    soup = BeautifulSoup(content, 'html.parser')
-    return [a['href'] for a in soup.find_all('a', href=True) if a['href'].startswith('http')]
+    return parse_html_sitemap_links(content)
 
 
 def fetch_text_sitemap_urls_requests(content):
-    return [line.strip() for line in content.split('\n') if line.strip().startswith('http')]
+    return parse_text_sitemap_lines(content)
 
 
-def fetch_sitemap_index_urls_requests(content):
-    soup = BeautifulSoup(content, 'xml')
-    urls = []
-    for loc in soup.find_all('loc'):
-        url = loc.text.strip()
-        urls.extend(fetch_sitemap_urls_requests(url))
-    return urls
+def fetch_sitemap_index_urls_requests(content, max_workers=MAX_SITEMAP_WORKERS, max_depth=MAX_SITEMAP_DEPTH):
+    return list(iter_nested_sitemap_urls_requests(parse_xml_sitemap_locs(content), max_workers, max_depth, depth=1))
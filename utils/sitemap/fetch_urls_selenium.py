@@ -1,8 +1,5 @@
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-
-from utils.sitemap.type import identify_sitemap_type
+from utils.sitemap.backend import SeleniumSitemapBackend
+from utils.sitemap.engine import MAX_SITEMAP_DEPTH, SitemapEngine
 from utils.logger.setup import setup_logger
 
 logger = setup_logger(__name__)
@@ -10,70 +7,22 @@ logger = setup_logger(__name__)
 # Selenium functions
 
 
-def fetch_sitemap_urls_selenium(driver, sitemap_url):
+def fetch_sitemap_urls_selenium(driver, sitemap_url, visited=None, max_depth=MAX_SITEMAP_DEPTH, wait_time=10):
     """
     Fetches all URLs from a given sitemap URL using Selenium based on its type.
-    """
-    urls = []
-    try:
-        logger.info(f"Fetching sitemap using Selenium from URL: {sitemap_url}")
-        driver.get(sitemap_url)
-
-        sitemap_type = identify_sitemap_type(driver.page_source)
-
-        if sitemap_type == 'XML':
-            urls = fetch_xml_sitemap_urls_selenium(driver)
-        elif sitemap_type == 'HTML':
-            urls = fetch_html_sitemap_urls_selenium(driver)
-        elif sitemap_type == 'Text':
-            urls = fetch_text_sitemap_urls_selenium(driver)
-        elif sitemap_type == 'Sitemap Index':
-            urls = fetch_sitemap_index_urls_selenium(driver)
-        else:
-            logger.warning(f"Unknown sitemap type for URL: {sitemap_url}")
-
-        logger.info(f"Found {len(urls)} URLs in sitemap using Selenium")
-    except Exception as e:
-        logger.error(f"Error fetching sitemap with Selenium: {e}")
-    return urls
-
 
-def fetch_xml_sitemap_urls_selenium(driver):
-    urls = []
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.TAG_NAME, "loc")))
-    loc_elements = driver.find_elements(By.TAG_NAME, "loc")
-    for loc in loc_elements:
-        url = loc.text.strip()
-        if url.endswith('.xml'):
-            logger.debug(f"Found nested sitemap: {url}")
-            urls.extend(fetch_sitemap_urls_selenium(driver, url))
-        else:
-            urls.append(url)
-    return urls
+    The driver loads one sitemap at a time; nested sitemaps are followed once each and no
+    deeper than max_depth, by the shared sitemap engine.
 
+    Args:
+    driver (WebDriver): The Selenium WebDriver instance.
+    sitemap_url (str): The URL of the sitemap.
+    visited (set, optional): Sitemap URLs already fetched; updated in place.
+    max_depth (int): Maximum depth for nested sitemaps.
+    wait_time (int): Seconds to wait for each sitemap to load.
 
-def fetch_html_sitemap_urls_selenium(driver):
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.TAG_NAME, "a")))
-    link_elements = driver.find_elements(By.TAG_NAME, "a")
-    return [link.get_attribute('href') for link in link_elements if link.get_attribute('href') and link.get_attribute('href').startswith('http')]
-
-
-def fetch_text_sitemap_urls_selenium(driver):
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.TAG_NAME, "body")))
-    body_text = driver.find_element(By.TAG_NAME, "body").text
-    return [line.strip() for line in body_text.split('\n') if line.strip().startswith('http')]
-
-
-def fetch_sitemap_index_urls_selenium(driver):
-    urls = []
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.TAG_NAME, "loc")))
-    loc_elements = driver.find_elements(By.TAG_NAME, "loc")
-    for loc in loc_elements:
-        url = loc.text.strip()
-        urls.extend(fetch_sitemap_urls_selenium(driver, url))
-    return urls
-
+    Returns:
+    list: The page URLs, each once.
+    """
+    engine = SitemapEngine(SeleniumSitemapBackend(driver, wait_time=wait_time), max_workers=1, max_depth=max_depth)
+    return engine.fetch_urls(sitemap_url, visited)
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Database file, relative to the working directory unless absolute; set SITEMAP_LOCATION_CACHE_PATH to an
+# empty string to disable the cache.
+DEFAULT_CACHE_PATH = os.getenv('SITEMAP_LOCATION_CACHE_PATH', '.sitemap_locations.sqlite3')
+# How long a discovered sitemap URL is trusted before the site is probed again
+DEFAULT_TTL_DAYS = float(os.getenv('SITEMAP_LOCATION_CACHE_TTL_DAYS', '7'))
+
+
+class SitemapLocationCache:
+    """
+    Local SQLite table of (domain, sitemap_url, found_at) rows recording where each site's
+    sitemap was found, so later runs go straight to it instead of reading robots.txt and
+    probing candidate paths again.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+        """
+        Args:
+        path (str): SQLite database file; created, along with its directory, if missing.
+        ttl_days (float): Age after which a row is no longer returned.
+
+        Raises:
+        sqlite3.Error, OSError: If the database cannot be created or opened.
+        """
+        self.path = path
+        self.ttl = ttl_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS sitemap_locations ('
+                'domain TEXT PRIMARY KEY, sitemap_url TEXT NOT NULL, found_at REAL NOT NULL)')
+
+    def get(self, domain):
+        """
+        Returns the sitemap URL found for `domain`, or None if it is unknown or older than the TTL.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT sitemap_url FROM sitemap_locations WHERE domain = ? AND found_at >= ?',
+                (domain, time.time() - self.ttl)).fetchone()
+        return row[0] if row else None
+
+    def put(self, domain, sitemap_url):
+        """
+        Stores the sitemap URL found for `domain`, replacing any previous one.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO sitemap_locations (domain, sitemap_url, found_at) VALUES (?, ?, ?)',
+                (domain, sitemap_url, time.time()))
+
+    def delete(self, domain):
+        """
+        Forgets the sitemap URL of `domain`, e.g. once it stops serving a sitemap.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM sitemap_locations WHERE domain = ?', (domain,))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def configure_sitemap_location_cache(path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+    """
+    Replaces the shared sitemap location cache. Pass an empty path to disable caching.
+    A database that cannot be created or opened (e.g. in a read-only directory) also disables it.
+
+    Returns:
+    SitemapLocationCache: The new shared cache, or None if caching is disabled.
+    """
+    global _default_cache
+    with _default_lock:
+        _default_cache = False
+        if path:
+            try:
+                _default_cache = SitemapLocationCache(path, ttl_days)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Cannot use {path} for the sitemap location cache, caching disabled: {e}")
+                return None
+        logger.info(f"Sitemap location cache {f'at {path} (TTL {ttl_days:g} days)' if path else 'disabled'}")
+        return _default_cache or None
+
+
+def get_sitemap_location_cache():
+    """
+    Returns the shared sitemap location cache, or None if caching is disabled.
+    """
+    if _default_cache is None:
+        return configure_sitemap_location_cache()
+    return _default_cache or None
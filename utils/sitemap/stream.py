@@ -0,0 +1,235 @@
+import itertools
+import xml.etree.ElementTree as ET
+import zlib
+from urllib.parse import urlparse
+
+from utils.html.stream import DEFAULT_CHUNK_SIZE, BodyReader
+from utils.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Sitemap type reported for each root element; any other root is not an XML sitemap
+SITEMAP_ROOTS = {'urlset': 'XML', 'sitemapindex': 'Sitemap Index'}
+# URL paths that are followed as nested sitemaps rather than reported as pages
+SITEMAP_EXTENSIONS = ('.xml', '.xml.gz')
+GZIP_MAGIC = b'\x1f\x8b'
+# zlib window bits that accept a gzip header and trailer
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def is_sitemap_url(url):
+    """
+    Returns True if `url` names a sitemap file (.xml or gzip-compressed .xml.gz), ignoring any query string.
+    """
+    return urlparse(url).path.lower().endswith(SITEMAP_EXTENSIONS)
+
+
+def iter_decompressed(chunks, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Passes a body through, gunzipping it as it streams if it is gzip-compressed.
+
+    Compression is detected from the gzip magic bytes rather than the .gz extension: a
+    server that sends a .xml.gz file with Content-Encoding: gzip has it decoded by the HTTP
+    client already, while one that sends it as application/x-gzip does not. Each call to
+    the decompressor is capped at chunk_size bytes of output, so a highly compressed
+    sitemap is never expanded in memory all at once. Concatenated gzip members are read
+    as one file.
+
+    Args:
+    chunks (iterable): Chunks of the body. String chunks are passed through unchanged.
+    chunk_size (int): Most uncompressed bytes yielded at a time.
+
+    Yields:
+    bytes or str: Chunks of the uncompressed body.
+    """
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            yield from chunks
+            return
+        head += chunk
+        if len(head) >= len(GZIP_MAGIC):
+            break
+    if not head.startswith(GZIP_MAGIC):
+        if head:
+            yield head
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    for chunk in itertools.chain([head], chunks):
+        while chunk:
+            data = decompressor.decompress(chunk, chunk_size)
+            if data:
+                yield data
+            if not decompressor.eof:
+                chunk = decompressor.unconsumed_tail
+            elif decompressor.unused_data.startswith(GZIP_MAGIC):
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+            else:
+                # Padding after the last member
+                chunk = b''
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+def split_tag(tag):
+    """
+    Splits an ElementTree tag into its namespace and local name ('{ns}loc' -> ('ns', 'loc'), 'loc' -> ('', 'loc')).
+    """
+    if tag[:1] == '{':
+        namespace, _, name = tag[1:].partition('}')
+        return namespace, name
+    return '', tag
+
+
+class SitemapStreamParser:
+    """
+    Incremental XML sitemap parser that returns <loc> URLs as their elements close.
+
+    Chunks of the document are fed as they arrive, so the sitemap never has to be held
+    in memory as one string, and every finished <url> / <sitemap> entry is cleared from
+    the tree, so memory stays flat however many entries the sitemap has.
+
+    Only <loc> elements in the namespace of the root element are returned, which works for
+    namespaced and non-namespaced sitemaps alike and skips extension elements such as
+    <image:loc>.
+
+    Usage:
+        parser = SitemapStreamParser()
+        for chunk in response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE):
+            for url in parser.feed(chunk):
+                ...
+        urls = parser.close()
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._root = None
+        self._depth = 0
+        self.namespace = None
+        # None until the root element has been read
+        self.sitemap_type = None
+        self.locs = 0
+
+    def feed(self, data):
+        """
+        Parses a chunk of the document.
+
+        Args:
+        data (bytes or str): The next chunk. Bytes are decoded using the XML declaration.
+
+        Returns:
+        list: The URLs of the <loc> elements closed by this chunk.
+
+        Raises:
+        xml.etree.ElementTree.ParseError: If the document is not well-formed XML.
+        """
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self):
+        """
+        Finishes the document and returns the URLs of any <loc> elements still pending.
+        """
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self):
+        locs = []
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = element
+                    self.namespace, name = split_tag(element.tag)
+                    self.sitemap_type = SITEMAP_ROOTS.get(name, 'Unknown')
+                self._depth += 1
+                continue
+
+            self._depth -= 1
+            namespace, name = split_tag(element.tag)
+            if name == 'loc' and namespace == self.namespace and element.text and element.text.strip():
+                locs.append(element.text.strip())
+            if self._depth == 1:
+                # A whole <url> / <sitemap> entry has been read; drop it and everything in it
+                self._root.clear()
+        self.locs += len(locs)
+        return locs
+
+
+def iter_text_chunks(content, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Splits a string into chunks, so a document that is already in memory is still parsed
+    incrementally instead of as one tree.
+    """
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+
+def iter_sitemap_locs(chunks):
+    """
+    Yields the <loc> URLs of an XML sitemap or sitemap index as the document streams in.
+
+    Args:
+    chunks (iterable): Chunks (bytes or str) of the document, e.g. response.iter_content().
+
+    Yields:
+    str: Each URL, in document order.
+    """
+    parser = SitemapStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def read_sitemap(chunks, encoding=None):
+    """
+    Reads a sitemap body, parsing it as it streams if it turns out to be an XML sitemap.
+    Gzip-compressed bodies are decompressed on the fly (see iter_decompressed).
+
+    Reading starts with the streaming parser. As soon as the root element shows a <urlset>
+    or <sitemapindex>, the rest of the body is parsed chunk by chunk and never kept. Any
+    other body (an HTML or plain-text sitemap, or malformed XML) is decoded whole and
+    returned for the caller to handle. A body that breaks off mid-document keeps the URLs
+    read before the error, as a recovering parser would.
+
+    Args:
+    chunks (iterable): Chunks (bytes or str) of the body.
+    encoding (str): Charset used to decode a body that is not an XML sitemap. Defaults to UTF-8.
+
+    Returns:
+    tuple: (sitemap_type (str), locs (list), content (str)). For XML sitemaps content is None;
+    otherwise sitemap_type and locs are None and content holds the decoded body.
+    """
+    chunks = iter_decompressed(chunks)
+    parser = SitemapStreamParser()
+    head = []
+    locs = []
+    try:
+        # The root element is normally in the first chunk, so little is buffered here
+        for chunk in chunks:
+            head.append(chunk)
+            locs.extend(parser.feed(chunk))
+            if parser.sitemap_type is not None:
+                break
+        if parser.sitemap_type in SITEMAP_ROOTS.values():
+            head = None
+            for chunk in chunks:
+                locs.extend(parser.feed(chunk))
+            locs.extend(parser.close())
+            return parser.sitemap_type, locs, None
+    except ET.ParseError as e:
+        if parser.sitemap_type in SITEMAP_ROOTS.values():
+            logger.warning(f"Malformed XML sitemap, keeping the {len(locs)} URLs read before the error: {e}")
+            return parser.sitemap_type, locs, None
+
+    if head and isinstance(head[0], str):
+        return None, None, ''.join(head) + ''.join(chunks)
+    reader = BodyReader(encoding)
+    for chunk in itertools.chain(head, chunks):
+        reader.feed(chunk)
+    return None, None, reader.text
@@ -0,0 +1,86 @@
+import re
+
+QUERY_PATTERN = re.compile(r'\?[^\n]*')
+# A whole URL whose path ends in an image extension; usable as normalize_image_urls' is_valid
+IMAGE_URL_PATTERN = re.compile(r'^[^?#\n]*\.(?:jpe?g|png|webp|gif|avif)(?:[?#][^\n]*)?$', re.IGNORECASE | re.MULTILINE)
+
+
+def largest_srcset_candidate(srcset):
+    """
+    Returns the URL of the widest candidate in a srcset attribute ('a.jpg 320w, b.jpg 640w' -> 'b.jpg'),
+    or None if no candidate has a width descriptor.
+    """
+    best_url, best_width = None, 0
+    for entry in srcset.split(','):
+        parts = entry.split()
+        if len(parts) == 2 and parts[1][-1:] == 'w' and parts[1][:-1].isdigit():
+            width = int(parts[1][:-1])
+            if width > best_width:
+                best_url, best_width = parts[0], width
+    return best_url
+
+
+def normalize_image_urls(urls, base_url=None, srcsets=(), strip_query=False, absolute=False, contains=None,
+                         is_valid=None, remove=None):
+    """
+    Normalizes all image URLs found on a page in one batch and returns them deduplicated.
+
+    Instead of fixing up one <img> at a time, the URLs are deduplicated, joined into one
+    string and each step runs once over the whole batch with a precompiled pattern; only the
+    validator is called per URL, once per distinct URL. Steps run in this order: pick the widest candidate of every srcset, drop
+    query strings, resolve protocol-relative ('//') and root-relative ('/') URLs, keep URLs
+    containing `contains`, keep URLs passing `is_valid`, delete every match of `remove`.
+
+    Args:
+    urls (iterable): src / data-src values; empty values are ignored.
+    base_url (str): Scheme and host of the page, e.g. 'https://dealer.com', for root-relative URLs.
+    srcsets (iterable): srcset attribute values.
+    strip_query (bool): Whether to drop everything from '?' on.
+    absolute (bool): Whether to resolve '//' URLs to https and '/' URLs against `base_url`.
+    contains (str): Only keep URLs containing this substring.
+    is_valid (callable or Pattern): Only keep URLs for which this returns True. A compiled
+    pattern (e.g. IMAGE_URL_PATTERN) is run once over the whole batch with re.MULTILINE
+    semantics and keeps the URLs it matches from ^ to $, which is much faster than a callable.
+    remove (str or Pattern): Regex whose matches are deleted from every kept URL (e.g. size segments);
+    strings are compiled with re.MULTILINE so anchors apply per URL.
+
+    Returns:
+    list: The normalized URLs, in first-seen order, each once.
+    """
+    # Galleries repeat each photo (carousel, thumbnails, lightbox), so duplicates are dropped
+    # before any work is done, and again after normalization, before the validator runs
+    candidates = dict.fromkeys(url for url in urls if url)
+    candidates.update(dict.fromkeys(filter(None, map(largest_srcset_candidate, dict.fromkeys(filter(None, srcsets))))))
+    candidates = list(candidates)
+    if not candidates:
+        return []
+
+    text = '\n'.join(candidates)
+    if text.count('\n') != len(candidates) - 1:
+        # A URL spanning lines would shift every later one; attributes never need the line breaks
+        text = '\n'.join(url.replace('\r', '').replace('\n', '') for url in candidates)
+    if strip_query:
+        text = QUERY_PATTERN.sub('', text)
+    if absolute:
+        # Every URL follows a line break here, so prefixes are fixed with plain replaces:
+        # '//' first, after which the remaining '\n/' lines are root-relative
+        text = ('\n' + text).replace('\n//', '\nhttps://')
+        if base_url:
+            text = text.replace('\n/', '\n' + base_url.rstrip('/') + '/')
+        text = text[1:]
+
+    lines = list(dict.fromkeys(text.split('\n')))
+    if contains:
+        lines = [line for line in lines if contains in line]
+    if isinstance(is_valid, re.Pattern):
+        # One pass over the batch keeps every line the pattern matches in full
+        lines = [match.group() for match in is_valid.finditer('\n'.join(lines))]
+    elif is_valid:
+        lines = [line for line in lines if line and is_valid(line)]
+    if remove and lines:
+        # MULTILINE keeps ^ and $ anchored to each URL rather than to the whole batch
+        remove = re.compile(remove, re.MULTILINE) if isinstance(remove, str) else remove
+        removed = remove.sub('', '\n'.join(lines)).split('\n')
+        # Patterns that can match a line break are applied per URL instead
+        lines = removed if len(removed) == len(lines) else [remove.sub('', line) for line in lines]
+    return list(dict.fromkeys(line for line in lines if line))
@@ -139,3 +139,28 @@ def decode_url_component(component):
     str: The decoded component.
     """
     return unquote(component)
+
+
+# Second-level labels that act as public suffixes under a country TLD (e.g. 'co.uk').
+# Not the full Public Suffix List, but it covers the dealer domains we crawl.
+MULTI_PART_SUFFIX_LABELS = {'co', 'com', 'net', 'org', 'gov', 'ac', 'edu'}
+
+
+def get_registrable_domain(url):
+    """
+    Returns the registrable domain of a URL or hostname (e.g. 'www.shop.example.co.uk' -> 'example.co.uk').
+
+    Args:
+    url (str): A full URL or a bare hostname.
+
+    Returns:
+    str: The lower-cased registrable domain, or the hostname itself for IPs and single-label hosts.
+    """
+    host = urlparse(url).hostname if '//' in url else url.split(':')[0]
+    host = (host or '').lower().rstrip('.')
+    labels = host.split('.')
+    if len(labels) <= 2 or labels[-1].isdigit():
+        return host
+    if len(labels[-1]) == 2 and labels[-2] in MULTI_PART_SUFFIX_LABELS:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])